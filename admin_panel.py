@@ -8,8 +8,8 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory
-from app.models import db_session, Base, engine
+from flask import Flask, render_template, request, redirect, url_for, flash
+from app.models import db_session, engine
 from app.models.user import User
 from app.models.session import UserSession
 from app.models.house import House
@@ -17,21 +17,35 @@ from app.models.persona import Persona
 from app.models.review import Review
 from app.models.ai_log import AILog
 from app.models.verification import Verification, VerificationStatus
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from app.models.schema import ensure_schema
+from app.models.routing import bind_user, read_only
+from app.services.affinity_service import AffinityService
+from app.services.stats_service import StatsService, stats_service
+from app.services.ai_log_retention import AILogRetentionService
+from app.services.image_service import ImageService
+from app.handlers.debug import debug_bp
+from datetime import datetime
+from sqlalchemy.orm import joinedload
 
 # 設定 template 資料夾
 app = Flask(__name__, template_folder="templates")
 app.secret_key = "admin-secret-key"
 
-# 自動建立所有資料表
-Base.metadata.create_all(bind=engine)
+# 線上剖析端點 (/debug/*，需 ADMIN_DEBUG_TOKEN)
+app.register_blueprint(debug_bp)
+
+# 使用者詳情頁顯示的 AI 紀錄筆數
+USER_DETAIL_LOG_LIMIT = 50
+
+# 自動建立所有資料表 (結構指紋相符時略過)
+ensure_schema(engine)
 
 @app.context_processor
 def inject_notifications():
-    """全域注入通知資料"""
-    pending_verifications_count = db_session.query(Verification).filter_by(status=VerificationStatus.PENDING).count()
-    pending_reviews_count = db_session.query(Review).filter_by(status="pending").count()
+    """全域注入通知資料 (使用統計快照中的待審核計數)"""
+    pending = stats_service.pending_counts()
+    pending_verifications_count = pending[StatsService.VERIFICATIONS]
+    pending_reviews_count = pending[StatsService.REVIEWS]
     
     total_notifications = pending_verifications_count + pending_reviews_count
     
@@ -54,79 +68,43 @@ def inject_notifications():
         notifications_list=notifications
     )
 
+@app.before_request
+def bind_admin_user():
+    """後台的寫入 (審核、重置) 之後，儀表板固定讀主庫一段時間"""
+    bind_user("admin-panel")
+
 @app.route("/")
+@read_only
 def index():
     """首頁 (Dashboard)"""
-    users = db_session.query(User).all()
-    users_with_sessions = []
-    # 僅顯示最近 10 筆使用者
-    for user in users[-10:]:
-        session = db_session.query(UserSession).filter_by(user_id=user.user_id).first()
-        users_with_sessions.append((user, session))
+    stats = stats_service.snapshot()
+    
+    # 最近 10 位使用者與其測驗狀態 (單一 JOIN 查詢)
+    users_with_sessions = db_session.query(User, UserSession).outerjoin(
+        UserSession, UserSession.user_id == User.user_id
+    ).order_by(User.created_at.desc()).limit(10).all()
     
     # 查詢待審核的驗證申請
     pending_verifications = db_session.query(Verification).filter_by(
         status=VerificationStatus.PENDING
     ).order_by(Verification.submitted_at.desc()).limit(10).all()
     
-    # 統計數據 for Charts
-    # Persona Distribution
-    persona_counts = {}
-    for p in db_session.query(Persona).all():
-        count = db_session.query(User).filter_by(persona_type=p.name).count()
-        if count > 0:
-            persona_counts[p.name] = count
-    
-    # 未分類
-    unknown_count = db_session.query(User).filter((User.persona_type == None) | (User.persona_type == "")).count()
-    if unknown_count > 0:
-        persona_counts["未分類"] = unknown_count
-
-    # User Growth (Last 7 days)
-    today = datetime.utcnow().date()
-    growth_data = {}
-    # Initialize last 7 days with 0
-    for i in range(6, -1, -1):
-        date_str = (today - timedelta(days=i)).strftime('%Y-%m-%d')
-        growth_data[date_str] = 0
-        
-    # Query data
-    try:
-        last_week = datetime.utcnow() - timedelta(days=7)
-        # Check DB Dialect for date function
-        if 'sqlite' in engine.url.drivername:
-            date_func = func.date(User.created_at)
-        else:
-            # PostgreSQL usually treats date() on timestamp as cast
-            date_func = func.date(User.created_at)
-
-        registrations = db_session.query(
-            date_func, func.count(User.user_id)
-        ).filter(User.created_at >= last_week).group_by(date_func).all()
-        
-        for date_obj, count in registrations:
-            date_str = str(date_obj)
-            if date_str in growth_data:
-                growth_data[date_str] = count
-    except Exception as e:
-        print(f"Error calculating growth: {e}")
-
     return render_template(
         "admin/dashboard.html",
         active_page="dashboard",
-        user_count=db_session.query(User).count(),
-        session_count=db_session.query(UserSession).count(),
-        testing_count=db_session.query(UserSession).filter_by(status="TESTING").count(),
-        house_count=db_session.query(House).count(),
-        persona_count=db_session.query(Persona).count(),
-        pending_count=db_session.query(Verification).filter_by(status=VerificationStatus.PENDING).count(),
-        users=sorted(users_with_sessions, key=lambda x: x[0].created_at or datetime.min, reverse=True),
+        user_count=stats["user_count"],
+        session_count=stats["session_count"],
+        testing_count=stats["testing_count"],
+        house_count=stats["house_count"],
+        persona_count=stats["persona_count"],
+        pending_count=stats["pending"][StatsService.VERIFICATIONS],
+        users=users_with_sessions,
         personas=db_session.query(Persona).all(),
         pending_verifications=pending_verifications,
-        persona_labels=list(persona_counts.keys()),
-        persona_data=list(persona_counts.values()),
-        growth_labels=list(growth_data.keys()),
-        growth_data=list(growth_data.values())
+        persona_labels=list(stats["persona_counts"].keys()),
+        persona_data=list(stats["persona_counts"].values()),
+        growth_labels=list(stats["growth"].keys()),
+        growth_data=list(stats["growth"].values())
     )
 
 @app.route("/user/<user_id>")
@@ -138,9 +116,20 @@ def user_detail(user_id):
         return redirect(url_for("index"))
     
     session = db_session.query(UserSession).filter_by(user_id=user_id).first()
-    logs = db_session.query(AILog).filter_by(user_id=user_id).order_by(AILog.created_at.desc()).all()
+    # 只顯示最近的紀錄 (ai_logs 依月分區，無上限查詢會掃過所有分區)
+    logs = db_session.query(AILog).filter_by(user_id=user_id).order_by(
+        AILog.created_at.desc()
+    ).limit(USER_DETAIL_LOG_LIMIT).all()
     
-    return render_template("admin/user_detail.html", user=user, session=session, logs=logs)
+    return render_template(
+        "admin/user_detail.html", user=user, session=session, logs=logs, log_limit=USER_DETAIL_LOG_LIMIT
+    )
+
+@app.route("/ai-stats")
+def ai_stats():
+    """AI 解析統計 (只讀每日彙總表，不掃描原始紀錄；彙總由 scripts/maintain_ai_logs.py 排程執行)"""
+    chart = AILogRetentionService.chart_data(days=30)
+    return render_template("admin/ai_stats.html", chart=chart, active_page="ai_stats")
 
 # --- House Management Routes ---
 
@@ -172,10 +161,15 @@ def house_new():
             features=features,
             is_active="is_active" in request.form
         )
+        unknown = house.refresh_feature_bits()
         db_session.add(house)
         db_session.commit()
         
+        AffinityService.refresh_house(house.house_id)
+        
         flash(f"已新增房源：{house.name}")
+        if unknown:
+            flash(f"以下設施無法對應標準詞彙，不會參與匹配：{', '.join(unknown)}")
         return redirect(url_for("houses_list"))
     
     # Empty house object for template
@@ -211,9 +205,13 @@ def house_edit(house_id):
                 feat_name = key.replace("feature_", "")
                 features[feat_name] = True
         house.features = features
+        unknown = house.refresh_feature_bits()
         
         db_session.commit()
+        AffinityService.refresh_house(house.house_id)
         flash(f"已更新房源：{house.name}")
+        if unknown:
+            flash(f"以下設施無法對應標準詞彙，不會參與匹配：{', '.join(unknown)}")
         return redirect(url_for("houses_list"))
     
     personas = db_session.query(Persona).all()
@@ -226,6 +224,7 @@ def house_toggle(house_id):
     if house:
         house.is_active = not house.is_active
         db_session.commit()
+        AffinityService.refresh_house(house_id)
         status = "上架" if house.is_active else "下架"
         flash(f"已{status}：{house.name}")
     return redirect(url_for("houses_list"))
@@ -235,8 +234,9 @@ def house_delete(house_id):
     """刪除房源"""
     house = db_session.query(House).filter_by(house_id=house_id).first()
     if house:
-        # 先刪除關聯的 Review
+        # 先刪除關聯的 Review 與匹配矩陣
         db_session.query(Review).filter_by(house_id=house_id).delete()
+        AffinityService.remove_house(house_id)
         
         name = house.name
         db_session.delete(house)
@@ -280,10 +280,15 @@ def persona_new():
             algo_config=algo_config,
             active="active" in request.form
         )
+        unknown = persona.refresh_feature_bits()
         db_session.add(persona)
         db_session.commit()
         
+        AffinityService.refresh_persona(persona.persona_id)
+        
         flash(f"已新增類型：{persona.name}") # Removed Emoji
+        if unknown:
+            flash(f"以下設施無法對應標準詞彙，不會參與匹配：{', '.join(unknown)}")
         return redirect(url_for("index"))
     
     # 空白的 Persona 物件 (用於模板)
@@ -322,9 +327,13 @@ def persona_edit(persona_id):
             "management_pref": request.form.get("management_pref", "").strip() or None,
             "room_type": request.form.get("room_type", "").strip() or None,
         }
+        unknown = persona.refresh_feature_bits()
         
         db_session.commit()
+        AffinityService.refresh_persona(persona.persona_id)
         flash(f"已更新：{persona.name}") # Removed Emoji
+        if unknown:
+            flash(f"以下設施無法對應標準詞彙，不會參與匹配：{', '.join(unknown)}")
         return redirect(url_for("index"))
     
     return render_template("admin/persona_edit.html", persona=persona, is_new=False, active_page="personas")
@@ -336,6 +345,7 @@ def persona_toggle(persona_id):
     if persona:
         persona.active = not persona.active
         db_session.commit()
+        AffinityService.refresh_persona(persona_id)
         status = "啟用" if persona.active else "停用"
         flash(f"已{status}：{persona.name}") # Removed Emoji
     return redirect(url_for("index"))
@@ -346,6 +356,7 @@ def persona_delete(persona_id):
     persona = db_session.query(Persona).filter_by(persona_id=persona_id).first()
     if persona:
         name = persona.name
+        AffinityService.remove_persona(persona_id)
         db_session.delete(persona)
         db_session.commit()
         flash(f"已刪除：{name}") # Removed Emoji
@@ -357,7 +368,8 @@ def persona_delete(persona_id):
 def reviews_list():
     """評價管理列表"""
     status_filter = request.args.get("status")
-    query = db_session.query(Review)
+    # 列表會顯示房源名稱，一併 JOIN 載入避免每列額外查詢
+    query = db_session.query(Review).options(joinedload(Review.house))
     
     if status_filter:
         query = query.filter_by(status=status_filter)
@@ -369,31 +381,50 @@ def reviews_list():
 @app.route("/reviews/<int:review_id>/approve", methods=["POST"])
 def review_approve(review_id):
     """通過評價"""
-    review = db_session.query(Review).filter_by(id=review_id).first()
+    review = db_session.query(Review).filter_by(review_id=review_id).first()
     if review:
+        old_status = review.status
         review.status = "approved"
+        review.house.update_rating_stats()
         db_session.commit()
-        flash(f"已發布評價 #{review.id}") # Removed Emoji
+        stats_service.record_status_change(StatsService.REVIEWS, old_status, review.status)
+        AffinityService.refresh_house(review.house_id)
+        flash(f"已發布評價 #{review.review_id}") # Removed Emoji
     return redirect(request.referrer or url_for("reviews_list"))
 
 @app.route("/reviews/<int:review_id>/reject", methods=["POST"])
 def review_reject(review_id):
     """駁回評價"""
-    review = db_session.query(Review).filter_by(id=review_id).first()
+    review = db_session.query(Review).filter_by(review_id=review_id).first()
     if review:
+        was_approved = review.is_approved()
+        old_status = review.status
         review.status = "rejected"
         review.reject_reason = "管理員駁回" # 簡化，未來可加 UI 輸入理由
+        if was_approved:
+            review.house.update_rating_stats()
         db_session.commit()
-        flash(f"已駁回評價 #{review.id}") # Removed Emoji
+        stats_service.record_status_change(StatsService.REVIEWS, old_status, review.status)
+        if was_approved:
+            AffinityService.refresh_house(review.house_id)
+        flash(f"已駁回評價 #{review.review_id}") # Removed Emoji
     return redirect(request.referrer or url_for("reviews_list"))
 
 @app.route("/reviews/<int:review_id>/delete", methods=["POST"])
 def review_delete(review_id):
     """刪除評價"""
-    review = db_session.query(Review).filter_by(id=review_id).first()
+    review = db_session.query(Review).filter_by(review_id=review_id).first()
     if review:
+        was_approved = review.is_approved()
+        old_status = review.status
+        house = review.house
         db_session.delete(review)
+        if was_approved and house:
+            house.update_rating_stats()
         db_session.commit()
+        stats_service.record_status_change(StatsService.REVIEWS, old_status, None)
+        if was_approved and house:
+            AffinityService.refresh_house(house.house_id)
         flash(f"已刪除評價 #{review_id}") # Removed Emoji
     return redirect(request.referrer or url_for("reviews_list"))
 
@@ -422,6 +453,7 @@ def verification_approve(verification_id):
         flash("驗證申請不存在")
         return redirect(url_for("index"))
     
+    old_status = v.status
     v.status = VerificationStatus.VERIFIED
     v.reviewed_at = datetime.utcnow()
     
@@ -430,6 +462,7 @@ def verification_approve(verification_id):
         user.verification_status = VerificationStatus.VERIFIED
     
     db_session.commit()
+    stats_service.record_status_change(StatsService.VERIFICATIONS, old_status, v.status)
     flash(f"已通過 {v.name} 的驗證申請") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -441,6 +474,7 @@ def verification_reject(verification_id):
         flash("驗證申請不存在")
         return redirect(url_for("index"))
     
+    old_status = v.status
     v.status = VerificationStatus.REJECTED
     v.reviewed_at = datetime.utcnow()
     v.reviewer_note = request.form.get("note", "").strip()
@@ -450,14 +484,15 @@ def verification_reject(verification_id):
         user.verification_status = VerificationStatus.REJECTED
     
     db_session.commit()
+    stats_service.record_status_change(StatsService.VERIFICATIONS, old_status, v.status)
     flash(f"已拒絕 {v.name} 的驗證申請") # Removed Emoji
     return redirect(url_for("index"))
 
 @app.route("/uploads/verifications/<filename>")
 def serve_verification_image(filename):
-    """提供驗證圖片檔案"""
+    """提供驗證圖片檔案 (?size=review|thumb 取衍生圖，尚未產生時回退原始檔)"""
     upload_folder = os.path.join(os.getcwd(), "uploads", "verifications")
-    return send_from_directory(upload_folder, filename)
+    return ImageService.send(upload_folder, filename, request.args.get("size"))
 
 @app.route("/reset-verification/<user_id>", methods=["POST"])
 def reset_verification(user_id):
@@ -471,23 +506,24 @@ def reset_verification(user_id):
     upload_folder = os.path.join(os.getcwd(), "uploads", "verifications")
     
     count = 0
+    images = set()
     for v in verifications:
-        # 嘗試刪除圖片
-        if v.front_image_path:
-            try:
-                os.remove(os.path.join(upload_folder, v.front_image_path))
-            except OSError:
-                pass
-        if v.back_image_path:
-            try:
-                os.remove(os.path.join(upload_folder, v.back_image_path))
-            except OSError:
-                pass
+        images.update(path for path in (v.front_image_path, v.back_image_path) if path)
         db_session.delete(v)
         count += 1
+    db_session.flush()
+    
+    # 相同照片只存一份：其他申請仍引用的檔案不刪除
+    for image in images:
+        in_use = db_session.query(Verification.id).filter(
+            (Verification.front_image_path == image) | (Verification.back_image_path == image)
+        ).first()
+        if not in_use:
+            ImageService.remove(upload_folder, image)
     
     user.verification_status = 'unverified'
     db_session.commit()
+    stats_service.invalidate()
     flash(f"已重置 {user.display_name or user_id} 的驗證狀態") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -498,6 +534,7 @@ def reset_sessions():
     """清空所有 Session"""
     count = db_session.query(UserSession).delete()
     db_session.commit()
+    stats_service.invalidate()
     flash(f"已清空 {count} 筆測驗進度") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -513,6 +550,7 @@ def reset_users():
     # 最後刪除使用者
     user_count = db_session.query(User).delete()
     db_session.commit()
+    stats_service.invalidate()
     flash(f"已清空 {user_count} 筆使用者資料 (含關聯紀錄)") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -524,6 +562,7 @@ def reset_user(user_id):
         session.status = "IDLE"
         session.collected_data = {}
         db_session.commit()
+        stats_service.invalidate()
         flash(f"已重置使用者 {user_id[:20]}...") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -545,6 +584,8 @@ def seed_data():
     from scripts.seed_data import seed_personas, seed_sample_houses
     seed_personas()
     seed_sample_houses()
+    AffinityService.rebuild_all()
+    stats_service.invalidate()
     flash("種子資料已重新初始化") # Removed Emoji
     return redirect(url_for("index"))
 
@@ -4,19 +4,25 @@
 # 說明：建立並設定 Flask 應用程式實例
 # ============================================================
 
-from flask import Flask
-from flask_cors import CORS
+from typing import TYPE_CHECKING
 
 from app.config import config
 
+if TYPE_CHECKING:
+    from flask import Flask
 
-def create_app() -> Flask:
+
+def create_app() -> "Flask":
     """
     Flask 應用程式工廠函式
     
     Returns:
         Flask: 設定完成的 Flask 應用程式實例
     """
+    # 於函式內匯入：只用到 app.config 的腳本不必載入 Flask
+    from flask import Flask
+    from flask_cors import CORS
+    
     app = Flask(__name__)
     
     # 載入設定
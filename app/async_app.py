@@ -0,0 +1,320 @@
+# ============================================================
+# async_app.py - asyncio 版入口 (aiohttp)
+# 專案：Chi Soo 租屋小幫手
+# 說明：/callback 驗章後立即回應 200，事件改在協程中處理；
+#       Step 2 對話的 Ollama 呼叫與 LINE 回覆使用非同步 HTTP，
+#       等待模型時不佔用執行緒，單一程序即可掛著上千個等待中的對話。
+#       資料庫存取與其餘事件沿用原本的同步服務，放在有上限的執行緒池執行；
+#       /api、/liff 等其餘路徑轉交原本的 Flask 應用程式 (WSGI 橋接)
+# 使用方式：python -m app.async_app --port 5000
+# ============================================================
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from aiohttp import web
+from linebot.v3.exceptions import InvalidSignatureError
+from linebot.v3.messaging import (
+    ApiException,
+    AsyncApiClient,
+    AsyncMessagingApi,
+    PushMessageRequest,
+    ReplyMessageRequest,
+    ShowLoadingAnimationRequest,
+    TextMessage,
+)
+from linebot.v3.webhook import WebhookParser
+from linebot.v3.webhooks import (
+    FollowEvent,
+    MessageEvent,
+    PostbackEvent,
+    TextMessageContent,
+    UnfollowEvent,
+)
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from app.config import config
+from app.models import db_session
+from app.models.routing import bind_user
+from app.services.metrics import LINE_API_SECONDS, WEBHOOK_SECONDS
+from app.services.session_service import SessionService
+
+# 處理中的事件超過上限時的回覆
+BUSY_MESSAGE = "目前使用人數較多，請稍後再傳一次訊息喔 🙏"
+
+# 轉交 WSGI 時由 aiohttp 重新計算的標頭
+_HOP_HEADERS = {"content-length", "transfer-encoding", "connection"}
+
+
+class MeteredAsyncApiClient(AsyncApiClient):
+    """記錄每個 LINE API 端點耗時的 AsyncApiClient (同 main.MeteredApiClient)"""
+
+    async def call_api(self, resource_path, method, *args, **kwargs):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await super().call_api(resource_path, method, *args, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            LINE_API_SECONDS.observe(time.perf_counter() - start, endpoint=resource_path, status=status)
+
+
+class AsyncBot:
+    """
+    asyncio 版 Webhook 處理
+
+    記憶體上限：處理中的事件數不超過 max_inflight (超過時直接回覆忙碌訊息)；
+    同時送往 Ollama 的請求不超過 ollama_concurrency，其餘在協程中排隊；
+    同步工作 (資料庫、其餘事件、WSGI) 共用 db_threads 條執行緒，不會超出連線池
+    """
+
+    def __init__(self, flask_app, max_inflight: int = None, ollama_concurrency: int = None,
+                 db_threads: int = None):
+        import app.main as main
+
+        self.main = main
+        self.flask_app = flask_app
+        self.parser = WebhookParser(config.LINE_CHANNEL_SECRET)
+        self.max_inflight = max_inflight or config.ASYNC_MAX_INFLIGHT
+        self.ollama_slots = asyncio.Semaphore(ollama_concurrency or config.OLLAMA_CONCURRENCY)
+        self.executor = ThreadPoolExecutor(
+            max_workers=db_threads or config.ASYNC_DB_THREADS, thread_name_prefix="async-sync"
+        )
+        self.tasks: set[asyncio.Task] = set()
+        # 每位使用者最後排入的事件：同一使用者的事件依序處理 (同 WebhookHandler 逐筆處理)
+        self.user_tails: dict[str, asyncio.Task] = {}
+        self.api_client: Optional[AsyncApiClient] = None
+        self.line: Optional[AsyncMessagingApi] = None
+
+        # 沿用同步版的事件處理函式
+        self.sync_handlers = {
+            PostbackEvent: main.handle_postback,
+            FollowEvent: main.handle_follow,
+            UnfollowEvent: main.handle_unfollow,
+        }
+
+    def build(self) -> web.Application:
+        from app.handlers.verification import MAX_FILE_SIZE
+        from app.services.image_service import CHUNK_SIZE
+
+        # 轉交 Flask 前會讀入整個請求本體：上限需容納驗證照片與 multipart 標頭 (同 upload_image 的預檢)
+        application = web.Application(client_max_size=MAX_FILE_SIZE + CHUNK_SIZE)
+        application.router.add_post("/callback", self.callback)
+        application.router.add_route("*", "/{tail:.*}", self.wsgi)
+        application.on_startup.append(self._startup)
+        application.on_cleanup.append(self._cleanup)
+        return application
+
+    async def _startup(self, application: web.Application) -> None:
+        # 於事件迴圈內建立 (configuration 於啟動時讀取，壓測時可改指向替身)
+        self.api_client = MeteredAsyncApiClient(self.main.configuration)
+        self.line = AsyncMessagingApi(self.api_client)
+
+    async def _cleanup(self, application: web.Application) -> None:
+        if self.tasks:
+            print(f"⏳ 等待 {len(self.tasks)} 個處理中的事件...")
+            _, pending = await asyncio.wait(self.tasks, timeout=30)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.api_client.close()
+        await self.main.ollama_service.aclose()
+        self.executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------
+    # Webhook
+    # ------------------------------------------------------------
+
+    async def callback(self, request: web.Request) -> web.Response:
+        """LINE Webhook 接收端點：驗章後立即回應，事件於背景協程處理"""
+        signature = request.headers.get("X-Line-Signature", "")
+        body = await request.text()
+
+        try:
+            with WEBHOOK_SECONDS.time(stage="parse"):
+                events = self.parser.parse(body, signature)
+        except InvalidSignatureError:
+            print("❌ 無效的簽章")
+            raise web.HTTPBadRequest()
+
+        for event in events:
+            if len(self.tasks) >= self.max_inflight:
+                task = asyncio.create_task(self._reply_busy(event))
+            else:
+                task = self._schedule(event)
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return web.Response(text="OK")
+
+    def _schedule(self, event) -> asyncio.Task:
+        """
+        排入事件：不同使用者並行處理，同一使用者的事件接在前一個事件之後
+
+        Step 2 每則訊息都是「讀取已收集資料 → 模型 → 寫回」，同一使用者並行處理會互相覆寫、回覆順序錯亂
+        """
+        user_id = getattr(event.source, "user_id", None)
+        previous = self.user_tails.get(user_id) if user_id else None
+        task = asyncio.create_task(self._handle_after(previous, event))
+        if user_id:
+            self.user_tails[user_id] = task
+            task.add_done_callback(lambda done: self._release_tail(user_id, done))
+        return task
+
+    def _release_tail(self, user_id: str, task: asyncio.Task) -> None:
+        if self.user_tails.get(user_id) is task:
+            del self.user_tails[user_id]
+
+    async def _handle_after(self, previous: Optional[asyncio.Task], event) -> None:
+        if previous is not None:
+            # 只等待完成，不論成功或失敗 (_handle 已自行記錄錯誤)
+            await asyncio.wait([previous])
+        await self._handle(event)
+
+    async def _handle(self, event) -> None:
+        try:
+            with WEBHOOK_SECONDS.time(stage="handle"):
+                if isinstance(event, MessageEvent) and isinstance(event.message, TextMessageContent):
+                    if await self.run_sync(SessionService.is_testing, event.source.user_id):
+                        await self._handle_testing(event)
+                    else:
+                        await self.run_sync(self.main.handle_text_message, event)
+                elif type(event) in self.sync_handlers:
+                    await self.run_sync(self.sync_handlers[type(event)], event)
+        except Exception as e:
+            print(f"❌ 事件處理失敗: {e.__class__.__name__}: {e}")
+
+    async def _handle_testing(self, event: MessageEvent) -> None:
+        """Step 2 對話：等待模型期間只佔用一個協程"""
+        user_id = event.source.user_id
+        user_message = event.message.text.strip()
+
+        try:
+            await self.line.show_loading_animation(
+                ShowLoadingAnimationRequest(chat_id=user_id, loading_seconds=50)
+            )
+        except ApiException as e:
+            print(f"⚠️ 無法顯示 Loading 動畫: {e.status}")
+
+        collected_data = await self.run_sync(SessionService.get_collected_data, user_id)
+        async with self.ollama_slots:
+            result = await self.main.ollama_service.analyze_and_respond_async(
+                user_message, collected_data, user_id=user_id
+            )
+        # 綁定使用者：寫入後 LIFF 查詢固定讀主庫 (同 handle_text_message)
+        await self.run_sync(self.main.save_testing_result, user_id, result, user_id=user_id)
+        await self._reply(event, result["response"])
+
+    async def _reply_busy(self, event) -> None:
+        if getattr(event, "reply_token", None):
+            try:
+                await self._reply(event, BUSY_MESSAGE)
+            except ApiException as e:
+                print(f"⚠️ 忙碌訊息回覆失敗: {e.status}")
+
+    async def _reply(self, event, text: str) -> None:
+        """以 reply token 回覆；排隊過久 token 已失效 (400) 時改用 push"""
+        messages = [TextMessage(text=text)]
+        try:
+            await self.line.reply_message(
+                ReplyMessageRequest(reply_token=event.reply_token, messages=messages)
+            )
+        except ApiException as e:
+            if e.status != 400:
+                raise
+            await self.line.push_message(PushMessageRequest(to=event.source.user_id, messages=messages))
+
+    async def run_sync(self, func, *args, user_id: Optional[str] = None):
+        """
+        在執行緒池執行同步函式，結束時歸還資料庫連線
+
+        Args:
+            user_id: 執行前綁定到該執行緒資料庫 session 的使用者 (見 routing.bind_user)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call_and_release, func, args, user_id)
+
+    @staticmethod
+    def _call_and_release(func, args, user_id: Optional[str] = None):
+        try:
+            if user_id:
+                bind_user(user_id)
+            return func(*args)
+        finally:
+            db_session.remove()
+
+    # ------------------------------------------------------------
+    # 其餘路徑：轉交 Flask
+    # ------------------------------------------------------------
+
+    async def wsgi(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        environ = EnvironBuilder(
+            path=request.path,
+            method=request.method,
+            query_string=request.query_string,
+            headers=list(request.headers.items()),
+            data=body,
+        ).get_environ()
+        environ["REMOTE_ADDR"] = request.remote or ""
+
+        loop = asyncio.get_running_loop()
+        status, headers, payload = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+        return web.Response(status=status, headers=headers, body=payload)
+
+    def _call_wsgi(self, environ: dict) -> tuple[int, list, bytes]:
+        app_iter, status, headers = run_wsgi_app(self.flask_app, environ, buffered=True)
+        try:
+            payload = b"".join(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+        headers = [(key, value) for key, value in headers if key.lower() not in _HOP_HEADERS]
+        return int(status.split(" ", 1)[0]), headers, payload
+
+
+def create_app(flask_app=None, **options) -> web.Application:
+    """
+    建立 aiohttp 應用程式
+
+    Args:
+        flask_app: 處理其餘路徑的 Flask 應用程式 (預設為 run.py 設定完成的 app)
+        **options: max_inflight / ollama_concurrency / db_threads
+    """
+    if flask_app is None:
+        from run import create_app as create_flask_app
+        flask_app = create_flask_app()
+    return AsyncBot(flask_app, **options).build()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo asyncio 版伺服器")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--max-inflight", type=int, help="處理中事件上限 (預設 ASYNC_MAX_INFLIGHT)")
+    parser.add_argument("--ollama-concurrency", type=int, help="同時送往 Ollama 的請求數 (預設 OLLAMA_CONCURRENCY)")
+    parser.add_argument("--db-threads", type=int, help="同步工作執行緒數 (預設 ASYNC_DB_THREADS)")
+    args = parser.parse_args()
+
+    application = create_app(
+        max_inflight=args.max_inflight,
+        ollama_concurrency=args.ollama_concurrency,
+        db_threads=args.db_threads,
+    )
+
+    from app.startup import startup_timer
+    if config.OLLAMA_WARMUP:
+        from app.services.model_warmer import model_warmer
+        model_warmer.start()
+
+    config.print_status()
+    startup_timer.print_report()
+    web.run_app(application, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
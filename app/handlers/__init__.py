@@ -17,8 +17,10 @@ def register_handlers(app: Flask) -> None:
     # 註冊 API 藍圖
     from app.handlers.api import api_bp
     from app.handlers.verification import verification_bp
+    from app.handlers.debug import debug_bp
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(verification_bp)  # 已包含 /api/verification prefix
+    app.register_blueprint(debug_bp)  # 已包含 /debug prefix，需 ADMIN_DEBUG_TOKEN
     
     # [停用] LIFF 頁面藍圖 - 功能重新設計中
     # from app.handlers.liff import liff_bp
@@ -4,14 +4,22 @@
 # 說明：提供 LIFF 前端與管理後台呼叫的 REST API
 # ============================================================
 
+import hashlib
 from datetime import date
-from flask import Blueprint, jsonify, request
+from typing import Optional
+from flask import Blueprint, Response, jsonify, request, send_file
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
 
 from app.models import db_session
+from app.models.routing import read_only
 from app.models.house import House
 from app.models.favorite import Favorite
 from app.models.review import Review
 from app.models.user import User
+from app.services.affinity_service import AffinityService
+from app.services.catalog_index import catalog_signature
+from app.services.weight_service import WeightService
 
 api_bp = Blueprint("api", __name__)
 
@@ -26,11 +34,33 @@ def health_check():
     return jsonify({"status": "ok", "service": "Chi Soo API", "version": "1.0.0"})
 
 
+# ============================================================
+# 價值觀雷達圖
+# ============================================================
+
+@api_bp.route("/charts/weights/<key>.png", methods=["GET"])
+def get_weight_chart(key):
+    """
+    取得 Step 1 價值觀雷達圖 (key 為六題答案，例如 ABBABA)
+
+    圖片於啟動時預先繪製；URL 帶有圖表版本，可長期快取
+    """
+    path = WeightService.ensure_chart(key)
+    if path is None:
+        return jsonify({"error": "Chart not found"}), 404
+
+    response = send_file(path, mimetype="image/png", conditional=True, max_age=365 * 24 * 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # ============================================================
 # 房源 API
 # ============================================================
 
 @api_bp.route("/houses", methods=["GET"])
+@read_only
 def get_houses():
     """
     取得房源列表
@@ -50,6 +80,13 @@ def get_houses():
     max_rent = request.args.get("max_rent", type=int)
     room_type = request.args.get("room_type")
     
+    # 條件式請求：目錄沒變就直接回 304，不查房源也不序列化
+    count, last_updated = catalog_signature()
+    etag = _weak_etag("houses", count, last_updated)
+    not_modified = _not_modified(etag, last_updated)
+    if not_modified:
+        return not_modified
+    
     # 建立查詢
     query = db_session.query(House).filter(House.is_active == True)
     
@@ -70,23 +107,40 @@ def get_houses():
     offset = (page - 1) * limit
     houses = query.order_by(House.avg_rating.desc()).offset(offset).limit(limit).all()
     
-    return jsonify({
+    response = jsonify({
         "houses": [house_to_dict(h) for h in houses],
         "page": page,
         "limit": limit,
         "total": total,
         "pages": (total + limit - 1) // limit
     })
+    return _with_validators(response, etag, last_updated)
 
 
 @api_bp.route("/houses/<int:house_id>", methods=["GET"])
+@read_only
 def get_house_detail(house_id: int):
     """取得單一房源詳情"""
-    house = db_session.query(House).filter_by(house_id=house_id).first()
-    
-    if not house:
+    # 房源本身與已核准評價的版本 (單一查詢)
+    approved = (Review.house_id == house_id, Review.status == "approved")
+    version = db_session.query(
+        House.updated_at,
+        select(func.count(Review.review_id)).where(*approved).scalar_subquery(),
+        select(func.max(Review.updated_at)).where(*approved).scalar_subquery()
+    ).filter(House.house_id == house_id).first()
+    
+    if not version:
         return jsonify({"error": "House not found"}), 404
     
+    house_updated, review_count, review_updated = version
+    etag = _weak_etag("house", house_id, house_updated, review_count, review_updated)
+    last_modified = max(filter(None, (house_updated, review_updated)), default=None)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    house = db_session.query(House).filter_by(house_id=house_id).first()
+    
     # 取得該房源的評價
     reviews = db_session.query(Review).filter(
         Review.house_id == house_id,
@@ -96,7 +150,7 @@ def get_house_detail(house_id: int):
     result = house_to_dict(house)
     result["reviews"] = [review_to_dict(r) for r in reviews]
     
-    return jsonify(result)
+    return _with_validators(jsonify(result), etag, last_modified)
 
 
 # ============================================================
@@ -104,6 +158,7 @@ def get_house_detail(house_id: int):
 # ============================================================
 
 @api_bp.route("/favorites", methods=["GET"])
+@read_only
 def get_favorites():
     """取得收藏列表 (需要 X-User-Id header)"""
     user_id = request.headers.get("X-User-Id")
@@ -111,18 +166,28 @@ def get_favorites():
     if not user_id:
         return jsonify({"error": "X-User-Id header is required"}), 401
     
-    favorites = db_session.query(Favorite).filter(
+    # 收藏清單內含房源資料，因此版本同時包含收藏與房源目錄
+    fav_count, fav_last = db_session.query(
+        func.count(Favorite.id),
+        func.max(Favorite.created_at)
+    ).filter(Favorite.user_id == user_id).one()
+    house_count, house_last = catalog_signature()
+    etag = _weak_etag("favorites", user_id, fav_count, fav_last, house_count, house_last)
+    last_modified = max(filter(None, (fav_last, house_last)), default=None)
+    not_modified = _not_modified(etag, last_modified, private=True)
+    if not_modified:
+        return not_modified
+    
+    # 收藏與房源以單一 JOIN 查詢取得
+    favorites = db_session.query(Favorite).options(
+        joinedload(Favorite.house)
+    ).filter(
         Favorite.user_id == user_id
     ).order_by(Favorite.created_at.desc()).all()
     
-    # 取得房源資料
-    house_ids = [f.house_id for f in favorites]
-    houses = db_session.query(House).filter(House.house_id.in_(house_ids)).all()
-    house_map = {h.house_id: h for h in houses}
-    
     result = []
     for fav in favorites:
-        house = house_map.get(fav.house_id)
+        house = fav.house
         if house:
             result.append({
                 "favorite_id": fav.id,
@@ -130,7 +195,8 @@ def get_favorites():
                 "created_at": fav.created_at.isoformat()
             })
     
-    return jsonify({"favorites": result, "total": len(result)})
+    response = jsonify({"favorites": result, "total": len(result)})
+    return _with_validators(response, etag, last_modified, private=True)
 
 
 @api_bp.route("/favorites", methods=["POST"])
@@ -202,6 +268,7 @@ def delete_favorite(favorite_id: int):
 # ============================================================
 
 @api_bp.route("/reviews", methods=["GET"])
+@read_only
 def get_reviews():
     """取得評價列表"""
     house_id = request.args.get("house_id", type=int)
@@ -224,6 +291,11 @@ def get_reviews():
         query = query.filter(Review.status == "approved")
     
     total = query.count()
+    
+    # 需要房源資訊時一併 JOIN 載入，避免逐筆存取 review.house 觸發額外查詢
+    if include_house_info:
+        query = query.options(joinedload(Review.house))
+    
     offset = (page - 1) * limit
     reviews = query.order_by(Review.created_at.desc()).offset(offset).limit(limit).all()
     
@@ -307,8 +379,16 @@ def delete_review(review_id: int):
     if not review:
         return jsonify({"error": "Review not found or not owned by you"}), 404
     
+    was_approved = review.is_approved()
+    house = review.house
     db_session.delete(review)
+    
+    # 已公開的評價被刪除時，評分統計與匹配矩陣需一併更新
+    if was_approved and house:
+        house.update_rating_stats()
     db_session.commit()
+    if was_approved and house:
+        AffinityService.refresh_house(house.house_id)
     
     return jsonify({"message": "Review deleted"})
 
@@ -390,11 +470,12 @@ def withdraw_review(review_id: int):
     review.status = "pending"
     db_session.commit()
     
-    # 更新房源的評價統計
+    # 更新房源的評價統計與匹配矩陣
     house = db_session.query(House).filter_by(house_id=review.house_id).first()
     if house:
         house.update_rating_stats()
         db_session.commit()
+        AffinityService.refresh_house(house.house_id)
     
     return jsonify({
         "message": "Review withdrawn, now pending for re-approval",
@@ -406,6 +487,46 @@ def withdraw_review(review_id: int):
 # 輔助函數
 # ============================================================
 
+# 回應格式版本，house_to_dict / review_to_dict 欄位變動時遞增，讓舊 ETag 失效
+ETAG_FORMAT_VERSION = 1
+
+
+def _weak_etag(*parts) -> str:
+    """由資料版本 (數量、最後更新時間等) 產生 ETag 值"""
+    raw = repr((ETAG_FORMAT_VERSION,) + parts).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def _with_validators(response: Response, etag: str, last_modified=None, private: bool = False) -> Response:
+    """
+    加上快取驗證標頭 (弱 ETag + Last-Modified)
+    
+    使用 no-cache：瀏覽器可保存回應，但每次都需以 If-None-Match 重新驗證。
+    """
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache" if private else "no-cache"
+    if private:
+        response.vary.add("X-User-Id")
+    return response
+
+
+def _not_modified(etag: str, last_modified=None, private: bool = False) -> Optional[Response]:
+    """
+    檢查 If-None-Match，資料未變更時回傳 304 回應
+    
+    只以 ETag 判斷：刪除房源不會推進最大 updated_at，
+    單靠 If-Modified-Since 會誤判為未變更。
+    
+    Returns:
+        Response: 304 回應，需要完整回應時回傳 None
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _with_validators(Response(status=304), etag, last_modified, private)
+
+
 def house_to_dict(house: House) -> dict:
     """將 House 物件轉為字典"""
     return {
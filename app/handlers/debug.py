@@ -0,0 +1,108 @@
+# ============================================================
+# handlers/debug.py - 線上剖析 API Handler
+# 專案：Chi Soo 租屋小幫手
+# 說明：需管理員權杖的剖析端點，主程式與管理後台共用
+#       未設定 ADMIN_DEBUG_TOKEN 時整組端點回傳 404
+# ============================================================
+
+import hmac
+import json
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, abort
+
+from app.config import config
+from app.services.profiler import ProfilerBusyError, memory_profiler, sampling_profiler
+
+
+# 建立 Blueprint
+debug_bp = Blueprint('debug', __name__, url_prefix="/debug")
+
+
+@debug_bp.before_request
+def require_admin_token():
+    """驗證 X-Debug-Token 或 Authorization: Bearer 權杖"""
+    token = config.ADMIN_DEBUG_TOKEN
+    if not token:
+        abort(404)
+
+    supplied = request.headers.get("X-Debug-Token", "")
+    auth = request.headers.get("Authorization", "")
+    if not supplied and auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({"success": False, "error": "權杖錯誤"}), 403
+
+
+@debug_bp.route("/profile", methods=["GET"])
+def cpu_profile():
+    """
+    對整個程序做限時 CPU 取樣 (請求會等待取樣結束)
+
+    Query Parameters:
+        - seconds: 取樣秒數 (預設 10，上限 60)
+        - interval: 取樣間隔毫秒 (預設 5)
+        - format: collapsed (預設) / speedscope
+
+    Response:
+        - 200: 剖析檔下載
+        - 409: 已有剖析正在進行
+    """
+    seconds = request.args.get("seconds", 10, type=float)
+    interval = request.args.get("interval", 5, type=float)
+    output = request.args.get("format", "collapsed")
+
+    try:
+        result = sampling_profiler.profile(seconds=seconds, interval_ms=interval)
+    except ProfilerBusyError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    if output == "speedscope":
+        body = json.dumps(sampling_profiler.to_speedscope(result, name=f"chisoo {stamp}"))
+        filename, mimetype = f"profile-{stamp}.speedscope.json", "application/json"
+    else:
+        body = sampling_profiler.to_collapsed(result)
+        filename, mimetype = f"profile-{stamp}.collapsed.txt", "text/plain"
+
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["X-Profile-Samples"] = str(result["samples"])
+    return response
+
+
+@debug_bp.route("/memory/start", methods=["POST"])
+def memory_start():
+    """
+    啟動 tracemalloc 並記錄基準快照
+
+    Query Parameters:
+        - frames: 每筆配置保留的堆疊深度 (預設 10)
+    """
+    memory_profiler.start(frames=request.args.get("frames", 10, type=int))
+    return jsonify({"success": True, "tracing": True})
+
+
+@debug_bp.route("/memory/snapshot", methods=["GET"])
+def memory_snapshot():
+    """
+    拍攝快照並與上一次快照比較 (需先 /memory/start)
+
+    Query Parameters:
+        - limit: 回傳筆數 (預設 30)
+        - group: lineno (預設) / filename / traceback
+    """
+    try:
+        data = memory_profiler.snapshot(
+            limit=request.args.get("limit", 30, type=int),
+            group_by=request.args.get("group", "lineno"),
+        )
+    except RuntimeError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, "data": data})
+
+
+@debug_bp.route("/memory/stop", methods=["POST"])
+def memory_stop():
+    """停止 tracemalloc，恢復零成本"""
+    memory_profiler.stop()
+    return jsonify({"success": True, "tracing": False})
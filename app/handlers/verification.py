@@ -6,15 +6,16 @@
 # ============================================================
 
 import os
-import uuid
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 from sqlalchemy.exc import IntegrityError
 
 from app.models import db_session, User, Verification
 from app.models.verification import VerificationStatus
+from app.models.routing import read_only
 from app.services.session_service import SessionService
+from app.services.image_service import ImageService, UploadTooLarge, UnsupportedImage, CHUNK_SIZE
 
 
 # 建立 Blueprint
@@ -45,8 +46,13 @@ def upload_image():
     Response:
         - 200: { "success": true, "filename": "xxx.jpg" }
         - 400: { "success": false, "error": "錯誤訊息" }
+        - 413: { "success": false, "error": "檔案過大" }
     """
     try:
+        # 請求本體明顯超過上限時，不解析 multipart 直接拒絕
+        if request.content_length and request.content_length > MAX_FILE_SIZE + CHUNK_SIZE:
+            return jsonify({"success": False, "error": "檔案過大，最大 5MB"}), 413
+        
         # 檢查是否有檔案
         if 'file' not in request.files:
             return jsonify({"success": False, "error": "沒有上傳檔案"}), 400
@@ -60,21 +66,15 @@ def upload_image():
         if not allowed_file(file.filename):
             return jsonify({"success": False, "error": "不支援的檔案類型，請上傳 PNG 或 JPG"}), 400
         
-        # 檢查檔案大小
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
-        
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({"success": False, "error": "檔案過大，最大 5MB"}), 400
-        
-        # 生成唯一檔名
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4()}.{ext}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        # 分塊寫入並檢查大小與檔頭，原圖交給背景程序去除 EXIF 並產生審核圖
+        try:
+            filename = ImageService.save_stream(file.stream, UPLOAD_FOLDER, MAX_FILE_SIZE)
+        except UploadTooLarge:
+            return jsonify({"success": False, "error": "檔案過大，最大 5MB"}), 413
+        except UnsupportedImage:
+            return jsonify({"success": False, "error": "不支援的檔案類型，請上傳 PNG 或 JPG"}), 400
         
-        # 儲存檔案
-        file.save(filepath)
+        ImageService.schedule_normalize(UPLOAD_FOLDER, filename)
         
         return jsonify({
             "success": True,
@@ -168,6 +168,7 @@ def submit_verification():
 
 
 @verification_bp.route("/status/<user_id>", methods=["GET"])
+@read_only
 def get_verification_status(user_id):
     """
     查詢使用者的驗證狀態
@@ -198,9 +199,12 @@ def get_verification_status(user_id):
 def get_image(filename):
     """
     取得上傳的圖片（用於顯示）
+    
+    Query:
+        - size: review (審核用壓縮圖) / thumb (縮圖)，省略則回傳原始檔
     """
     try:
-        return send_from_directory(UPLOAD_FOLDER, filename)
+        return ImageService.send(UPLOAD_FOLDER, filename, request.args.get("size"))
     except Exception as e:
         return jsonify({"error": "圖片不存在"}), 404
 
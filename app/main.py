@@ -7,7 +7,8 @@
 import json
 import threading
 from urllib.parse import parse_qs
-from flask import Flask, request, abort
+import time
+from flask import Flask, Response, request, abort
 from linebot.v3 import WebhookHandler
 from linebot.v3.messaging import (
     Configuration,
@@ -34,18 +35,52 @@ from app.services.session_service import SessionService
 from app.services.ollama_service import OllamaService
 from app.services.matching_service import MatchingService
 from app.services.weight_service import WeightService
+from app.services.feature_vocabulary import has_feature
+from app.services.recommendation_cache import recommendation_cache
+from app.services.metrics import (
+    LINE_API_SECONDS, MATCHING_SECONDS, WEBHOOK_SECONDS, instrument_engine, registry
+)
+from app.models import engine, replica_engine
+from app.models.routing import bind_user
 
 # 建立 Flask 應用程式
 app = Flask(__name__)
 
 # 設定 LINE Bot SDK
-configuration = Configuration(access_token=config.LINE_CHANNEL_ACCESS_TOKEN)
+configuration = Configuration(
+    access_token=config.LINE_CHANNEL_ACCESS_TOKEN,
+    host=config.LINE_API_HOST or None
+)
 handler = WebhookHandler(config.LINE_CHANNEL_SECRET)
 
+
+class MeteredApiClient(ApiClient):
+    """記錄每個 LINE API 端點耗時的 ApiClient (以路徑樣板為標籤，如 /v2/bot/message/reply)"""
+    
+    def call_api(self, resource_path, method, *args, **kwargs):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return super().call_api(resource_path, method, *args, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            LINE_API_SECONDS.observe(time.perf_counter() - start, endpoint=resource_path, status=status)
+
+
+# 記錄資料庫查詢耗時與連線池使用量
+instrument_engine(engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+
 # 初始化服務
 ollama_service = OllamaService()
 matching_service = MatchingService()
 
+# 推薦 Carousel 每頁房源數
+RECOMMENDATION_PAGE_SIZE = 5
+
 
 @app.route("/")
 def index():
@@ -61,7 +96,8 @@ def callback():
     app.logger.info(f"收到 Webhook 請求: {body}")
     
     try:
-        handler.handle(body, signature)
+        with WEBHOOK_SECONDS.time(stage="handle"):
+            handler.handle(body, signature)
     except InvalidSignatureError:
         app.logger.error("無效的簽章")
         abort(400)
@@ -69,6 +105,12 @@ def callback():
     return "OK"
 
 
+@app.route("/metrics")
+def metrics():
+    """效能指標端點 (Prometheus 文字格式)"""
+    return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ============================================================
 # 文字訊息處理
 # ============================================================
@@ -77,10 +119,11 @@ def callback():
 def handle_text_message(event: MessageEvent):
     """處理文字訊息事件"""
     user_id = event.source.user_id
+    bind_user(user_id)  # 寫入後 LIFF 查詢固定讀主庫
     user_message = event.message.text.strip()
     reply_token = event.reply_token
     
-    with ApiClient(configuration) as api_client:
+    with MeteredApiClient(configuration) as api_client:
         line_bot_api = MessagingApi(api_client)
         
         # 全域：收到訊息立即顯示 Loading 動畫
@@ -122,16 +165,18 @@ def handle_testing_message(line_bot_api, reply_token, user_id, user_message):
     # 呼叫 AI 分析 (傳入 user_id 以儲存紀錄)
     result = ollama_service.analyze_and_respond(user_message, collected_data, user_id=user_id)
     
+    save_testing_result(user_id, result)
+    reply_text(line_bot_api, reply_token, result["response"])
+
+
+def save_testing_result(user_id, result):
+    """儲存 AI 分析結果 (同步與 asyncio 入口共用)"""
     # 更新收集到的資料
     SessionService.update_collected_data(user_id, result["collected_data"])
     
     if result["is_complete"]:
         # 資料已齊全，切回 IDLE 並提示輸入「開始分析」
         SessionService.pause_test(user_id)
-        reply_text(line_bot_api, reply_token, result["response"])
-    else:
-        # 繼續追問
-        reply_text(line_bot_api, reply_token, result["response"])
 
 
 def handle_start_analysis(line_bot_api, reply_token, user_id, collected_data):
@@ -174,7 +219,7 @@ def handle_start_analysis(line_bot_api, reply_token, user_id, collected_data):
         except Exception as e:
             app.logger.error(f"背景分析發生錯誤: {e}")
     
-    thread = threading.Thread(target=run_matching_async)
+    thread = threading.Thread(target=run_matching_async, name="matching")
     thread.daemon = True
     thread.start()
 
@@ -211,6 +256,7 @@ def reply_text(line_bot_api, reply_token, text):
 def handle_postback(event: PostbackEvent):
     """處理 Postback 事件 (Rich Menu 點擊)"""
     user_id = event.source.user_id
+    bind_user(user_id)  # 寫入後 LIFF 查詢固定讀主庫
     postback_data = event.postback.data
     reply_token = event.reply_token
     
@@ -220,7 +266,7 @@ def handle_postback(event: PostbackEvent):
     
     app.logger.info(f"Postback: user={user_id}, action={action}")
     
-    with ApiClient(configuration) as api_client:
+    with MeteredApiClient(configuration) as api_client:
         line_bot_api = MessagingApi(api_client)
         
         # 全域：收到 Postback 立即顯示 Loading 動畫
@@ -353,12 +399,12 @@ def handle_weight_answer(line_bot_api, reply_token, user_id, q_idx, choice):
     else:
         # 完成所有題目 -> 結算並進入 AI 聊天
         session = SessionService.get_or_create_session(user_id)
-        weights = WeightService.calculate_weights(session.weight_answers)
-        chart_url = WeightService.generate_radar_chart_url(weights)
-        summary = WeightService.generate_summary_text(weights)
+        outcome = WeightService.get_outcome(session.weight_answers)  # 64 種結果已於啟動時預先計算
+        chart_url = outcome["chart_url"]
+        summary = outcome["summary"]
         
         # 儲存並轉移狀態
-        SessionService.finish_weight_selection(user_id, weights)
+        SessionService.finish_weight_selection(user_id, dict(outcome["weights"]))
         SessionService.start_test(user_id, keep_progress=True) # 確保狀態是 TESTING 且保留 weights
         
         # 1. 發送雷達圖與總結 (調整價值觀標題)
@@ -668,31 +714,52 @@ def handle_show_map(line_bot_api, reply_token):
     reply_text(line_bot_api, reply_token, message)
 
 
-def handle_show_recommendations(line_bot_api, reply_token, user_id, persona_id):
-    """顯示推薦房源 - Flex Message Carousel 版本"""
+def build_recommendation_page(persona_id, offset):
+    """
+    組裝一頁推薦房源 Carousel (供推薦頁面快取與背景預取使用)
+    
+    Args:
+        persona_id: 人物誌 ID
+        offset: 偏移量
+        
+    Returns:
+        FlexContainer: Carousel 容器，沒有房源時回傳 None
+    """
     from app.models.persona import Persona
     from app.models import db_session
     
-    # 取得推薦房源（含匹配分數）
-    houses_with_scores = matching_service.get_recommended_houses_with_scores(persona_id, limit=5)
-    
+    # 取得推薦房源（含匹配分數），所有分頁使用相同的全目錄排序
+    houses_with_scores = matching_service.get_recommended_houses_with_scores(
+        persona_id, limit=RECOMMENDATION_PAGE_SIZE, offset=offset
+    )
     if not houses_with_scores:
+        return None
+    
+    # 取得 Persona 資訊用於生成推薦理由
+    persona = db_session.query(Persona).filter_by(persona_id=persona_id).first()
+    
+    with MATCHING_SECONDS.time(phase="carousel_build"):
+        return create_recommendation_carousel(
+            houses_with_scores,
+            persona,
+            persona_id,
+            offset=offset
+        )
+
+
+def handle_show_recommendations(line_bot_api, reply_token, user_id, persona_id):
+    """顯示推薦房源 - Flex Message Carousel 版本"""
+    recommendation_carousel = recommendation_cache.get(persona_id, 0, build_recommendation_page)
+    
+    if recommendation_carousel is None:
         reply_text(line_bot_api, reply_token, 
             "📭 目前沒有找到適合的房源～\n\n"
             "請稍後再試，或調整您的租屋需求！"
         )
         return
     
-    # 取得 Persona 資訊用於生成推薦理由
-    persona = db_session.query(Persona).filter_by(persona_id=persona_id).first()
-    
-    # 建立精美的房源 Carousel
-    recommendation_carousel = create_recommendation_carousel(
-        houses_with_scores, 
-        persona, 
-        persona_id, 
-        offset=0
-    )
+    # 回覆第一頁的同時，在背景先準備好下一頁
+    recommendation_cache.prefetch(persona_id, RECOMMENDATION_PAGE_SIZE, build_recommendation_page)
     
     line_bot_api.reply_message(
         ReplyMessageRequest(
@@ -786,11 +853,12 @@ def create_diagnosis_flex(persona, match_percent):
 def handle_follow(event: FollowEvent):
     """處理加入好友事件"""
     user_id = event.source.user_id
+    bind_user(user_id)  # 寫入後 LIFF 查詢固定讀主庫
     reply_token = event.reply_token
     
     app.logger.info(f"新使用者加入: {user_id}")
     
-    with ApiClient(configuration) as api_client:
+    with MeteredApiClient(configuration) as api_client:
         line_bot_api = MessagingApi(api_client)
         
         # 嘗試取得使用者 Profile
@@ -962,17 +1030,17 @@ def handle_show_house_detail(line_bot_api, reply_token, house_id):
 
 def handle_show_more_houses(line_bot_api, reply_token, user_id, persona_id, offset):
     """顯示更多推薦房源（分頁）"""
-    houses = matching_service.get_recommended_houses(persona_id, limit=5, offset=offset)
+    # 通常已由上一頁預取完成，直接從記憶體回覆
+    houses_carousel = recommendation_cache.get(persona_id, offset, build_recommendation_page)
     
-    if not houses:
+    if houses_carousel is None:
         reply_text(line_bot_api, reply_token, 
             "📭 已顯示所有適合的房源～\n\n"
             "沒看到心動的嗎？可以試試調整您的需求！"
         )
         return
     
-    # 建立房源 Carousel
-    houses_carousel = create_houses_carousel(houses, persona_id, offset)
+    recommendation_cache.prefetch(persona_id, offset + RECOMMENDATION_PAGE_SIZE, build_recommendation_page)
     
     line_bot_api.reply_message(
         ReplyMessageRequest(
@@ -1461,8 +1529,8 @@ def create_recommendation_carousel(houses_with_scores, persona, persona_id, offs
         match_score = item["match_score"]
         reason = item["recommendation_reason"]
         
-        # 解析特徵標籤
-        features = house.features or {}
+        # 解析特徵標籤 (標準設施位元集)
+        feature_bits = house.feature_bits or 0
         feature_tags = []
         feature_map = {
             "garbage_service": "🚛 子母車",
@@ -1474,7 +1542,7 @@ def create_recommendation_carousel(houses_with_scores, persona, persona_id, offs
             "parking": "🅿️ 停車"
         }
         for key, label in feature_map.items():
-            if features.get(key):
+            if has_feature(feature_bits, key):
                 feature_tags.append(label)
         
         # 匹配度顏色
@@ -1620,7 +1688,7 @@ def create_recommendation_carousel(houses_with_scores, persona, persona_id, offs
         bubbles.append(bubble)
     
     # 添加「查看更多」卡片
-    next_offset = offset + 5
+    next_offset = offset + RECOMMENDATION_PAGE_SIZE
     persona_name = persona.name if persona else "你"
     
     more_bubble = {
@@ -4,47 +4,95 @@
 # 說明：SQLAlchemy ORM 設定與資料庫初始化
 # ============================================================
 
-from flask import Flask
+import os
+from typing import TYPE_CHECKING
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, scoped_session, DeclarativeBase
 
 from app.config import config
 
+if TYPE_CHECKING:
+    from flask import Flask
+
 
 class Base(DeclarativeBase):
     """SQLAlchemy 基礎類別"""
     pass
 
 
+def engine_options(url: str) -> dict:
+    """
+    依設定產生 create_engine 參數
+
+    SQLite (測試、基準測試) 只套用編譯快取，不使用連線池設定；
+    psycopg 3 驅動另外啟用伺服器端預備語句
+    """
+    options = {"echo": config.DEBUG, "query_cache_size": config.DB_QUERY_CACHE_SIZE}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    if parsed.get_driver_name() == "psycopg":
+        options["connect_args"] = {"prepare_threshold": config.DB_PREPARE_THRESHOLD or None}
+    return options
+
+
+def make_fork_safe(target: Engine) -> None:
+    """
+    fork 後在子程序丟棄繼承的連線池 (不關閉父程序仍在使用的連線)
+
+    gunicorn preload 或 multiprocessing fork 時，子程序會自行建立新連線
+    """
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: target.dispose(close=False))
+
+
 # 建立資料庫引擎
-engine = create_engine(config.DATABASE_URL, echo=config.DEBUG)
+engine = create_engine(config.DATABASE_URL, **engine_options(config.DATABASE_URL))
+make_fork_safe(engine)
+
+# 唯讀副本 (選填)：標記為唯讀的路由改讀副本
+from app.models.routing import RoutingSession, configure_replica
+
+replica_engine = None
+if config.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(config.DATABASE_REPLICA_URL, **engine_options(config.DATABASE_REPLICA_URL))
+    make_fork_safe(replica_engine)
+    configure_replica(replica_engine)
 
 # 建立 Session 工廠
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # 建立 Scoped Session (線程安全)
 db_session = scoped_session(SessionLocal)
 
 
-def init_db(app: Flask) -> None:
+def init_db(app: "Flask") -> None:
     """
     初始化資料庫連線
     
     Args:
         app: Flask 應用程式實例
     """
-    # 匯入所有 Model 以確保它們被註冊
-    from app.models.user import User
-    from app.models.session import UserSession
-    from app.models.house import House
-    from app.models.review import Review
-    from app.models.persona import Persona
-    from app.models.favorite import Favorite
-    from app.models.ai_log import AILog
-    from app.models.verification import Verification
+    # 結構指紋相符時略過 create_all (所有 Model 已於本模組底部匯入)
+    from app.models.schema import ensure_schema
+    ensure_schema(engine)
     
-    # 建立所有表格
-    Base.metadata.create_all(bind=engine)
+    # 記錄請求的使用者 (寫入後固定讀主庫用)
+    from app.models.routing import bind_user, request_user_id
+
+    @app.before_request
+    def bind_request_user():
+        bind_user(request_user_id())
     
     # 註冊清理函式
     @app.teardown_appcontext
@@ -74,11 +122,14 @@ from app.models.review import Review
 from app.models.persona import Persona
 from app.models.favorite import Favorite
 from app.models.ai_log import AILog
+from app.models.ai_log_summary import AILogDailySummary
 from app.models.verification import Verification
+from app.models.affinity import HouseAffinity
 
 __all__ = [
     "Base",
     "engine",
+    "replica_engine",
     "db_session",
     "get_db",
     "init_db",
@@ -89,5 +140,7 @@ __all__ = [
     "Persona",
     "Favorite",
     "AILog",
+    "AILogDailySummary",
     "Verification",
+    "HouseAffinity",
 ]
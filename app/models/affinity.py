@@ -0,0 +1,50 @@
+# ============================================================
+# models/affinity.py - 人物誌 × 房源匹配矩陣模型
+# 專案：Chi Soo 租屋小幫手
+# 說明：預先計算並儲存每組 (人物誌, 房源) 的匹配分數與推薦理由，
+#       推薦頁面只需依索引讀取
+# ============================================================
+
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class HouseAffinity(Base):
+    """
+    匹配矩陣表
+    
+    只包含「啟用中的人物誌 × 上架中的房源」，
+    房源、人物誌或評分異動時只重算受影響的列或欄。
+    
+    Attributes:
+        persona_id: 人物誌 ID (主鍵, 外鍵)
+        house_id: 房源 ID (主鍵, 外鍵)
+        score: 匹配分數 (0-100)
+        reason: 推薦理由文字
+        updated_at: 計算時間
+    """
+    __tablename__ = "house_affinities"
+    __table_args__ = (
+        # 推薦頁面排序用：同一人物誌依分數排列
+        Index("ix_house_affinities_rank", "persona_id", "score"),
+    )
+    
+    persona_id: Mapped[str] = mapped_column(
+        String(20),
+        ForeignKey("personas.persona_id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    house_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("houses.house_id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    reason: Mapped[str] = mapped_column(String(200), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self) -> str:
+        return f"<HouseAffinity {self.persona_id} x House {self.house_id}: {self.score}>"
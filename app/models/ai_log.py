@@ -15,6 +15,9 @@ class AILog(Base):
     """
     AI 思考紀錄表
     
+    PostgreSQL 上可用 scripts/maintain_ai_logs.py 轉為依 created_at 的月分區表，
+    過期分區會先彙總到 AILogDailySummary 再刪除。
+    
     Attributes:
         id: 主鍵 (自增)
         user_id: LINE User ID (外鍵)
@@ -22,7 +25,10 @@ class AILog(Base):
         user_input: 使用者輸入
         ai_raw_response: AI 原始回應
         extracted_data: 提取出的結構化資料 (JSON)
-        is_success: 是否成功解析
+        is_success: 模型結果是否採用 (閒聊時的空結果為成功；欄位不合法或漏提取、改由規則解析補救時為失敗)
+        model: 提供提取結果的模型
+        latency_ms: 該次模型呼叫耗時 (毫秒)
+        escalated: 小模型結果未通過檢查、改由大模型提取
         created_at: 建立時間
     """
     __tablename__ = "ai_logs"
@@ -38,7 +44,10 @@ class AILog(Base):
     ai_raw_response: Mapped[str] = mapped_column(Text, nullable=True)
     extracted_data: Mapped[dict] = mapped_column(JSON, default=dict)
     is_success: Mapped[bool] = mapped_column(Boolean, default=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    model: Mapped[str] = mapped_column(String(100), nullable=True)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=True)
+    escalated: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     
     # 關聯
     user = relationship("User", backref="ai_logs")
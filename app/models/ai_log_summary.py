@@ -0,0 +1,45 @@
+# ============================================================
+# models/ai_log_summary.py - AI 紀錄每日彙總模型
+# 專案：Chi Soo 租屋小幫手
+# 說明：將 ai_logs 依 (日期, 主題) 彙總，原始紀錄過期刪除後仍可繪製趨勢
+# ============================================================
+
+from datetime import date, datetime
+from sqlalchemy import String, Integer, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class AILogDailySummary(Base):
+    """
+    AI 紀錄每日彙總表
+
+    Attributes:
+        day: 日期 (UTC)
+        topic: 詢問主題 (無主題時為 "unknown")
+        attempts: 回合數
+        successes: 成功解析數
+        llm_count: 由 LLM 提取成功的回合數
+        rule_count: 由規則解析成功的回合數
+        guidance_count: 提取失敗、改為引導的回合數
+        updated_at: 彙總時間
+    """
+    __tablename__ = "ai_log_daily_summaries"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    topic: Mapped[str] = mapped_column(String(50), primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    successes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    llm_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rule_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    guidance_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    @property
+    def success_rate(self) -> float:
+        """成功率 (0~1)"""
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def __repr__(self) -> str:
+        return f"<AILogDailySummary {self.day} {self.topic} {self.successes}/{self.attempts}>"
@@ -5,8 +5,8 @@
 # ============================================================
 
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, DateTime, Text, JSON, Boolean
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, Float, DateTime, Text, JSON, Boolean
+from sqlalchemy.orm import Mapped, mapped_column, object_session
 
 from app.models import Base
 
@@ -23,6 +23,7 @@ class House(Base):
         rent: 租金
         room_type: 房型 (套房/雅房/家庭式)
         features: 特徵標籤 JSON (子母車:T, 電梯:F...)
+        feature_bits: 標準設施位元集 (儲存時由 features 編碼)
         description: 詳細描述
         image_url: 封面圖連結
         images: 多張圖片 JSON 陣列
@@ -43,6 +44,7 @@ class House(Base):
     rent: Mapped[int] = mapped_column(Integer, nullable=False)
     room_type: Mapped[str] = mapped_column(String(20), default="套房")  # 套房/雅房/整層
     features: Mapped[dict] = mapped_column(JSON, default=dict)
+    feature_bits: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     image_url: Mapped[str] = mapped_column(String(500), nullable=True)
     images: Mapped[list] = mapped_column(JSON, default=list)
@@ -65,8 +67,37 @@ class House(Base):
         """檢查是否具備某特徵"""
         return self.features.get(feature_key, False)
     
+    def refresh_feature_bits(self) -> list[str]:
+        """
+        依 features 重新編碼設施位元集 (每次修改 features 後呼叫)
+        
+        Returns:
+            list[str]: 無法辨識的設施名稱
+        """
+        from app.services.feature_vocabulary import encode_features
+        
+        self.feature_bits, unknown = encode_features(self.features)
+        return unknown
+    
     def update_rating(self, new_avg: float, new_count: int) -> None:
         """更新評分統計"""
         self.avg_rating = new_avg
         self.review_count = new_count
         self.updated_at = datetime.utcnow()
+    
+    def update_rating_stats(self) -> None:
+        """依已通過審核的評價重新計算評分統計"""
+        from sqlalchemy import func
+        from app.models.review import Review
+        
+        session = object_session(self)
+        session.flush()  # Session 未開啟 autoflush，先送出尚未寫入的評價狀態
+        
+        avg, count = session.query(
+            func.avg(Review.rating),
+            func.count(Review.review_id)
+        ).filter(
+            Review.house_id == self.house_id,
+            Review.status == "approved"
+        ).one()
+        self.update_rating(round(float(avg or 0), 2), count)
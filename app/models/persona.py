@@ -5,7 +5,7 @@
 # ============================================================
 
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, JSON, Boolean
+from sqlalchemy import String, BigInteger, DateTime, Text, JSON, Boolean
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Base
@@ -26,6 +26,8 @@ class Persona(Base):
         description: 診斷書上的描述文案
         keywords: 觸發關鍵字 JSON 列表 (如 ["便宜", "雅房"])
         algo_config: 匹配演算法參數 JSON
+        required_bits: 必要設施位元集 (儲存時由 algo_config 編碼)
+        bonus_bits: 加分設施位元集 (儲存時由 algo_config 編碼)
         icon_url: 類型圖示 URL
         active: 是否啟用此分類
         created_at: 建立時間
@@ -38,6 +40,8 @@ class Persona(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
     keywords: Mapped[list] = mapped_column(JSON, default=list)
     algo_config: Mapped[dict] = mapped_column(JSON, default=dict)
+    required_bits: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    bonus_bits: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
     icon_url: Mapped[str] = mapped_column(String(500), nullable=True)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -65,6 +69,19 @@ class Persona(Base):
         """取得加分設施清單"""
         return self.algo_config.get("bonus", [])
     
+    def refresh_feature_bits(self) -> list[str]:
+        """
+        依 algo_config 重新編碼必要/加分設施位元集 (每次修改設定後呼叫)
+        
+        Returns:
+            list[str]: 無法辨識的設施名稱
+        """
+        from app.services.feature_vocabulary import encode_features
+        
+        self.required_bits, unknown_required = encode_features(self.get_required_features())
+        self.bonus_bits, unknown_bonus = encode_features(self.get_bonus_features())
+        return unknown_required + unknown_bonus
+    
     def get_preferred_locations(self) -> list[str]:
         """取得偏好地點清單"""
         return self.algo_config.get("preferred_locations", [])
@@ -0,0 +1,257 @@
+# ============================================================
+# models/routing.py - 讀寫分離路由
+# 專案：Chi Soo 租屋小幫手
+# 說明：標記為唯讀的路由改由唯讀副本 (DATABASE_REPLICA_URL) 查詢；
+#       使用者剛寫入後的一段時間內固定讀主庫 (read-your-writes)，
+#       副本延遲過大或連線失敗時自動回退主庫
+# ============================================================
+
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import config
+
+
+# 副本延遲 (秒)：非副本時為 0；已重播完收到的 WAL 時為 0 (避免閒置主庫被誤判為延遲)
+_POSTGRES_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaMonitor:
+    """
+    副本健康檢查
+
+    每隔 REPLICA_CHECK_SECONDS 查詢一次延遲 (結果快取)；
+    延遲超過上限或連線失敗時標記為不可用，冷卻後再重新檢查
+    """
+
+    COOLDOWN_SECONDS = 30
+
+    def __init__(self, engine: Engine, max_lag: float, interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self._healthy = False
+        self._checked_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """副本目前是否可用 (快取期間內不查詢資料庫)"""
+        if time.monotonic() < self._checked_until:
+            return self._healthy
+        # 同時只由一個執行緒檢查，其餘沿用上次結果
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            self._healthy = self._probe()
+            wait = self.interval if self._healthy else self.COOLDOWN_SECONDS
+            self._checked_until = time.monotonic() + wait
+        finally:
+            self._lock.release()
+        return self._healthy
+
+    def mark_down(self) -> None:
+        """查詢失敗時呼叫：冷卻期間改讀主庫"""
+        self._healthy = False
+        self._checked_until = time.monotonic() + self.COOLDOWN_SECONDS
+
+    def _probe(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = float(conn.execute(_POSTGRES_LAG_SQL).scalar() or 0.0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag = 0.0
+        except SQLAlchemyError as e:
+            print(f"⚠️ 唯讀副本無法連線，改讀主庫: {e.__class__.__name__}")
+            self.lag = None
+            return False
+
+        if self.lag > self.max_lag:
+            print(f"⚠️ 唯讀副本延遲 {self.lag:.1f}s 超過 {self.max_lag}s，改讀主庫")
+            return False
+        return True
+
+
+class ReadYourWrites:
+    """
+    記錄剛寫入過的使用者，在期限內固定讀主庫
+
+    除了程序內記憶體，也在 directory 下以使用者雜湊為檔名、寫入時間為 mtime 記錄，
+    同一台主機的所有 gunicorn worker 共用：寫入落在 worker A、下一次讀取落在 worker B 時仍讀主庫。
+    未指定 directory 時只記錄在程序內
+    """
+
+    def __init__(self, seconds: float, directory: Optional[str] = None):
+        self.seconds = seconds
+        self.directory = directory
+        self._pins: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def pin(self, key: str) -> None:
+        with self._lock:
+            self._pins[key] = time.monotonic() + self.seconds
+            # 順便清除過期項目，避免無限成長
+            if len(self._pins) > 10_000:
+                now = time.monotonic()
+                self._pins = {k: until for k, until in self._pins.items() if until > now}
+                self._prune_files()
+
+        if self.directory:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                with open(self._path(key), "a"):
+                    pass
+                os.utime(self._path(key))
+            except OSError as e:
+                print(f"⚠️ 無法記錄寫入時間，其他 worker 可能讀到副本: {e}")
+
+    def is_pinned(self, key: Optional[str]) -> bool:
+        if not key:
+            return False
+        until = self._pins.get(key)
+        if until is not None and until > time.monotonic():
+            return True
+        if not self.directory:
+            return False
+        try:
+            return os.stat(self._path(key)).st_mtime + self.seconds > time.time()
+        except OSError:
+            return False
+
+    def clear(self) -> None:
+        """清除所有記錄 (測試用)"""
+        with self._lock:
+            self._pins.clear()
+        self._prune_files(expired_only=False)
+
+    def _prune_files(self, expired_only: bool = True) -> None:
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        deadline = time.time() - self.seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if not expired_only or entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# 副本設定 (未設定 DATABASE_REPLICA_URL 時為 None)
+replica_monitor: Optional[ReplicaMonitor] = None
+read_your_writes = ReadYourWrites(config.READ_YOUR_WRITES_SECONDS, config.READ_YOUR_WRITES_DIR or None)
+
+
+class RoutingSession(Session):
+    """
+    依請求標記選擇連線：
+
+    - session.info["replica"] 為 True 且本次未寫入、副本可用時讀副本
+    - flush (寫入) 與其餘情況一律使用主庫 (或測試時 configure 的 bind)
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_monitor is not None
+            and self.info.get("replica")
+            and not self.info.get("wrote")
+            and not self._flushing
+            and replica_monitor.available()
+        ):
+            return replica_monitor.engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id"):
+        read_your_writes.pin(session.info["user_id"])
+
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop("wrote", None)
+
+
+def configure_replica(engine: Optional[Engine]) -> Optional[ReplicaMonitor]:
+    """設定 (或以 None 停用) 唯讀副本"""
+    global replica_monitor
+    replica_monitor = ReplicaMonitor(
+        engine, config.REPLICA_MAX_LAG_SECONDS, config.REPLICA_CHECK_SECONDS
+    ) if engine is not None else None
+    return replica_monitor
+
+
+def bind_user(user_id: Optional[str]) -> None:
+    """記錄目前請求的使用者，提交寫入後該使用者一段時間內固定讀主庫"""
+    from app.models import db_session
+    db_session.info["user_id"] = user_id
+
+
+def request_user_id() -> Optional[str]:
+    """從 X-User-Id header、路徑、查詢參數或 JSON 內容取得使用者 ID"""
+    from flask import request
+
+    user_id = (
+        request.headers.get("X-User-Id")
+        or (request.view_args or {}).get("user_id")
+        or request.args.get("user_id")
+    )
+    if user_id:
+        return user_id
+    # JSON 內容不一定是物件 (如 "abc"、[1, 2])
+    body = request.get_json(silent=True)
+    return body.get("user_id") if isinstance(body, dict) else None
+
+
+def read_only(view):
+    """
+    唯讀路由裝飾器：查詢改走副本
+
+    使用者剛寫入過則讀主庫；副本查詢失敗時標記副本不可用並以主庫重試一次
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if replica_monitor is None:
+            return view(*args, **kwargs)
+
+        from app.models import db_session
+
+        info = db_session.info
+        info["replica"] = not read_your_writes.is_pinned(info.get("user_id") or request_user_id())
+        try:
+            return view(*args, **kwargs)
+        except OperationalError:
+            if not info.get("replica"):
+                raise
+            replica_monitor.mark_down()
+            db_session.rollback()
+            info["replica"] = False
+            return view(*args, **kwargs)
+        finally:
+            info.pop("replica", None)
+
+    return wrapper
@@ -0,0 +1,124 @@
+# ============================================================
+# models/schema.py - 資料表結構版本檢查
+# 專案：Chi Soo 租屋小幫手
+# 說明：以所有 Model 定義計算結構指紋並存於 schema_meta 表；
+#       啟動時只需一次查詢比對指紋，相符即略過 create_all
+#       (create_all 每張表都要向資料庫查詢一次是否存在)；
+#       create_all 不會替既有資料表新增欄位，缺欄位時不記錄指紋並提示遷移腳本
+# ============================================================
+
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, delete, insert, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import Base, engine
+
+
+# 結構版本紀錄 (只保留一筆)
+schema_meta = Table(
+    "schema_meta",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+# 既有資料表新增欄位的遷移腳本 ((資料表, 欄位) -> 腳本)
+MIGRATION_SCRIPTS = {
+    ("houses", "feature_bits"): "scripts/add_feature_bits_columns.py",
+    ("personas", "required_bits"): "scripts/add_feature_bits_columns.py",
+    ("personas", "bonus_bits"): "scripts/add_feature_bits_columns.py",
+    ("ai_logs", "model"): "scripts/add_ai_log_model_columns.py",
+    ("ai_logs", "latency_ms"): "scripts/add_ai_log_model_columns.py",
+    ("ai_logs", "escalated"): "scripts/add_ai_log_model_columns.py",
+    ("user_sessions", "weight_stage"): "scripts/add_weight_columns.py",
+    ("user_sessions", "weight_answers"): "scripts/add_weight_columns.py",
+    ("user_sessions", "weights"): "scripts/add_weight_columns.py",
+}
+
+
+def schema_version() -> str:
+    """
+    由所有資料表、欄位型別與索引計算結構指紋
+
+    Model 有任何增減欄位或索引時指紋即改變，下次啟動會自動執行 create_all
+    """
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda item: item.name or ""):
+            digest.update(f"|ix:{index.name}".encode())
+    return digest.hexdigest()
+
+
+def stored_version(bind: Engine) -> Optional[str]:
+    """讀取資料庫中記錄的結構指紋 (尚未建立 schema_meta 時回傳 None)"""
+    try:
+        with bind.connect() as conn:
+            return conn.execute(select(schema_meta.c.version).limit(1)).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def missing_columns(conn) -> list[tuple[str, str]]:
+    """
+    列出既有資料表中缺少的 Model 欄位
+
+    Returns:
+        list[tuple[str, str]]: [(資料表, 欄位), ...]
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend((table.name, column.name) for column in table.columns if column.name not in existing)
+    return missing
+
+
+def ensure_schema(bind: Optional[Engine] = None) -> bool:
+    """
+    確保資料表結構為最新版本
+
+    既有資料表缺少欄位時 (create_all 不會新增欄位) 不記錄指紋，
+    印出需要執行的遷移腳本，下次啟動會再檢查一次
+
+    Args:
+        bind: 資料庫引擎 (預設為主要引擎)
+
+    Returns:
+        bool: 是否執行了 create_all (指紋相符時為 False)
+    """
+    bind = bind or engine
+    version = schema_version()
+    if stored_version(bind) == version:
+        return False
+
+    with bind.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        missing = missing_columns(conn)
+        if not missing:
+            conn.execute(delete(schema_meta))
+            conn.execute(insert(schema_meta).values(id=1, version=version, applied_at=datetime.utcnow()))
+
+    if missing:
+        print("⚠️ 既有資料表缺少欄位，請執行遷移腳本後重新啟動:")
+        scripts: dict[Optional[str], list[str]] = {}
+        for table, column in missing:
+            scripts.setdefault(MIGRATION_SCRIPTS.get((table, column)), []).append(f"{table}.{column}")
+        for script, columns in scripts.items():
+            command = f"python {script}" if script else "(無對應腳本，請手動新增欄位)"
+            print(f"   {command}  # {', '.join(columns)}")
+        return True
+
+    print(f"🗄️ 資料表結構已更新 (版本 {version[:12]})")
+    return True
@@ -1,12 +1,24 @@
 # ============================================================
 # services/__init__.py - 服務層模組初始化
 # 專案：Chi Soo 租屋小幫手
-# 說明：匯出所有核心服務類別
+# 說明：匯出所有核心服務類別 (首次存取時才匯入，
+#       匯入單一服務模組不會連帶載入 requests、SQLAlchemy 等)
 # ============================================================
 
-from app.services.ollama_service import OllamaService
-from app.services.matching_service import MatchingService
-from app.services.session_service import SessionService
+import importlib
+
+_EXPORTS = {
+    "OllamaService": "app.services.ollama_service",
+    "MatchingService": "app.services.matching_service",
+    "SessionService": "app.services.session_service",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "OllamaService",
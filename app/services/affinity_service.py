@@ -0,0 +1,135 @@
+# ============================================================
+# services/affinity_service.py - 匹配矩陣維護服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：維護 house_affinities 表，房源、人物誌或評分異動時
+#       只重算受影響的列 (人物誌) 或欄 (房源)
+# ============================================================
+
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.models import db_session
+from app.models.affinity import HouseAffinity
+from app.models.house import House
+from app.models.persona import Persona
+from app.services.matching_service import MatchingService
+
+
+class AffinityService:
+    """
+    匹配矩陣維護服務
+
+    所有方法皆會自行 commit，呼叫端應在原本的異動 commit 之後呼叫。
+    """
+
+    @staticmethod
+    def _build_row(matching: MatchingService, house: House, persona: Persona, now: datetime) -> dict:
+        """計算單一 (人物誌, 房源) 的分數與推薦理由"""
+        score = matching._calculate_house_match_score(house, persona)
+        return {
+            "persona_id": persona.persona_id,
+            "house_id": house.house_id,
+            "score": score,
+            "reason": matching._generate_recommendation_reason(house, persona, score),
+            "updated_at": now
+        }
+
+    @staticmethod
+    def refresh_persona(persona_id: str) -> int:
+        """
+        重算某人物誌的整列 (人物誌新增、修改或啟用狀態變更時呼叫)
+
+        Args:
+            persona_id: 人物誌 ID
+
+        Returns:
+            int: 寫入的筆數
+        """
+        db_session.query(HouseAffinity).filter_by(persona_id=persona_id).delete()
+
+        persona = db_session.query(Persona).filter_by(persona_id=persona_id).first()
+        rows = []
+        if persona and persona.active:
+            matching = MatchingService()
+            now = datetime.utcnow()
+            houses = db_session.query(House).filter(House.is_active == True).all()
+            rows = [AffinityService._build_row(matching, house, persona, now) for house in houses]
+            if rows:
+                db_session.execute(insert(HouseAffinity), rows)
+
+        db_session.commit()
+        print(f"🧮 匹配矩陣已更新: persona={persona_id} ({len(rows)} 筆)")
+        return len(rows)
+
+    @staticmethod
+    def refresh_house(house_id: int) -> int:
+        """
+        重算某房源的整欄 (房源新增、修改、上下架或評分變動時呼叫)
+
+        Args:
+            house_id: 房源 ID
+
+        Returns:
+            int: 寫入的筆數
+        """
+        db_session.query(HouseAffinity).filter_by(house_id=house_id).delete()
+
+        house = db_session.query(House).filter_by(house_id=house_id).first()
+        rows = []
+        if house and house.is_active:
+            matching = MatchingService()
+            now = datetime.utcnow()
+            personas = db_session.query(Persona).filter_by(active=True).all()
+            rows = [AffinityService._build_row(matching, house, persona, now) for persona in personas]
+            if rows:
+                db_session.execute(insert(HouseAffinity), rows)
+
+        db_session.commit()
+        print(f"🧮 匹配矩陣已更新: house={house_id} ({len(rows)} 筆)")
+        return len(rows)
+
+    @staticmethod
+    def remove_house(house_id: int) -> None:
+        """刪除房源前清除其整欄"""
+        db_session.query(HouseAffinity).filter_by(house_id=house_id).delete()
+
+    @staticmethod
+    def remove_persona(persona_id: str) -> None:
+        """刪除人物誌前清除其整列"""
+        db_session.query(HouseAffinity).filter_by(persona_id=persona_id).delete()
+
+    @staticmethod
+    def backfill_missing() -> int:
+        """
+        補建矩陣中還沒有任何資料的啟用人物誌 (啟動或部署時呼叫)
+
+        推薦分頁只讀矩陣、不在請求中補建；沒有上架房源時不會寫入任何列，
+        下次啟動會再檢查一次
+
+        Returns:
+            int: 寫入的總筆數
+        """
+        built = {persona_id for (persona_id,) in db_session.query(HouseAffinity.persona_id).distinct()}
+        total = 0
+        for persona in db_session.query(Persona).filter_by(active=True).all():
+            if persona.persona_id not in built:
+                total += AffinityService.refresh_persona(persona.persona_id)
+        db_session.remove()
+        return total
+
+    @staticmethod
+    def rebuild_all() -> int:
+        """
+        重建整個矩陣 (種子資料或大量匯入後使用)
+
+        Returns:
+            int: 寫入的總筆數
+        """
+        db_session.query(HouseAffinity).delete()
+        db_session.commit()
+
+        total = 0
+        for persona in db_session.query(Persona).filter_by(active=True).all():
+            total += AffinityService.refresh_persona(persona.persona_id)
+        return total
@@ -0,0 +1,325 @@
+# ============================================================
+# services/ai_log_retention.py - AI 紀錄分區與保留服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：將 ai_logs 彙總為每日統計 (AILogDailySummary)，
+#       維護 PostgreSQL 月分區，並依保留期限刪除過期的原始紀錄
+# ============================================================
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert, text
+
+from app.config import config
+from app.models import db_session
+from app.models.ai_log import AILog
+from app.models.ai_log_summary import AILogDailySummary
+
+
+PARTITION_PREFIX = "ai_logs_p"
+DEFAULT_PARTITION = "ai_logs_default"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: date) -> date:
+    """取得該月第一天"""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """月份加減 (day 須為每月第一天)"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """月分區名稱，如 ai_logs_p2025_03"""
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+class AILogRetentionService:
+    """
+    AI 紀錄分區與保留服務
+
+    所有方法皆會自行 commit。分區相關方法只在 ai_logs 已轉為
+    PostgreSQL 分區表時作用，其他資料庫改以 DELETE 刪除過期紀錄。
+    """
+
+    # ========================================
+    # 每日彙總
+    # ========================================
+
+    @staticmethod
+    def rollup(start: date, end: date) -> int:
+        """
+        重新彙總 [start, end) 區間的每日統計 (可重複執行)
+
+        Args:
+            start: 起始日 (含)
+            end: 結束日 (不含)
+
+        Returns:
+            int: 寫入的彙總筆數
+        """
+        source = case(
+            (AILog.ai_raw_response.like("[規則解析]%"), "rule"),
+            (AILog.ai_raw_response.like("[引導]%"), "guidance"),
+            else_="llm"
+        )
+        day = func.date(AILog.created_at)
+        topic = func.coalesce(AILog.topic, "unknown")
+
+        rows = db_session.query(
+            day,
+            topic,
+            func.count(AILog.id),
+            func.sum(case((AILog.is_success == True, 1), else_=0)),
+            func.sum(case((source == "llm", 1), else_=0)),
+            func.sum(case((source == "rule", 1), else_=0)),
+            func.sum(case((source == "guidance", 1), else_=0))
+        ).filter(
+            AILog.created_at >= datetime.combine(start, datetime.min.time()),
+            AILog.created_at < datetime.combine(end, datetime.min.time())
+        ).group_by(day, topic).all()
+
+        now = datetime.utcnow()
+        summaries = [{
+            # SQLite 的 date() 回傳字串，PostgreSQL 回傳 date
+            "day": date.fromisoformat(str(row_day)),
+            "topic": row_topic,
+            "attempts": attempts,
+            "successes": successes or 0,
+            "llm_count": llm or 0,
+            "rule_count": rule or 0,
+            "guidance_count": guidance or 0,
+            "updated_at": now
+        } for row_day, row_topic, attempts, successes, llm, rule, guidance in rows]
+
+        db_session.execute(delete(AILogDailySummary).where(
+            AILogDailySummary.day >= start,
+            AILogDailySummary.day < end
+        ))
+        if summaries:
+            db_session.execute(insert(AILogDailySummary), summaries)
+        db_session.commit()
+        return len(summaries)
+
+    @staticmethod
+    def rollup_pending(today: Optional[date] = None) -> int:
+        """
+        彙總尚未彙總的完整日 (最後一次彙總日之後到昨天)
+
+        Returns:
+            int: 寫入的彙總筆數
+        """
+        today = today or datetime.utcnow().date()
+
+        last_day = db_session.query(func.max(AILogDailySummary.day)).scalar()
+        if last_day:
+            start = date.fromisoformat(str(last_day)) + timedelta(days=1)
+        else:
+            first_log = db_session.query(func.min(AILog.created_at)).scalar()
+            if not first_log:
+                return 0
+            start = first_log.date()
+
+        if start >= today:
+            return 0
+        return AILogRetentionService.rollup(start, today)
+
+    # ========================================
+    # PostgreSQL 月分區
+    # ========================================
+
+    @staticmethod
+    def is_partitioned() -> bool:
+        """ai_logs 是否為 PostgreSQL 分區表"""
+        if db_session.get_bind().dialect.name != "postgresql":
+            return False
+        return db_session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'ai_logs'"
+        )).first() is not None
+
+    @staticmethod
+    def list_partitions() -> list[tuple[str, date]]:
+        """
+        列出所有月分區
+
+        Returns:
+            list[tuple[str, date]]: [(分區名稱, 月份第一天), ...] 依月份排序
+        """
+        names = db_session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'ai_logs'"
+        )).scalars().all()
+
+        partitions = []
+        for name in names:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda item: item[1])
+
+    @staticmethod
+    def create_partition(month: date) -> None:
+        """
+        建立某月分區 (不 commit)
+
+        若預設分區已收到該月的資料，先暫時卸下預設分區並把資料搬進新分區，
+        否則 PostgreSQL 會拒絕建立重疊的分區。
+        """
+        start, end = month_start(month), add_months(month_start(month), 1)
+        name = partition_name(start)
+        bounds = {"start": start, "end": end}
+
+        has_default = db_session.execute(text(
+            "SELECT 1 FROM pg_class WHERE relname = :name"
+        ), {"name": DEFAULT_PARTITION}).first() is not None
+        stray_rows = has_default and db_session.execute(text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end LIMIT 1"
+        ), bounds).first() is not None
+
+        if stray_rows:
+            db_session.execute(text(f"ALTER TABLE ai_logs DETACH PARTITION {DEFAULT_PARTITION}"))
+
+        db_session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF ai_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+        if stray_rows:
+            db_session.execute(text(
+                f"INSERT INTO ai_logs SELECT * FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end"
+            ), bounds)
+            db_session.execute(text(
+                f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end"
+            ), bounds)
+            db_session.execute(text(f"ALTER TABLE ai_logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+    @staticmethod
+    def ensure_partitions(months_ahead: int = 2, today: Optional[date] = None) -> list[str]:
+        """
+        確保本月與未來幾個月的分區已建立
+
+        Args:
+            months_ahead: 預先建立的月數
+            today: 基準日 (測試用)
+
+        Returns:
+            list[str]: 新建立的分區名稱
+        """
+        if not AILogRetentionService.is_partitioned():
+            return []
+
+        existing = {name for name, _ in AILogRetentionService.list_partitions()}
+        current = month_start(today or datetime.utcnow().date())
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(month) not in existing:
+                AILogRetentionService.create_partition(month)
+                created.append(partition_name(month))
+
+        db_session.commit()
+        for name in created:
+            print(f"🗂️ 已建立 AI 紀錄分區: {name}")
+        return created
+
+    # ========================================
+    # 保留期限
+    # ========================================
+
+    @staticmethod
+    def apply_retention(months: Optional[int] = None, today: Optional[date] = None) -> int:
+        """
+        刪除超過保留期限的原始紀錄 (先彙總再刪除)
+
+        分區表直接 DROP 過期的整個月分區；一般資料表以 DELETE 刪除。
+
+        Args:
+            months: 保留月數 (預設 AI_LOG_RETENTION_MONTHS，0 表示不刪除)
+            today: 基準日 (測試用)
+
+        Returns:
+            int: 刪除的分區數 (分區表) 或紀錄筆數 (一般資料表)
+        """
+        months = config.AI_LOG_RETENTION_MONTHS if months is None else months
+        if months <= 0:
+            return 0
+
+        today = today or datetime.utcnow().date()
+        cutoff = add_months(month_start(today), -months)
+
+        # 確保即將刪除的日期都已彙總
+        AILogRetentionService.rollup_pending(today)
+
+        if AILogRetentionService.is_partitioned():
+            expired = [name for name, month in AILogRetentionService.list_partitions() if month < cutoff]
+            for name in expired:
+                db_session.execute(text(f"DROP TABLE {name}"))
+            # 預設分區中的過期資料 (分區建立前寫入的) 一併刪除
+            db_session.execute(text(
+                f"DELETE FROM ai_logs WHERE created_at < :cutoff"
+            ), {"cutoff": cutoff})
+            db_session.commit()
+            for name in expired:
+                print(f"🗑️ 已刪除過期 AI 紀錄分區: {name}")
+            return len(expired)
+
+        deleted = db_session.query(AILog).filter(
+            AILog.created_at < datetime.combine(cutoff, datetime.min.time())
+        ).delete(synchronize_session=False)
+        db_session.commit()
+        if deleted:
+            print(f"🗑️ 已刪除 {deleted} 筆 {cutoff} 之前的 AI 紀錄")
+        return deleted
+
+    # ========================================
+    # 後台圖表
+    # ========================================
+
+    @staticmethod
+    def chart_data(days: int = 30, today: Optional[date] = None) -> dict:
+        """
+        取得後台圖表資料 (只讀彙總表)
+
+        Args:
+            days: 顯示天數
+
+        Returns:
+            dict: {"labels", "attempts", "success_rate", "topics": {topic: {llm, rule, guidance}}}
+        """
+        today = today or datetime.utcnow().date()
+        start = today - timedelta(days=days)
+
+        summaries = db_session.query(AILogDailySummary).filter(
+            AILogDailySummary.day >= start,
+            AILogDailySummary.day < today
+        ).all()
+
+        labels = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+        attempts = dict.fromkeys(labels, 0)
+        successes = dict.fromkeys(labels, 0)
+        topics = {}
+        for summary in summaries:
+            label = summary.day.isoformat()
+            attempts[label] += summary.attempts
+            successes[label] += summary.successes
+            totals = topics.setdefault(summary.topic, {"llm": 0, "rule": 0, "guidance": 0})
+            totals["llm"] += summary.llm_count
+            totals["rule"] += summary.rule_count
+            totals["guidance"] += summary.guidance_count
+
+        return {
+            "labels": labels,
+            "attempts": [attempts[label] for label in labels],
+            "success_rate": [
+                round(successes[label] * 100 / attempts[label], 1) if attempts[label] else None
+                for label in labels
+            ],
+            "topics": topics
+        }
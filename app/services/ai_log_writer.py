@@ -0,0 +1,243 @@
+# ============================================================
+# services/ai_log_writer.py - AI 紀錄批次寫入服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：對話回合只把 AILog 放進有上限的記憶體佇列即返回，
+#       由背景執行緒每 N 筆或每 T 毫秒以多筆 INSERT 寫入資料庫
+# ============================================================
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.config import config
+from app.services.metrics import registry
+
+
+class _FlushRequest:
+    """要求背景執行緒立即寫入 (flush / close 使用)"""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class AILogWriter:
+    """
+    AI 紀錄批次寫入器
+
+    使用獨立的 SessionLocal()，不會動到請求執行緒的 scoped session。
+
+    Attributes:
+        batch_size: 累積幾筆就寫入 (N)
+        flush_interval: 最久幾秒寫入一次 (T)
+        overflow: 佇列滿時的處理方式
+            - "drop_oldest": 丟棄最舊的一筆 (預設，保留最新紀錄)
+            - "drop_newest": 丟棄新進的這筆
+            - "block": 等待佇列有空位 (最多 flush_interval 秒，逾時則丟棄)
+        stats: 寫入 / 丟棄 / 失敗筆數
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    def __init__(self, batch_size: int = 50, flush_interval_ms: int = 500,
+                 max_queue: int = 1000, overflow: str = "drop_oldest",
+                 session_factory=None):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"未知的溢位策略: {overflow}")
+
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.stats = {"written": 0, "dropped": 0, "failed": 0}
+
+        self._session_factory = session_factory
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def enqueue(self, **fields) -> bool:
+        """
+        排入一筆 AI 紀錄 (不等待資料庫)
+
+        Args:
+            **fields: AILog 欄位 (user_id、topic、user_input ...)
+
+        Returns:
+            bool: 是否成功排入 (被溢位策略丟棄時為 False)
+        """
+        fields.setdefault("created_at", datetime.utcnow())  # 以回合時間為準，而非寫入時間
+        q = self._ensure_started()
+
+        try:
+            q.put_nowait(fields)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == "drop_oldest":
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            self._count("dropped")
+            try:
+                q.put_nowait(fields)
+                return True
+            except queue.Full:
+                self._count("dropped")
+                return False
+
+        if self.overflow == "block":
+            try:
+                q.put(fields, timeout=self.flush_interval)
+                return True
+            except queue.Full:
+                pass
+
+        self._count("dropped")
+        return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        立即寫入佇列中所有紀錄並等待完成
+
+        Returns:
+            bool: 是否在時限內完成
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """寫入剩餘紀錄並停止背景執行緒 (程式結束時自動呼叫)"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        request = _FlushRequest(stop=True)
+        self._queue.put(request)
+        if not request.done.wait(timeout):
+            print(f"⚠️ AI 紀錄關閉逾時，約 {self._queue.qsize()} 筆未寫入")
+        self._thread = None
+
+    def _ensure_started(self) -> queue.Queue:
+        """第一次使用時 (或 fork 之後) 建立佇列與背景執行緒"""
+        if self._thread is not None and self._pid == os.getpid():
+            return self._queue
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run, name="ai-log-writer")
+                self._thread.daemon = True
+                self._thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.close)
+                    self._atexit_registered = True
+        return self._queue
+
+    def _run(self) -> None:
+        """背景執行緒：累積到 N 筆或等待超過 T 秒就寫入"""
+        q = self._queue
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _FlushRequest):
+                # 把佇列中剩下的紀錄一起寫入
+                requests = [item]
+                while True:
+                    try:
+                        extra = q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(extra, _FlushRequest):
+                        requests.append(extra)
+                    else:
+                        batch.append(extra)
+                self._write(batch)
+                batch, deadline = [], None
+                for request in requests:
+                    request.done.set()
+                if any(request.stop for request in requests):
+                    return
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, rows: list[dict]) -> None:
+        """以多筆 INSERT 寫入；整批失敗時改為逐筆寫入，避免一筆壞資料拖累整批"""
+        if not rows:
+            return
+
+        from app.models import SessionLocal
+        from app.models.ai_log import AILog
+
+        session = (self._session_factory or SessionLocal)()
+        try:
+            try:
+                session.execute(insert(AILog), rows)
+                session.commit()
+                self._count("written", len(rows))
+                return
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️ AI 紀錄批次寫入失敗，改為逐筆寫入: {e}")
+
+            for row in rows:
+                try:
+                    session.execute(insert(AILog), [row])
+                    session.commit()
+                    self._count("written")
+                except Exception as e:
+                    session.rollback()
+                    self._count("failed")
+                    print(f"⚠️ 儲存 AI 紀錄失敗: user={str(row.get('user_id'))[:8]}... {e}")
+        finally:
+            session.close()
+
+    def queue_depth(self) -> int:
+        """目前佇列中等待寫入的筆數"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+
+# 建立全域寫入器實例
+ai_log_writer = AILogWriter(
+    batch_size=config.AI_LOG_BATCH_SIZE,
+    flush_interval_ms=config.AI_LOG_FLUSH_MS,
+    max_queue=config.AI_LOG_QUEUE_SIZE,
+    overflow=config.AI_LOG_OVERFLOW
+)
+
+registry.gauge(
+    "chisoo_ai_log_queue_depth", "AI 紀錄寫入佇列中的筆數"
+).set_function(ai_log_writer.queue_depth)
+registry.gauge(
+    "chisoo_ai_log_records", "AI 紀錄寫入器累計筆數", ("result",)
+).set_function(lambda: [({"result": key}, value) for key, value in ai_log_writer.stats.items()])
@@ -0,0 +1,211 @@
+# ============================================================
+# services/catalog_index.py - 房源目錄索引服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：將上架房源預先整理成欄位陣列 (租金、評分、設施位元集)，
+#       讓推薦演算法可以對整個目錄評分並以 Heap 取前 K 名
+# ============================================================
+
+import heapq
+import threading
+from typing import Optional
+
+from sqlalchemy import func
+
+from app.models import db_session
+from app.models.house import House
+from app.models.persona import Persona
+from app.services.feature_vocabulary import feature_bits_of, popcount
+
+
+def catalog_signature() -> tuple:
+    """
+    取得房源目錄簽章 (房源數量 + 最後更新時間)
+
+    任何新增、刪除、上下架或評分異動都會改變簽章，
+    用於判斷記憶體中的索引或快取是否過期。
+
+    Returns:
+        tuple: (房源總數, 最後更新時間)
+    """
+    count, last_updated = db_session.query(
+        func.count(House.house_id),
+        func.max(House.updated_at)
+    ).one()
+    return (count, last_updated)
+
+
+class _CatalogSnapshot:
+    """
+    某一時間點的房源目錄快照 (唯讀)
+
+    Attributes:
+        house_ids: 房源 ID 陣列
+        rents: 租金陣列
+        ratings: 平均評分陣列
+        categories: 歸屬類型陣列
+        feature_bits: 標準設施位元集陣列 (見 feature_vocabulary)
+        base_scores: 與人物誌無關的基礎分 (含評分加成)
+    """
+
+    # 每個快照最多保留的人物誌評分數 (人物誌數量很少，主要是防呆)
+    MAX_CACHED_SCORES = 64
+
+    def __init__(self, rows: list[tuple], signature: tuple):
+        self.signature = signature
+        self.house_ids: list[int] = []
+        self.rents: list[int] = []
+        self.ratings: list[float] = []
+        self.categories: list[Optional[str]] = []
+        self.feature_bits: list[int] = []
+        self._scores: dict[tuple, list[int]] = {}
+        self._lock = threading.Lock()
+
+        for house_id, rent, rating, category, bits in rows:
+            self.house_ids.append(house_id)
+            self.rents.append(rent or 0)
+            self.ratings.append(rating or 0.0)
+            self.categories.append(category)
+            self.feature_bits.append(bits or 0)
+
+        # 基礎分 (50) + 評分加成，與人物誌無關
+        self.base_scores: list[int] = [
+            60 if rating >= 4.5 else 55 if rating >= 4.0 else 50
+            for rating in self.ratings
+        ]
+
+    def scores_for(self, persona: Optional[Persona]) -> list[int]:
+        """
+        取得整個目錄對某人物誌的匹配分數 (依人物誌版本快取)
+
+        Args:
+            persona: 人物誌實例 (None 代表僅依房源品質評分)
+
+        Returns:
+            list[int]: 與 house_ids 對齊的分數陣列 (0-100)
+        """
+        if persona is None:
+            key = (None, None)
+        else:
+            key = (persona.persona_id, persona.updated_at)
+
+        scores = self._scores.get(key)
+        if scores is not None:
+            return scores
+
+        scores = self._compute_scores(persona)
+        with self._lock:
+            if len(self._scores) >= self.MAX_CACHED_SCORES:
+                self._scores.clear()
+            self._scores[key] = scores
+        return scores
+
+    def _compute_scores(self, persona: Optional[Persona]) -> list[int]:
+        """對整個目錄計算匹配分數 (規則同 _calculate_house_match_score)"""
+        if persona is None:
+            scores = []
+            for rating in self.ratings:
+                if rating >= 4.5:
+                    scores.append(85)
+                elif rating >= 4.0:
+                    scores.append(80)
+                elif rating >= 3.5:
+                    scores.append(75)
+                else:
+                    scores.append(70)
+            return scores
+
+        persona_id = persona.persona_id
+        rent_min, rent_max = persona.get_rent_range()
+        required_bits = persona.required_bits or feature_bits_of(persona.get_required_features())
+        required_count = popcount(required_bits)
+
+        # 設施分數只與位元集有關，不同的位元組合通常很少，先算好再查表
+        feature_points = {}
+        for bits in set(self.feature_bits):
+            if required_count:
+                matched = popcount(bits & required_bits)
+                feature_points[bits] = int(matched / required_count * 10)
+            else:
+                feature_points[bits] = 0
+
+        return [
+            min(100, base
+                + (25 if category == persona_id else 0)
+                + (15 if rent_min <= rent <= rent_max else 5 if rent < rent_min else 0)
+                + feature_points[bits])
+            for base, category, rent, bits in zip(
+                self.base_scores, self.categories, self.rents, self.feature_bits
+            )
+        ]
+
+    def top_k(self, persona: Optional[Persona], limit: int, offset: int = 0) -> list[tuple[int, int]]:
+        """
+        以有界 Heap 取得排名 offset ~ offset+limit 的房源
+
+        排序規則：匹配分數 > 平均評分 > 房源 ID (小者優先)，
+        排序結果完全確定，分頁時不會重複或遺漏。
+
+        Returns:
+            list[tuple[int, int]]: [(house_id, match_score), ...]
+        """
+        if limit <= 0 or offset >= len(self.house_ids):
+            return []
+
+        scores = self.scores_for(persona)
+        ratings = self.ratings
+        house_ids = self.house_ids
+
+        top = heapq.nlargest(
+            offset + limit,
+            range(len(house_ids)),
+            key=lambda i: (scores[i], ratings[i], -house_ids[i])
+        )
+        return [(house_ids[i], scores[i]) for i in top[offset:]]
+
+
+class HouseCatalogIndex:
+    """
+    房源目錄索引
+
+    常駐記憶體，以目錄簽章判斷是否需要重建；
+    重建時只讀取評分需要的欄位，不載入完整 House 物件。
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get_snapshot(self) -> _CatalogSnapshot:
+        """
+        取得最新的目錄快照 (過期時自動重建)
+
+        Returns:
+            _CatalogSnapshot: 目錄快照
+        """
+        signature = catalog_signature()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.signature != signature:
+                rows = db_session.query(
+                    House.house_id,
+                    House.rent,
+                    House.avg_rating,
+                    House.category_tag,
+                    House.feature_bits
+                ).filter(House.is_active == True).all()
+                snapshot = _CatalogSnapshot(rows, signature)
+                self._snapshot = snapshot
+                print(f"🗂️ 房源索引已重建: {len(snapshot.house_ids)} 間")
+        return snapshot
+
+    def invalidate(self) -> None:
+        """強制下次查詢時重建索引"""
+        self._snapshot = None
+
+
+# 建立全域索引實例
+house_catalog_index = HouseCatalogIndex()
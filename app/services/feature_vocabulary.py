@@ -0,0 +1,172 @@
+# ============================================================
+# services/feature_vocabulary.py - 設施標準詞彙表
+# 專案：Chi Soo 租屋小幫手
+# 說明：統一房源、人物誌與使用者輸入的設施名稱 (中英文別名)，
+#       並將設施集合編碼為整數位元集，匹配時只需 popcount
+# ============================================================
+
+import re
+from typing import Iterable, Optional, Union
+
+
+# 標準設施清單：(標準 key, 顯示名稱, 別名)
+# 【重要】bit 位置依照清單順序決定，且已寫入資料庫，
+#         新增設施只能加在最後面，不可調整順序或刪除
+FEATURES = [
+    ("garbage_service", "子母車", ["garbage", "garbage_service", "子母車", "垃圾子母車", "垃圾代收", "垃圾"]),
+    ("elevator", "電梯", ["elevator", "lift", "電梯"]),
+    ("security", "門禁", ["security", "門禁", "門禁系統", "刷卡", "感應門禁"]),
+    ("cctv", "監視器", ["cctv", "監視器", "監視", "監控", "攝影機"]),
+    ("balcony", "陽台", ["balcony", "陽台", "曬衣"]),
+    ("laundry", "洗衣機", ["laundry", "washer", "washing_machine", "洗衣機", "洗衣", "獨洗獨曬"]),
+    ("parking", "停車位", ["parking", "停車位", "車位", "停車", "停車場", "機車位"]),
+    ("wifi", "網路", ["wifi", "wi-fi", "internet", "網路", "網路費"]),
+    ("ac", "冷氣", ["ac", "air_conditioner", "冷氣", "冷氣機", "空調"]),
+    ("fridge", "冰箱", ["fridge", "refrigerator", "冰箱"]),
+    ("water_heater", "熱水器", ["water_heater", "熱水器", "熱水"]),
+    ("furniture", "傢俱", ["furniture", "傢俱", "家具"]),
+    ("bed", "床", ["bed", "床", "床墊"]),
+    ("wardrobe", "衣櫃", ["wardrobe", "衣櫃", "衣櫥"]),
+    ("desk", "書桌", ["desk", "書桌"]),
+    ("window", "對外窗", ["window", "對外窗", "窗戶", "採光"]),
+    ("cable_tv", "第四台", ["cable_tv", "第四台"]),
+    ("water_dispenser", "飲水機", ["water_dispenser", "dispenser", "飲水機"]),
+    ("pet_friendly", "可養寵", ["pet_friendly", "pet", "可養寵", "寵物", "養寵物"]),
+    ("water_included", "含水費", ["water_included", "含水費"]),
+    ("electricity_included", "含電費", ["electricity_included", "含電費"]),
+    ("gender_floors", "男女分層", ["gender_floors", "男女分層"]),
+    ("landlord_live_in", "房東同住", ["landlord_live_in", "房東同住"]),
+    ("living_room", "客廳", ["living_room", "客廳", "交誼廳"]),
+    ("kitchen", "廚房", ["kitchen", "廚房", "可開伙", "開伙"]),
+    ("new_renovation", "新裝潢", ["new_renovation", "新裝潢", "裝潢", "新屋"]),
+    ("quiet", "安靜", ["quiet", "安靜"]),
+]
+
+# 標準 key -> bit 位置
+FEATURE_BITS = {key: index for index, (key, _, _) in enumerate(FEATURES)}
+
+# 標準 key -> 顯示名稱
+FEATURE_LABELS = {key: label for key, label, _ in FEATURES}
+
+# 別名 (正規化後) -> 標準 key
+_ALIASES: dict[str, str] = {}
+for _key, _label, _aliases in FEATURES:
+    for _alias in [_key, _label, *_aliases]:
+        _ALIASES[_alias.lower()] = _key
+
+# 可用於「包含」比對的中文別名 (至少兩個字，由長到短避免短詞搶先命中)
+_CJK_ALIASES = sorted(
+    (alias for alias in _ALIASES if len(alias) >= 2 and not alias.isascii()),
+    key=len,
+    reverse=True
+)
+
+_ASCII_TOKEN = re.compile(r"[a-z0-9_\-]+")
+
+# 緊接在中文別名前時表示否定的詞 (如「不要電梯」、「沒有冷氣」)
+_NEGATIONS = ("不要", "沒有", "不用", "無")
+
+
+def _normalize(text: str) -> str:
+    """正規化設施名稱 (去空白、轉小寫、空格轉底線)"""
+    return re.sub(r"\s+", "_", text.strip().lower())
+
+
+def canonical_feature(text: str) -> Optional[str]:
+    """
+    將任意設施名稱轉為標準 key
+
+    比對順序：
+    1. 完整別名 (如 "washer"、"洗衣機")
+    2. 中文別名包含於輸入中 (如 "要有洗衣機" → laundry)，
+       緊接在否定詞後的不算 (如 "不要電梯"、"沒有冷氣")
+    3. 英文單字完全相同 (如 "garbage service" → garbage_service)
+
+    英文不做子字串比對，避免 "ac" 命中 "balcony" 這類誤判。
+
+    Args:
+        text: 設施名稱或使用者描述
+
+    Returns:
+        str: 標準 key，無法辨識時回傳 None
+    """
+    if not text:
+        return None
+
+    normalized = _normalize(text)
+    if normalized in _ALIASES:
+        return _ALIASES[normalized]
+
+    for alias in _CJK_ALIASES:
+        start = normalized.find(alias)
+        while start != -1:
+            if not normalized[:start].endswith(_NEGATIONS):
+                return _ALIASES[alias]
+            start = normalized.find(alias, start + 1)
+
+    for token in _ASCII_TOKEN.findall(normalized):
+        for part in (token, *token.split("_")):
+            if part in _ALIASES:
+                return _ALIASES[part]
+
+    return None
+
+
+def encode_features(
+    features: Union[dict, Iterable[str], None]
+) -> tuple[int, list[str]]:
+    """
+    將設施集合編碼為位元集
+
+    Args:
+        features: 房源設施 dict ({"電梯": True, ...}，只計算值為真的項目)
+                  或設施名稱列表 (["washer", "電梯"])
+
+    Returns:
+        tuple[int, list[str]]: (位元集, 無法辨識的設施名稱)
+    """
+    if not features:
+        return 0, []
+
+    if isinstance(features, dict):
+        names = [name for name, value in features.items() if value]
+    else:
+        names = list(features)
+
+    bits = 0
+    unknown = []
+    for name in names:
+        key = canonical_feature(str(name))
+        if key is None:
+            unknown.append(name)
+        else:
+            bits |= 1 << FEATURE_BITS[key]
+    return bits, unknown
+
+
+def feature_bits_of(features: Union[dict, Iterable[str], None]) -> int:
+    """取得設施集合的位元集 (忽略無法辨識的項目)"""
+    return encode_features(features)[0]
+
+
+def decode_features(bits: int) -> list[str]:
+    """
+    將位元集還原為標準 key 列表 (依 FEATURES 順序)
+
+    Args:
+        bits: 設施位元集
+
+    Returns:
+        list[str]: 標準 key 列表
+    """
+    return [key for key, index in FEATURE_BITS.items() if bits >> index & 1]
+
+
+def has_feature(bits: int, key: str) -> bool:
+    """檢查位元集是否包含某個標準設施"""
+    return bool(bits >> FEATURE_BITS[key] & 1)
+
+
+def popcount(bits: int) -> int:
+    """計算位元集中的設施數量"""
+    return bits.bit_count()
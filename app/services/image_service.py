@@ -0,0 +1,297 @@
+# ============================================================
+# services/image_service.py - 驗證照片處理服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：串流寫入上傳檔並即時檢查大小 (不整個讀進記憶體)，
+#       再交給背景程序池去除 EXIF、校正方向，
+#       產生審核用的壓縮 JPEG 與縮圖，上傳請求不需等待編碼完成；
+#       檔名為內容的 SHA-256 並分層存放，相同照片只存一份，
+#       內容永不變動，可用 immutable 快取標頭提供
+# ============================================================
+
+import atexit
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Optional
+
+from app.config import config
+
+
+# 讀取上傳串流的區塊大小
+CHUNK_SIZE = 64 * 1024
+
+# 衍生圖尺寸：(最長邊像素, JPEG 品質)
+SIZES = {
+    "review": (1600, 82),
+    "thumb": (320, 75),
+}
+
+# 內容定址檔名 (衍生圖為 <hash>.<size>.jpg)
+_HASHED_NAME = re.compile(r"^([0-9a-f]{64})\.(?:(" + "|".join(SIZES) + r")\.jpg|jpg|png)$")
+
+# 內容定址檔案的快取時間 (一年)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 檔頭魔術數字 -> 副檔名
+_SIGNATURES = {
+    b"\xff\xd8\xff": "jpg",
+    b"\x89PNG\r\n\x1a\n": "png",
+}
+
+
+class UploadTooLarge(Exception):
+    """上傳檔案超過大小上限"""
+
+
+class UnsupportedImage(Exception):
+    """檔案內容不是支援的圖片格式"""
+
+
+def derivative_name(filename: str, size: str) -> str:
+    """取得衍生圖檔名 (abc.png -> abc.review.jpg)"""
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}.{size}.jpg"
+
+
+def storage_path(directory: str, name: str) -> Optional[str]:
+    """
+    取得檔案實際路徑
+
+    內容定址檔案存放於 <hash 前 2 碼>/<hash 第 3~4 碼>/ 子目錄，
+    舊版 UUID 檔名仍在根目錄；含路徑分隔或上層目錄的名稱回傳 None
+    """
+    if _HASHED_NAME.match(name):
+        return os.path.join(directory, name[:2], name[2:4], name)
+    if not name or name.startswith(".") or "/" in name or "\\" in name:
+        return None
+    return os.path.join(directory, name)
+
+
+def normalize_image(source: str, outputs: dict[str, str]) -> dict[str, int]:
+    """
+    去除 EXIF、依 Orientation 轉正並輸出各尺寸 JPEG (於程序池中執行)
+
+    Args:
+        source: 原始檔路徑
+        outputs: {尺寸名稱: 輸出路徑}
+
+    Returns:
+        dict: {尺寸名稱: 輸出檔案大小 (bytes)}
+    """
+    from PIL import Image, ImageOps
+
+    written = {}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        for size, path in outputs.items():
+            max_edge, quality = SIZES[size]
+            resized = image.copy()
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            # 先寫暫存檔再改名，讀取端不會拿到寫一半的檔案；未傳 exif 參數即不保留任何中繼資料
+            temp_path = f"{path}.{uuid.uuid4().hex}.part"
+            resized.save(temp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+            os.replace(temp_path, path)
+            written[size] = os.path.getsize(path)
+    return written
+
+
+class ImageService:
+    """驗證照片上傳與正規化"""
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+    _pending: dict[str, Future] = {}
+
+    @staticmethod
+    def save_stream(stream: BinaryIO, directory: str, max_bytes: int) -> str:
+        """
+        分塊寫入上傳串流並計算 SHA-256，超過上限立即中止
+
+        Args:
+            stream: 上傳檔案串流 (FileStorage.stream)
+            directory: 儲存目錄
+            max_bytes: 大小上限
+
+        Returns:
+            str: 儲存的檔名 (<sha256>.<副檔名>，已存在相同內容時直接沿用)
+
+        Raises:
+            UploadTooLarge: 超過大小上限
+            UnsupportedImage: 檔頭不是 JPEG / PNG
+        """
+        head = stream.read(CHUNK_SIZE)
+        ext = next((ext for magic, ext in _SIGNATURES.items() if head.startswith(magic)), None)
+        if ext is None:
+            raise UnsupportedImage("檔案內容不是 PNG 或 JPG")
+
+        digest = hashlib.sha256()
+        temp_path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+        total = 0
+        try:
+            with open(temp_path, "wb") as out:
+                chunk = head
+                while chunk:
+                    total += len(chunk)
+                    if total > max_bytes:
+                        raise UploadTooLarge(f"檔案超過 {max_bytes // (1024 * 1024)}MB")
+                    digest.update(chunk)
+                    out.write(chunk)
+                    chunk = stream.read(CHUNK_SIZE)
+
+            filename = f"{digest.hexdigest()}.{ext}"
+            path = storage_path(directory, filename)
+            if os.path.exists(path):
+                # 相同內容已存在：捨棄暫存檔
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return filename
+
+    @staticmethod
+    def schedule_normalize(directory: str, filename: str) -> Optional[Future]:
+        """
+        排入背景程序池產生審核圖與縮圖 (立即返回)
+
+        Args:
+            directory: 檔案所在目錄
+            filename: 原始檔名
+
+        Returns:
+            Future: 完成時結果為各尺寸檔案大小；衍生圖皆已存在時回傳 None
+        """
+        source = storage_path(directory, filename)
+        outputs = {size: storage_path(directory, derivative_name(filename, size)) for size in SIZES}
+        if all(os.path.exists(path) for path in outputs.values()):
+            return None
+
+        with ImageService._lock:
+            pending = ImageService._pending.get(filename)
+        if pending is not None:
+            return pending
+
+        future = ImageService._get_executor().submit(normalize_image, source, outputs)
+        with ImageService._lock:
+            ImageService._pending[filename] = future
+        future.add_done_callback(lambda f: ImageService._on_done(filename, f))
+        return future
+
+    @staticmethod
+    def resolve(directory: str, filename: str, size: Optional[str] = None) -> str:
+        """
+        取得要提供的檔名：衍生圖已產生則用衍生圖，否則回退原始檔
+
+        Args:
+            directory: 檔案所在目錄
+            filename: 原始檔名
+            size: review / thumb / None (原始檔)
+        """
+        if size in SIZES:
+            name = derivative_name(filename, size)
+            path = storage_path(directory, name)
+            if path and os.path.exists(path):
+                return name
+        return filename
+
+    @staticmethod
+    def send(directory: str, filename: str, size: Optional[str] = None):
+        """
+        回傳圖片的 Flask Response (驗證 API 與管理後台共用)
+
+        內容定址檔案帶 immutable 長效快取與以雜湊為值的強 ETag；
+        學生證屬個人資料，一律標記 private，只允許瀏覽器快取，
+        避免 Cloudflare 等共用快取保存 (reset_verification 無法清除共用快取)；
+        衍生圖尚未產生而回退原始檔時改為 no-cache，避免快取到錯誤尺寸。
+        send_file 支援 Range / If-None-Match，
+        並交由 WSGI 伺服器的 file_wrapper (sendfile) 傳送檔案內容。
+
+        Raises:
+            NotFound: 檔案不存在或檔名不合法
+        """
+        from flask import send_file
+        from werkzeug.exceptions import NotFound
+
+        name = ImageService.resolve(directory, filename, size)
+        path = storage_path(directory, name)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+
+        match = _HASHED_NAME.match(name)
+        fallback = size in SIZES and name == filename
+        if match and not fallback:
+            etag = f"{match.group(1)}-{match.group(2) or 'original'}"
+            response = send_file(path, conditional=True, etag=etag, max_age=IMMUTABLE_MAX_AGE)
+            response.cache_control.public = False  # send_file 設定 max_age 時預設為 public
+            response.cache_control.private = True
+            response.cache_control.immutable = True
+        else:
+            response = send_file(path, conditional=True, max_age=0)
+            response.cache_control.no_cache = True
+        return response
+
+    @staticmethod
+    def remove(directory: str, filename: str) -> None:
+        """刪除原始檔與所有衍生圖 (呼叫端需確認沒有其他申請引用同一檔案)"""
+        for name in [filename] + [derivative_name(filename, size) for size in SIZES]:
+            path = storage_path(directory, name)
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def wait(timeout: Optional[float] = None) -> None:
+        """等待所有排程中的處理完成 (測試與關閉時使用)"""
+        with ImageService._lock:
+            futures = list(ImageService._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _on_done(filename: str, future: Future) -> None:
+        with ImageService._lock:
+            if ImageService._pending.get(filename) is future:
+                del ImageService._pending[filename]
+        error = future.exception()
+        if error:
+            print(f"⚠️ 圖片正規化失敗 {filename}: {error}")
+            if isinstance(error, BrokenProcessPool):
+                # 工作程序異常結束，下次排程時重建程序池
+                with ImageService._lock:
+                    ImageService._executor = None
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        with ImageService._lock:
+            if ImageService._executor is None:
+                # spawn：不複製主程序的執行緒與資料庫連線
+                ImageService._executor = ProcessPoolExecutor(
+                    max_workers=config.IMAGE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(ImageService.shutdown)
+            return ImageService._executor
+
+    @staticmethod
+    def shutdown() -> None:
+        with ImageService._lock:
+            executor, ImageService._executor = ImageService._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -10,6 +10,16 @@ from typing import Optional
 from app.models import db_session
 from app.models.persona import Persona
 from app.models.house import House
+from app.models.affinity import HouseAffinity
+from app.services.catalog_index import house_catalog_index
+from app.services.metrics import MATCHING_SECONDS
+from app.services.feature_vocabulary import (
+    FEATURE_LABELS,
+    encode_features,
+    feature_bits_of,
+    has_feature,
+    popcount,
+)
 
 
 class MatchingService:
@@ -35,6 +45,9 @@ class MatchingService:
         "keyword": 0.5
     }
     
+    # 推薦理由中優先標示的設施 (依顯示順序)
+    HIGHLIGHT_FEATURES = ["garbage_service", "elevator", "security", "balcony", "parking"]
+    
     def __init__(self):
         self._personas_cache: list[Persona] = []
     
@@ -134,15 +147,41 @@ class MatchingService:
             match_result = self._feature_match_cache[persona.persona_id]
             return match_result["match_rate"] * 100
         
-        # Fallback: 使用簡單匹配
-        from app.services.ollama_service import OllamaService
-        ollama = OllamaService()
-        required = persona.get_required_features()
-        bonus = persona.get_bonus_features()
-        match_result = ollama.match_features_semantically(wanted_features, required + bonus)
+        # Fallback: 標準設施位元集比對
+        match_result = self.match_feature_bits(wanted_features, self._persona_feature_bits(persona))
         
         return max(0, min(100, match_result["match_rate"] * 100))
     
+    @staticmethod
+    def _persona_feature_bits(persona: Persona) -> int:
+        """取得人物誌的必要 + 加分設施位元集"""
+        required_bits = persona.required_bits or feature_bits_of(persona.get_required_features())
+        bonus_bits = persona.bonus_bits or feature_bits_of(persona.get_bonus_features())
+        return required_bits | bonus_bits
+    
+    @staticmethod
+    def match_feature_bits(wanted_features: list[str], offered_bits: int) -> dict:
+        """
+        以位元集比對使用者想要的設施
+        
+        Args:
+            wanted_features: 使用者想要的設施列表 (自由文字)
+            offered_bits: 可提供的設施位元集
+            
+        Returns:
+            dict: {"matched": int, "total": int, "match_rate": float, "unknown": list[str]}
+        """
+        wanted_bits, unknown = encode_features(wanted_features)
+        total = popcount(wanted_bits) + len(unknown)
+        matched = popcount(wanted_bits & offered_bits)
+        
+        return {
+            "matched": matched,
+            "total": total,
+            "match_rate": matched / total if total else 0,
+            "unknown": unknown
+        }
+    
     def batch_prepare_features_match(self, user_data: dict, personas: list[Persona]) -> None:
         """
         批次進行所有 Persona 的設施匹配 (預先計算並快取結果)
@@ -157,6 +196,15 @@ class MatchingService:
             self._feature_match_cache = {}
             return
         
+        # 所有設施都能對應到標準詞彙時，直接以位元集計算，不需呼叫 AI
+        _, unknown = encode_features(wanted_features)
+        if not unknown:
+            self._feature_match_cache = {
+                persona.persona_id: self.match_feature_bits(wanted_features, self._persona_feature_bits(persona))
+                for persona in personas
+            }
+            return
+        
         # 收集所有 Persona 的設施
         all_personas_features = {}
         for persona in personas:
@@ -316,16 +364,18 @@ class MatchingService:
             print(f"⚖️ 使用自訂權重: {weights}")
         
         # 批次預先計算設施匹配 (單次 AI 呼叫)
-        self.batch_prepare_features_match(user_data, personas)
+        with MATCHING_SECONDS.time(phase="features_prepare"):
+            self.batch_prepare_features_match(user_data, personas)
         
         results = []
-        for persona in personas:
-            score = self.calculate_persona_score(user_data, persona, raw_text, weights)
-            results.append({
-                "persona": persona,
-                "score": round(score, 2)
-            })
-            print(f"   📊 {persona.name}: {round(score, 2)} 分")
+        with MATCHING_SECONDS.time(phase="persona_scoring"):
+            for persona in personas:
+                score = self.calculate_persona_score(user_data, persona, raw_text, weights)
+                results.append({
+                    "persona": persona,
+                    "score": round(score, 2)
+                })
+                print(f"   📊 {persona.name}: {round(score, 2)} 分")
         
         # 排序
         results.sort(key=lambda x: x["score"], reverse=True)
@@ -392,20 +442,31 @@ class MatchingService:
         # 取得 Persona 資訊
         persona = db_session.query(Persona).filter_by(persona_id=persona_id).first()
         
-        # 查詢適合的房源
-        houses = db_session.query(House).filter(
-            House.is_active == True
-        ).order_by(
-            House.avg_rating.desc()
-        ).offset(offset).limit(limit + 10).all()  # 多取一些用於篩選
+        # 優先從預先計算的匹配矩陣讀取
+        if persona and persona.active:
+            with MATCHING_SECONDS.time(phase="affinity_page"):
+                page = self._read_affinity_page(persona_id, limit, offset)
+            if page is not None:
+                return page
+        
+        # 無對應人物誌或矩陣尚未補建：對整個上架目錄評分，以 Heap 取出此頁的房源
+        with MATCHING_SECONDS.time(phase="catalog_top_k"):
+            snapshot = house_catalog_index.get_snapshot()
+            ranked = snapshot.top_k(persona, limit, offset)
         
-        if not houses:
+        if not ranked:
             return []
         
+        # 只載入此頁需要的房源
+        house_ids = [house_id for house_id, _ in ranked]
+        houses = db_session.query(House).filter(House.house_id.in_(house_ids)).all()
+        house_map = {h.house_id: h for h in houses}
+        
         results = []
-        for house in houses:
-            # 計算匹配分數
-            score = self._calculate_house_match_score(house, persona)
+        for house_id, score in ranked:
+            house = house_map.get(house_id)
+            if not house:
+                continue
             
             # 生成推薦理由
             reason = self._generate_recommendation_reason(house, persona, score)
@@ -416,11 +477,39 @@ class MatchingService:
                 "recommendation_reason": reason
             })
         
-        # 依匹配分數排序
-        results.sort(key=lambda x: x["match_score"], reverse=True)
+        return results
+    
+    def _read_affinity_page(self, persona_id: str, limit: int, offset: int) -> Optional[list[dict]]:
+        """
+        從匹配矩陣依索引讀取一頁推薦房源
+        
+        只讀不寫：矩陣尚未建立該人物誌的資料時 (例如剛部署、啟動補建前) 回傳 None，
+        由呼叫端改用全目錄評分；補建由啟動時的 AffinityService.backfill_missing 負責。
+        """
+        rows = db_session.query(HouseAffinity, House).join(
+            House, House.house_id == HouseAffinity.house_id
+        ).filter(
+            HouseAffinity.persona_id == persona_id,
+            House.is_active == True
+        ).order_by(
+            HouseAffinity.score.desc(),
+            House.avg_rating.desc(),
+            House.house_id.asc()
+        ).offset(offset).limit(limit).all()
+        
+        if not rows:
+            has_row = db_session.query(HouseAffinity.house_id).filter_by(persona_id=persona_id).first()
+            if has_row is None:
+                return None
         
-        # 取前 limit 個
-        return results[:limit]
+        return [
+            {
+                "house": house,
+                "match_score": affinity.score,
+                "recommendation_reason": affinity.reason
+            }
+            for affinity, house in rows
+        ]
     
     def _calculate_house_match_score(self, house: House, persona: Optional[Persona]) -> int:
         """
@@ -457,21 +546,13 @@ class MatchingService:
         elif house.rent < rent_min:
             score += 5  # 比預期便宜也不錯
         
-        # 3. 設施匹配
-        required_features = persona.get_required_features()
-        house_features = house.features or {}
-        
-        matched_features = 0
-        for feature in required_features:
-            # 簡單的關鍵字匹配
-            feature_lower = feature.lower()
-            for house_feat_key, house_feat_val in house_features.items():
-                if house_feat_val and feature_lower in house_feat_key.lower():
-                    matched_features += 1
-                    break
-        
-        if required_features:
-            feature_ratio = matched_features / len(required_features)
+        # 3. 設施匹配 (標準設施位元集交集)
+        required_bits = persona.required_bits or feature_bits_of(persona.get_required_features())
+        required_count = popcount(required_bits)
+        
+        if required_count:
+            matched_features = popcount((house.feature_bits or 0) & required_bits)
+            feature_ratio = matched_features / required_count
             score += int(feature_ratio * 10)
         
         # 4. 評分加成
@@ -508,19 +589,12 @@ class MatchingService:
             reasons.append("👍 好評推薦")
         
         # 設施相關
-        features = house.features or {}
-        feature_highlights = []
-        
-        if features.get("garbage_service"):
-            feature_highlights.append("子母車")
-        if features.get("elevator"):
-            feature_highlights.append("電梯")
-        if features.get("security"):
-            feature_highlights.append("門禁")
-        if features.get("balcony"):
-            feature_highlights.append("陽台")
-        if features.get("parking"):
-            feature_highlights.append("停車位")
+        feature_bits = house.feature_bits or 0
+        feature_highlights = [
+            FEATURE_LABELS[key]
+            for key in self.HIGHLIGHT_FEATURES
+            if has_feature(feature_bits, key)
+        ]
         
         if feature_highlights:
             reasons.append(f"🏠 {', '.join(feature_highlights[:3])}")
@@ -0,0 +1,325 @@
+# ============================================================
+# services/metrics.py - 效能指標服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：輕量的 Counter / Histogram / Gauge 登錄表，
+#       以 Prometheus 文字格式輸出於 /metrics，記錄每個處理階段的耗時
+# ============================================================
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+
+# 預設直方圖區間 (秒)：涵蓋毫秒級 DB 查詢到數十秒的 LLM 呼叫
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    """跳脫標籤值中的特殊字元"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """組成 {a="1",b="2"} 標籤字串"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指標基底類別"""
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    TYPE = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    可增可減的量測值
+
+    可用 set() 直接設定，或以 set_function() 在輸出時才呼叫回呼取得
+    (適合佇列深度、連線池使用量這類隨時變動的值，平時不需任何成本)。
+    """
+
+    TYPE = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+        self._function: Optional[Callable] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable) -> None:
+        """
+        設定回呼函式 (回傳單一數值；有標籤時回傳 [(labels dict, 數值), ...])
+        """
+        self._function = function
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                result = None
+            if isinstance(result, (int, float)):
+                items = [((), result)]
+            else:
+                items = [(self._key(labels), value) for labels, value in (result or [])]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """分區間統計的耗時分布"""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # key -> [各區間次數..., 總和, 次數]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """計時區塊並記錄耗時"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """指標登錄表 (同名指標只會建立一次)"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """輸出 Prometheus 文字格式 (text/plain; version=0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 建立全域登錄表
+registry = MetricsRegistry()
+
+
+# ============================================================
+# 各處理階段的指標
+# ============================================================
+
+WEBHOOK_SECONDS = registry.histogram(
+    "chisoo_webhook_seconds", "LINE Webhook 處理耗時 (驗章解析 + 事件處理)", ("stage",)
+)
+OLLAMA_SECONDS = registry.histogram(
+    "chisoo_ollama_request_seconds", "Ollama API 呼叫耗時", ("model", "purpose", "topic")
+)
+OLLAMA_PROMPT_EVAL_TOKENS = registry.histogram(
+    "chisoo_ollama_prompt_eval_tokens", "Ollama 每次呼叫實際評估的提示詞 token 數 (prompt_eval_count)",
+    ("model", "purpose", "topic"), buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+)
+OLLAMA_COLD_LOADS = registry.counter(
+    "chisoo_ollama_cold_loads", "Ollama 模型冷載入次數 (使用者請求或預熱觸發)", ("model", "purpose")
+)
+OLLAMA_LOAD_SECONDS = registry.histogram(
+    "chisoo_ollama_load_seconds", "Ollama 模型冷載入耗時", ("model", "purpose")
+)
+OLLAMA_ROUTED_CALLS = registry.counter(
+    "chisoo_ollama_routed_calls",
+    "模型路由呼叫次數 (outcome：served = 採用該模型結果、escalated = 未通過檢查改用大模型)",
+    ("purpose", "model", "outcome")
+)
+OLLAMA_ERRORS = registry.counter(
+    "chisoo_ollama_errors", "Ollama API 呼叫失敗次數", ("model", "purpose")
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "chisoo_db_query_seconds", "資料庫查詢耗時 (依操作與資料表)", ("operation", "table")
+)
+LINE_API_SECONDS = registry.histogram(
+    "chisoo_line_api_seconds", "LINE Messaging API 呼叫耗時", ("endpoint", "status")
+)
+MATCHING_SECONDS = registry.histogram(
+    "chisoo_matching_seconds", "人物誌匹配與房源推薦各階段耗時", ("phase",)
+)
+RECOMMENDATION_CACHE = registry.counter(
+    "chisoo_recommendation_cache", "推薦頁面快取查詢結果", ("result",)
+)
+
+
+# ============================================================
+# 資料庫查詢計時
+# ============================================================
+
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+_statement_labels: dict[str, tuple] = {}
+_instrumented_engines: set[int] = set()
+
+
+def _query_labels(statement: str) -> tuple:
+    """由 SQL 取得 (操作, 主要資料表)；SQLAlchemy 會重用編譯後的字串，因此可快取"""
+    labels = _statement_labels.get(statement)
+    if labels is None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        match = _SQL_TABLE.search(statement)
+        labels = (operation, match.group(1) if match else "")
+        if len(_statement_labels) < 4096:
+            _statement_labels[statement] = labels
+    return labels
+
+
+_engine_pools: dict[str, object] = {}
+
+
+def _pool_usage() -> list:
+    """所有已量測引擎的連線池使用量 (StaticPool / NullPool 沒有這些方法，只回報支援的項目)"""
+    usage = []
+    for name, pool in list(_engine_pools.items()):
+        for state, method in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+            if hasattr(pool, method):
+                usage.append(({"engine": name, "state": state}, getattr(pool, method)()))
+    return usage
+
+
+def instrument_engine(engine, name: str = "primary") -> None:
+    """
+    為資料庫引擎加上查詢計時與連線池量測 (每個引擎只需呼叫一次)
+
+    Args:
+        engine: SQLAlchemy Engine
+        name: 引擎名稱 (連線池指標標籤)
+    """
+    from sqlalchemy import event
+
+    _engine_pools[name] = engine.pool
+    if id(engine) in _instrumented_engines:
+        return
+    _instrumented_engines.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            operation, table = _query_labels(statement)
+            DB_QUERY_SECONDS.observe(time.perf_counter() - starts.pop(), operation=operation, table=table)
+
+
+registry.gauge(
+    "chisoo_db_pool_connections", "資料庫連線池使用量", ("engine", "state")
+).set_function(_pool_usage)
@@ -0,0 +1,181 @@
+# ============================================================
+# services/model_router.py - 小 / 大模型路由
+# 專案：Chi Soo 租屋小幫手
+# 說明：依呼叫類型與主題選擇模型：值得時先用小模型 (OLLAMA_MODEL_SMALL)，
+#       結果未通過檢查才升級到大模型 (OLLAMA_MODEL_4B) 重試；
+#       是否值得先試小模型依 AILog 與執行期間量測的成功率與延遲判斷
+# ============================================================
+
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import config
+from app.services.metrics import OLLAMA_ROUTED_CALLS
+
+
+class ModelRouter:
+    """
+    小 / 大模型路由器
+
+    每個 (purpose, topic) 各自統計兩個模型的成功率與平均延遲：
+    先試小模型的期望延遲 = 小模型延遲 + 失敗率 x 大模型延遲，
+    低於直接用大模型的延遲才先試小模型。
+    小模型樣本不足時一律先試；改走大模型的路線每 EXPLORE_EVERY 次仍試一次小模型，讓統計持續更新
+
+    Attributes:
+        small: 小模型 (未設定時停用路由，全部使用大模型)
+        large: 大模型
+    """
+
+    MIN_SAMPLES = 20        # 小模型至少累積幾次才依統計判斷
+    EXPLORE_EVERY = 20      # 走大模型的路線每幾次仍試一次小模型
+    WINDOW = 200            # 統計超過此次數時減半，以近期表現為主
+    ASSUMED_SPEEDUP = 2.0   # 大模型尚無延遲紀錄時，假設其延遲為小模型的倍數
+    HISTORY_DAYS = 7        # 啟動時讀取幾天內的 AILog
+
+    def __init__(self, small: str, large: str):
+        self.small = small
+        self.large = large
+        # (purpose, topic, model) -> [次數, 成功次數, 延遲總秒數, 有延遲紀錄的次數]
+        self._stats: dict[tuple, list[float]] = {}
+        self._skips: dict[tuple, int] = {}
+        self._served: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.small) and self.small != self.large
+
+    def choose(self, purpose: str, topic: Optional[str] = None) -> str:
+        """選擇第一次嘗試的模型"""
+        if not self.enabled:
+            return self.large
+
+        key = (purpose, topic or "")
+        with self._lock:
+            if self._prefers_small(key):
+                return self.small
+            skips = self._skips[key] = self._skips.get(key, 0) + 1
+        return self.small if skips % self.EXPLORE_EVERY == 0 else self.large
+
+    def _prefers_small(self, key: tuple) -> bool:
+        small = self._stats.get((*key, self.small))
+        if small is None or small[0] < self.MIN_SAMPLES:
+            return True
+
+        success_rate = small[1] / small[0]
+        large = self._stats.get((*key, self.large))
+        small_latency = small[2] / small[3] if small[3] else None
+        large_latency = large[2] / large[3] if large and large[3] else None
+        # 缺少延遲紀錄的一方以 ASSUMED_SPEEDUP 推估 (皆無紀錄時只比較相對值)
+        if small_latency is None:
+            small_latency = large_latency / self.ASSUMED_SPEEDUP if large_latency else 1.0
+        if large_latency is None:
+            large_latency = small_latency * self.ASSUMED_SPEEDUP
+        return small_latency + (1 - success_rate) * large_latency < large_latency
+
+    def record(self, purpose: str, topic: Optional[str], model: str, success: bool,
+               seconds: Optional[float], served: bool = True) -> None:
+        """
+        記錄一次呼叫結果
+
+        Args:
+            success: 結果是否通過檢查
+            seconds: 呼叫耗時 (未知時為 None)
+            served: 是否採用此結果 (False = 未通過檢查，改用大模型)
+        """
+        OLLAMA_ROUTED_CALLS.inc(purpose=purpose, model=model, outcome="served" if served else "escalated")
+        with self._lock:
+            if served:
+                self._served[(purpose, model)] = self._served.get((purpose, model), 0) + 1
+            self._add((purpose, topic or "", model), 1, int(success), seconds)
+
+    def _add(self, key: tuple, attempts: int, successes: int, seconds: Optional[float],
+             timed: Optional[int] = None) -> None:
+        stats = self._stats.setdefault(key, [0, 0, 0.0, 0])
+        stats[0] += attempts
+        stats[1] += successes
+        if seconds is not None:
+            stats[2] += seconds
+            stats[3] += attempts if timed is None else timed
+        if stats[0] > self.WINDOW:
+            self._stats[key] = [value / 2 for value in stats]
+
+    def shares(self) -> dict[str, dict[str, float]]:
+        """各呼叫類型由各模型提供結果的比例，如 {"extract": {"qwen3:1.7b": 0.8, ...}}"""
+        with self._lock:
+            served = dict(self._served)
+        totals: dict[str, int] = {}
+        for (purpose, _), count in served.items():
+            totals[purpose] = totals.get(purpose, 0) + count
+        shares: dict[str, dict[str, float]] = {}
+        for (purpose, model), count in sorted(served.items()):
+            shares.setdefault(purpose, {})[model] = count / totals[purpose]
+        return shares
+
+    def load_history(self, session=None) -> int:
+        """
+        以 AILog 近期紀錄初始化 Stage 1 (extract) 的統計
+
+        小模型的嘗試 = 由小模型提供結果的回合 + 升級到大模型的回合 (小模型失敗)；
+        採用的結果以 is_success 判斷成敗 (閒聊時正確的空結果為成功，
+        大模型結果仍不合法或漏提取、需規則解析補救時為失敗)
+
+        Returns:
+            int: 讀取的回合數
+        """
+        if not self.enabled:
+            return 0
+
+        from app.models import SessionLocal
+        from app.models.ai_log import AILog
+
+        query = (
+            select(
+                AILog.topic,
+                AILog.model,
+                AILog.escalated,
+                AILog.is_success,
+                func.count(),
+                func.sum(AILog.latency_ms),
+                func.count(AILog.latency_ms),
+            )
+            .where(
+                AILog.created_at >= datetime.utcnow() - timedelta(days=self.HISTORY_DAYS),
+                AILog.model.in_([self.small, self.large]),
+            )
+            .group_by(AILog.topic, AILog.model, AILog.escalated, AILog.is_success)
+        )
+
+        own_session = session is None
+        session = session or SessionLocal()
+        try:
+            rows = session.execute(query).all()
+        except SQLAlchemyError as e:
+            # 尚未執行 scripts/add_ai_log_model_columns.py 時沒有 model 欄位
+            print(f"⚠️ 無法讀取模型路由歷史，改由執行期間統計: {e.__class__.__name__}")
+            session.rollback()
+            return 0
+        finally:
+            if own_session:
+                session.close()
+
+        total = 0
+        with self._lock:
+            for topic, model, escalated, is_success, count, latency_ms, timed in rows:
+                key = ("extract", topic or "")
+                seconds = latency_ms / 1000 if latency_ms is not None else None
+                self._add((*key, model), count, count if is_success else 0, seconds, timed)
+                if escalated:
+                    self._add((*key, self.small), count, 0, None)
+                total += count
+        print(f"🔀 模型路由：已讀取 {total} 筆 AI 紀錄 ({self.small} → {self.large})")
+        return total
+
+
+# 全域路由器
+model_router = ModelRouter(config.OLLAMA_MODEL_SMALL, config.OLLAMA_MODEL_4B)
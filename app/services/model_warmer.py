@@ -0,0 +1,125 @@
+# ============================================================
+# services/model_warmer.py - Ollama 模型預熱與常駐排程
+# 專案：Chi Soo 租屋小幫手
+# 說明：啟動時預先載入模型；尖峰時段定期以空白請求維持常駐 (keep_alive=-1)，
+#       離開尖峰時段時釋放模型 (keep_alive=0) 歸還 GPU 記憶體，
+#       避免一段時間沒人使用後第一位使用者等待模型自磁碟載入而逾時
+# ============================================================
+
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from app.config import config
+from app.services.model_router import model_router
+from app.services.ollama_service import OllamaService
+
+
+def parse_busy_hours(spec: str) -> list[tuple[int, int]]:
+    """
+    解析常駐時段，如 "07-02" 或 "08-12,13-23"
+
+    結束小時不含在內；結束早於開始表示跨午夜。空白代表全天
+
+    Returns:
+        list[tuple[int, int]]: (開始小時, 結束小時) 清單
+    """
+    ranges = []
+    for part in filter(None, (item.strip() for item in spec.split(","))):
+        start, _, end = part.partition("-")
+        start, end = int(start), int(end or 24)
+        if not (0 <= start <= 23 and 0 <= end <= 24):
+            raise ValueError(f"無效的常駐時段: {part}")
+        ranges.append((start, end))
+    return ranges
+
+
+def in_busy_hours(now: datetime, ranges: list[tuple[int, int]]) -> bool:
+    """now 是否落在任一常駐時段內 (未設定時段時永遠為 True)"""
+    if not ranges:
+        return True
+    hour = now.hour
+    for start, end in ranges:
+        if start < end and start <= hour < end:
+            return True
+        if start >= end and (hour >= start or hour < end):
+            return True
+    return False
+
+
+class ModelWarmer:
+    """
+    模型常駐排程器 (背景執行緒)
+
+    Attributes:
+        models: 要預熱的模型 (預設為大模型；啟用小 / 大模型路由時兩個都預熱，小模型在前)
+        busy_hours: 常駐時段 (見 parse_busy_hours)
+        interval: 常駐 ping 間隔秒數 (Ollama 重啟或模型被擠出記憶體後重新載入)
+        resident: 目前是否要求模型常駐
+    """
+
+    def __init__(self, service: Optional[OllamaService] = None, models: Optional[list[str]] = None,
+                 busy_hours: str = "", interval: float = 300.0,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.service = service or OllamaService()
+        self.models = models or (
+            [model_router.small, model_router.large] if model_router.enabled else [self.service.model_4b]
+        )
+        self.busy_hours = parse_busy_hours(busy_hours)
+        self.interval = interval
+        self.clock = clock
+        self.resident = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def is_busy(self) -> bool:
+        return in_busy_hours(self.clock(), self.busy_hours)
+
+    def tick(self) -> None:
+        """執行一次排程：尖峰時段維持常駐，離開尖峰時段時釋放"""
+        if self.is_busy():
+            for model in self.models:
+                self.service.preload(model, keep_alive=-1)
+            if not self.resident:
+                print(f"🔥 尖峰時段，模型常駐: {', '.join(self.models)}")
+            self.resident = True
+        elif self.resident:
+            for model in self.models:
+                self.service.preload(model, keep_alive=0)
+            print(f"💤 離峰時段，釋放模型: {', '.join(self.models)}")
+            self.resident = False
+
+    def start(self) -> None:
+        """啟動背景執行緒 (每個程序一條，重複呼叫無作用)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        # 離峰時段啟動也先載入一次，之後依一般 keep_alive 自然卸載
+        if not self.is_busy():
+            for model in self.models:
+                self.service.preload(model)
+        while True:
+            self.tick()
+            if self._stop.wait(self.interval):
+                return
+
+
+# 全域排程器 (於 run.py / gunicorn worker / asyncio 入口啟動)
+model_warmer = ModelWarmer(
+    models=[name.strip() for name in config.OLLAMA_WARM_MODELS.split(",") if name.strip()] or None,
+    busy_hours=config.OLLAMA_BUSY_HOURS,
+    interval=config.OLLAMA_WARM_INTERVAL,
+)
@@ -4,11 +4,28 @@
 # 說明：封裝 Ollama API 調用
 # ============================================================
 
+import asyncio
 import json
+import re
+import time
 import requests
 from typing import Optional
 
 from app.config import config
+from app.services.model_router import model_router
+from app.services.metrics import (
+    OLLAMA_COLD_LOADS, OLLAMA_ERRORS, OLLAMA_LOAD_SECONDS, OLLAMA_PROMPT_EVAL_TOKENS, OLLAMA_SECONDS
+)
+
+
+# 模型回應清理用的正規表示式 (預先編譯)
+_THINK_TAG = re.compile(r'<think>.*?</think>', re.DOTALL)
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _keep_alive(value: str):
+    """keep_alive 設定值：純數字視為秒數 (-1 = 常駐)，其餘如 "30m" 原樣傳給 Ollama"""
+    return int(value) if value.lstrip("-").isdigit() else value
 
 
 class OllamaService:
@@ -73,12 +90,26 @@ class OllamaService:
         )
     }
     
+    # 載入耗時超過此秒數視為冷載入
+    COLD_LOAD_SECONDS = 1.0
+    # 預先載入模型的逾時 (自磁碟載入可能超過一般呼叫的 30 秒)
+    LOAD_TIMEOUT = 180
+    
+    # 各主題的系統提示詞 (匯入時由 compile_prompts 建立)
+    EXTRACTION_PROMPTS: dict = {}
+    MULTI_EXTRACTION_PROMPTS: dict = {}
+    GUIDANCE_PROMPTS: dict = {}
+    
     def __init__(self):
         self.base_url = config.OLLAMA_BASE_URL
         self.model_4b = config.OLLAMA_MODEL_4B
+        # multi = 一次提取訊息中提到的所有欄位；topic = 只針對當前主題
+        self.extraction_mode = config.OLLAMA_EXTRACTION_MODE
+        self._http = None  # aiohttp.ClientSession (asyncio 版才會建立)
         # Stage 2 改由程式邏輯處理，不再需要 model_1b
     
-    def _call_ollama(self, model: str, prompt: str, system: str = None) -> str:
+    def _call_ollama(self, model: str, prompt: str, system: str = None,
+                     purpose: str = "generate", topic: str = None) -> str:
         """
         調用 Ollama API
         
@@ -86,32 +117,148 @@ class OllamaService:
             model: 模型名稱
             prompt: 使用者輸入
             system: 系統提示詞
+            purpose: 呼叫用途 (指標標籤：extract / guidance / feature_match ...)
+            topic: 當前主題 (指標標籤)
             
         Returns:
             str: 模型回應
         """
         url = f"{self.base_url}/api/generate"
+        payload = self._build_payload(model, prompt, system)
+        
+        try:
+            with OLLAMA_SECONDS.time(model=model, purpose=purpose, topic=topic or ""):
+                response = requests.post(url, json=payload, timeout=30)
+                response.raise_for_status()
+                result = response.json()
+            self._record_usage(result, model, purpose, topic)
+            return result.get("response", "")
+        except requests.exceptions.RequestException as e:
+            OLLAMA_ERRORS.inc(model=model, purpose=purpose)
+            print(f"❌ Ollama API 錯誤: {e}")
+            return ""
+    
+    async def _call_ollama_async(self, model: str, prompt: str, system: str = None,
+                                 purpose: str = "generate", topic: str = None) -> str:
+        """調用 Ollama API (asyncio 版，參數與回傳同 _call_ollama)"""
+        import aiohttp
+        
+        url = f"{self.base_url}/api/generate"
+        payload = self._build_payload(model, prompt, system)
         
+        try:
+            with OLLAMA_SECONDS.time(model=model, purpose=purpose, topic=topic or ""):
+                async with self._get_http_session().post(url, json=payload) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+            self._record_usage(result, model, purpose, topic)
+            return result.get("response", "")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            OLLAMA_ERRORS.inc(model=model, purpose=purpose)
+            print(f"❌ Ollama API 錯誤: {e}")
+            return ""
+    
+    @staticmethod
+    def _build_payload(model: str, prompt: str, system: str = None) -> dict:
         payload = {
             "model": model,
             "prompt": prompt,
-            "stream": False
+            "stream": False,
+            # 模型常駐期間才能沿用提示詞前綴的 KV 快取
+            "keep_alive": _keep_alive(config.OLLAMA_KEEP_ALIVE)
         }
         
         if system:
             payload["system"] = system
+        return payload
+    
+    @classmethod
+    def _record_usage(cls, result: dict, model: str, purpose: str, topic: str = None) -> None:
+        """
+        記錄本次實際評估的提示詞 token 數 (命中前綴快取的部分 Ollama 不會計入)
+        與模型載入耗時
+        """
+        if "prompt_eval_count" in result:
+            OLLAMA_PROMPT_EVAL_TOKENS.observe(
+                result["prompt_eval_count"], model=model, purpose=purpose, topic=topic or ""
+            )
+        if "load_duration" in result:
+            cls._record_load(result["load_duration"] / 1e9, model, purpose)
+    
+    @classmethod
+    def _record_load(cls, seconds: float, model: str, purpose: str) -> None:
+        """載入耗時超過門檻即視為冷載入 (模型已常駐時僅數毫秒)"""
+        if seconds >= cls.COLD_LOAD_SECONDS:
+            OLLAMA_COLD_LOADS.inc(model=model, purpose=purpose)
+            OLLAMA_LOAD_SECONDS.observe(seconds, model=model, purpose=purpose)
+            print(f"🧊 Ollama 冷載入 {model}: {seconds:.1f}s ({purpose})")
+    
+    def preload(self, model: str = None, keep_alive=None) -> bool:
+        """
+        載入模型但不產生回應 (空白提示詞)；keep_alive=0 時改為卸載
         
+        Args:
+            model: 模型名稱 (預設為 model_4b)
+            keep_alive: 常駐時間 (預設 OLLAMA_KEEP_ALIVE；-1 = 常駐、0 = 卸載)
+            
+        Returns:
+            bool: 是否成功
+        """
+        model = model or self.model_4b
+        keep_alive = config.OLLAMA_KEEP_ALIVE if keep_alive is None else str(keep_alive)
+        purpose = "unload" if keep_alive == "0" else "warmup"
+        
+        start = time.perf_counter()
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": _keep_alive(keep_alive)},
+                timeout=self.LOAD_TIMEOUT
+            )
             response.raise_for_status()
-            result = response.json()
-            return result.get("response", "")
         except requests.exceptions.RequestException as e:
-            print(f"❌ Ollama API 錯誤: {e}")
-            return ""
+            OLLAMA_ERRORS.inc(model=model, purpose=purpose)
+            print(f"❌ Ollama 模型{'卸載' if purpose == 'unload' else '載入'}失敗: {model} ({e})")
+            return False
+        
+        # 載入請求的回應沒有 load_duration，以整體耗時判斷是否為冷載入
+        if purpose == "warmup":
+            self._record_load(time.perf_counter() - start, model, purpose)
+        return True
+    
+    def _get_http_session(self):
+        """共用的 aiohttp 連線 (於事件迴圈內首次使用時建立)"""
+        if self._http is None or self._http.closed:
+            import aiohttp
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self._http
+    
+    async def aclose(self) -> None:
+        """關閉 asyncio 版使用的 HTTP 連線"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
     
     def _get_extraction_prompt(self, topic: str = None) -> str:
-        """取得提取參數的系統提示詞 (Stage 1: 本地AI模型)"""
+        """取得提取參數的系統提示詞 (Stage 1: 本地AI模型，匯入時已依主題與提取模式編譯)"""
+        prompts = self.MULTI_EXTRACTION_PROMPTS if self.extraction_mode == "multi" else self.EXTRACTION_PROMPTS
+        return prompts.get(topic) or prompts[None]
+    
+    @classmethod
+    def compile_prompts(cls) -> None:
+        """
+        依主題預先組好系統提示詞
+        
+        各主題共用的說明在前、主題差異在後，使用者輸入只放在 prompt：
+        同一模型的連續呼叫有相同前綴，Ollama 可沿用已計算的 KV 快取，只需評估變動的部分
+        """
+        topics = [None, *cls.REQUIRED_FIELDS]
+        cls.EXTRACTION_PROMPTS = {topic: cls._build_extraction_prompt(topic) for topic in topics}
+        cls.MULTI_EXTRACTION_PROMPTS = {topic: cls._build_extraction_prompt(topic, multi=True) for topic in topics}
+        cls.GUIDANCE_PROMPTS = {topic: cls._build_guidance_prompt(topic) for topic in topics}
+    
+    @staticmethod
+    def _build_extraction_prompt(topic: str = None, multi: bool = False) -> str:
         base_prompt = """你是一個資料提取員，服務對象是大學生租屋族群。
 請分析使用者的輸入，用語意理解將其轉換為 JSON 格式。
 請只輸出 JSON，不要包含任何解釋性文字或 markdown 標記。
@@ -170,17 +317,29 @@ class OllamaService:
 3. 若無法判斷屬於哪一類，寧可不輸出該欄位
 4. 理解使用者的真實需求，而非字面意思"""
 
+        # 一次提取模式：使用者常在一句話裡回答好幾題，不限於當前主題
+        rule = 5
+        if multi:
+            base_prompt += ('\n5. 使用者常在一句話中同時回答好幾題（例如「預算五千，想住學校附近的套房」），'
+                            '請輸出訊息中提到的所有欄位，不限於當前詢問的主題；'
+                            'required_features 與 features_preference 只在使用者明確提到設施時才輸出，'
+                            '沒提到設施時兩者都不要輸出')
+            rule = 6
+
         if topic == "management_pref":
-             base_prompt += '\n5. 當前正在詢問「管理偏好」，若使用者回答「隨便/都可以/沒差」，請輸出 {"management_pref": "none"}'
+             base_prompt += f'\n{rule}. 當前正在詢問「管理偏好」，若使用者回答「隨便/都可以/沒差」，請輸出 {{"management_pref": "none"}}'
         elif topic == "features_preference":
-             base_prompt += '\n5. 當前正在詢問「設施需求」，若使用者回答「隨便/都可以/沒差」，請輸出 {"features_preference": "done"}'
+             base_prompt += f'\n{rule}. 當前正在詢問「設施需求」，若使用者回答「隨便/都可以/沒差」，請輸出 {{"features_preference": "done"}}'
         elif topic == "budget":
-             base_prompt += '\n5. 當前正在詢問「預算」，若使用者回答「隨便/不限」，請輸出 {"budget": 99999}'
+             base_prompt += f'\n{rule}. 當前正在詢問「預算」，若使用者回答「隨便/不限」，請輸出 {{"budget": 99999}}'
         elif topic == "type_pref":
-             base_prompt += '\n5. 當前正在詢問「房型」，若使用者回答「一個人住/單人/獨居」，請傾向輸出 {"type_pref": "套房"}'
+             base_prompt += f'\n{rule}. 當前正在詢問「房型」，若使用者回答「一個人住/單人/獨居」，請傾向輸出 {{"type_pref": "套房"}}'
 
-        # 根據不同主題提供對應的範例，避免 AI 混淆
-        if topic == "budget":
+        # 根據不同主題提供對應的範例，避免 AI 混淆 (一次提取模式改用多欄位範例)
+        if multi:
+            base_prompt += ('\n\n輸出範例（使用者一次回答多題，沒有提到設施）：\n'
+                            '{"budget": 5000, "location_pref": "school", "type_pref": "套房", "management_pref": "no_owner"}')
+        elif topic == "budget":
             base_prompt += '\n\n輸出範例：\n{"budget": 5000}'
         elif topic == "location_pref":
             base_prompt += '\n\n輸出範例：\n{"location_pref": "downtown"}'
@@ -206,50 +365,147 @@ class OllamaService:
         Returns:
             dict: 提取出的參數
         """
-        system_prompt = self._get_extraction_prompt(topic)
+        extracted, _, _, _ = self._run_flow(self._routed(
+            self._extraction_request(user_input, topic), self._parse_extraction, self.validate_extraction
+        ))
+        return extracted or {}
+    
+    def _extraction_request(self, user_input: str, topic: str = None) -> dict:
+        """Stage 1 的模型呼叫參數"""
+        return {
+            "model": self.model_4b,
+            "prompt": user_input,
+            "system": self._get_extraction_prompt(topic),
+            "purpose": "extract",
+            "topic": topic
+        }
+    
+    def _parse_extraction(self, response: str) -> Optional[dict]:
+        """解析 Stage 1 回應；格式錯誤時回傳 None (與「沒有提到任何欄位」的 {} 區分)"""
+        try:
+            return self.parse_json_response(response)
+        except (json.JSONDecodeError, Exception) as e:
+            print(f"⚠️ JSON 解析失敗: {response} (Error: {e})")
+            return None
+    
+    # Stage 1 各欄位的合法值 (小模型結果須全部符合，否則升級到大模型；合併前逐欄過濾)
+    VALID_VALUES = {
+        "location_pref": {"downtown", "school", "quiet"},
+        "type_pref": {"套房", "雅房", "整層"},
+        "management_pref": {"owner", "pro", "no_owner", "none"},
+        "features_preference": {"done"},
+    }
+    
+    @classmethod
+    def validate_extraction(cls, extracted: Optional[dict]) -> bool:
+        """
+        提取結果是否為 JSON 物件且所有已知欄位的值都合法
         
-        response = self._call_ollama(
-            model=self.model_4b,
-            prompt=user_input,
-            system=system_prompt
+        沒有任何已知欄位 (閒聊、答非所問) 時 {} 就是正確答案，不需升級到大模型
+        """
+        if not isinstance(extracted, dict):
+            return False
+        return all(
+            cls._valid_value(field, value) for field, value in extracted.items()
+            if field in cls.REQUIRED_FIELDS or field in cls.OPTIONAL_FIELDS
         )
+    
+    def _missed_fields(self, extracted: Optional[dict], rule_parsed: dict, topic: str = None) -> bool:
+        """
+        模型沒有提取到任何合法欄位，規則解析卻找到此次要求的欄位 (漏提取)
         
-        # 嘗試解析 JSON
-        try:
-            # 清理可能的 markdown 標記
-            response = response.strip()
-            
-            # 清理 <think> 標籤 (針對思考型模型)
-            import re
-            response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
+        只看要求的範圍：主題模式只問當前主題，規則解析順帶找到的其他欄位不算漏提取
+        """
+        if self.valid_fields(extracted):
+            return False
+        if self.extraction_mode == "multi":
+            return bool(rule_parsed)
+        return topic in rule_parsed
+    
+    @classmethod
+    def valid_fields(cls, extracted: dict) -> dict:
+        """逐欄檢查提取結果，只保留值合法的已知欄位 (一個欄位不合法不影響同一句話的其他欄位)"""
+        if not isinstance(extracted, dict):
+            return {}
+        return {
+            field: value for field, value in extracted.items()
+            if (field in cls.REQUIRED_FIELDS or field in cls.OPTIONAL_FIELDS) and cls._valid_value(field, value)
+        }
+    
+    @classmethod
+    def _valid_value(cls, field: str, value) -> bool:
+        if field == "budget":
+            return not isinstance(value, bool) and isinstance(value, int) and value > 0
+        if field == "required_features":
+            return isinstance(value, list) and all(isinstance(item, str) for item in value)
+        return isinstance(value, str) and value in cls.VALID_VALUES[field]
+    
+    def _routed(self, request: dict, parse, validate):
+        """
+        依模型路由呼叫 (流程片段，以 yield from 使用)
+        
+        先用路由選出的模型；小模型的結果未通過 validate 時改用大模型重試
+        
+        Returns:
+            tuple: (解析結果, 採用的模型, 該次呼叫秒數, 是否升級)
+        """
+        purpose, topic = request["purpose"], request.get("topic")
+        model = model_router.choose(purpose, topic)
+        escalated = False
+        while True:
+            start = time.perf_counter()
+            result = parse((yield {**request, "model": model}))
+            seconds = time.perf_counter() - start
+            valid = validate(result)
+            served = valid or model == model_router.large
+            model_router.record(purpose, topic, model, valid, seconds, served=served)
+            if served:
+                return result, model, seconds, escalated
+            print(f"⬆️ {model} 的結果未通過檢查，改用 {model_router.large} ({purpose}/{topic})")
+            model, escalated = model_router.large, True
+    
+    @staticmethod
+    def parse_json_response(response: str) -> dict:
+        """
+        清理模型回應 (<think> 標籤、markdown 區塊、前後廢話) 後解析 JSON
+        
+        Args:
+            response: 模型原始回應
             
-            if response.startswith("```"):
-                lines = response.split("\n")
-                # 尋找 JSON 區塊
-                json_lines = []
-                in_json = False
-                for line in lines:
-                    if line.strip().startswith("```"):
-                        if in_json: break
-                        else: in_json = True; continue
-                    if in_json:
-                        json_lines.append(line)
-                
-                if json_lines:
-                    response = "\n".join(json_lines)
-                else:
-                    # Fallback: 如果沒有完整包覆，嘗試去掉第一行和最後一行
-                    response = "\n".join(lines[1:-1])
+        Returns:
+            dict: 解析結果
             
-            # 有時候模型會輸出 JSON 以外的廢話，嘗試只抓取第一個 { 到最後一個 }
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                response = json_match.group(0)
+        Raises:
+            json.JSONDecodeError: 清理後仍不是合法 JSON
+        """
+        # 清理 <think> 標籤 (針對思考型模型)
+        response = _THINK_TAG.sub('', response.strip()).strip()
+        
+        # 清理可能的 markdown 標記
+        if response.startswith("```"):
+            lines = response.split("\n")
+            # 尋找 JSON 區塊
+            json_lines = []
+            in_json = False
+            for line in lines:
+                if line.strip().startswith("```"):
+                    if in_json: break
+                    else: in_json = True; continue
+                if in_json:
+                    json_lines.append(line)
             
-            return json.loads(response)
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"⚠️ JSON 解析失敗: {response} (Error: {e})")
-            return {}
+            if json_lines:
+                response = "\n".join(json_lines)
+            else:
+                # Fallback: 如果沒有完整包覆，嘗試去掉第一行和最後一行
+                response = "\n".join(lines[1:-1])
+        
+        # 有時候模型會輸出 JSON 以外的廢話，嘗試只抓取第一個 { 到最後一個 }
+        json_match = _JSON_OBJECT.search(response)
+        if json_match:
+            response = json_match.group(0)
+        
+        return json.loads(response)
     
     def check_completeness(self, collected_data: dict) -> tuple[bool, list[str]]:
         """
@@ -317,6 +573,36 @@ class OllamaService:
                 "response": 要回覆給使用者的訊息
             }
         """
+        return self._run_flow(self._analyze_flow(user_input, collected_data, user_id))
+    
+    async def analyze_and_respond_async(self, user_input: str, collected_data: dict, user_id: str = None) -> dict:
+        """asyncio 版 analyze_and_respond (等待模型回應時不佔用執行緒)"""
+        return await self._run_flow_async(self._analyze_flow(user_input, collected_data, user_id))
+    
+    def _run_flow(self, flow):
+        """以同步 HTTP 執行流程：將每次 yield 的呼叫參數送往 Ollama，回應再送回流程"""
+        try:
+            request = next(flow)
+            while True:
+                request = flow.send(self._call_ollama(**request))
+        except StopIteration as done:
+            return done.value
+    
+    async def _run_flow_async(self, flow):
+        """以 aiohttp 執行流程 (同 _run_flow)"""
+        try:
+            request = next(flow)
+            while True:
+                request = flow.send(await self._call_ollama_async(**request))
+        except StopIteration as done:
+            return done.value
+    
+    def _analyze_flow(self, user_input: str, collected_data: dict, user_id: str = None):
+        """
+        分析流程本體 (同步與 asyncio 版共用)
+        
+        需要呼叫模型時 yield 呼叫參數，由 _run_flow / _run_flow_async 送回模型回應
+        """
         # 0. 判斷當前上下文 (正在問哪一題)
         # 用程式邏輯預判缺少的欄位，找出第一個缺失項作為 context
         _, missing_before = self.check_completeness(collected_data)
@@ -324,20 +610,41 @@ class OllamaService:
         print(f"🧠 當前上下文推斷: {current_topic}")
 
         # Stage 1: 提取參數 (帶入上下文)
-        extracted = self.extract_params(user_input, topic=current_topic)
-        print(f"🔍 AI 提取結果: {extracted}")
+        # 規則解析先做好：模型回傳 {} 但規則找得到欄位時視為漏提取 (小模型升級、路由記為失敗)
+        rule_parsed = self._open_fields(
+            self._simple_parse(user_input, topic=current_topic), collected_data, current_topic
+        )
+        
+        def check(result):
+            return self.validate_extraction(result) and not self._missed_fields(result, rule_parsed, current_topic)
+        
+        extracted, model, seconds, escalated = yield from self._routed(
+            self._extraction_request(user_input, current_topic), self._parse_extraction, check
+        )
+        print(f"🔍 AI 提取結果: {extracted} ({model})")
+        # 是否採用模型結果 (與路由的判斷一致；閒聊時的 {} 為成功，需規則解析補救時為失敗)
+        is_success = check(extracted)
         
         # 用於紀錄的變數
         ai_raw_response = str(extracted) if extracted else ""
-        is_success = bool(extracted)
         
-        # 如果 AI 沒提取到東西，嘗試用簡單規則解析
+        # 逐欄檢查：只合併值合法的欄位，其餘欄位留待之後追問
+        valid = self.valid_fields(extracted)
+        if extracted and valid != extracted:
+            print(f"⚠️ 捨棄不合法的欄位後: {valid}")
+        extracted = valid
+        # 沒列出設施的 features_preference 只在追問設施時成立 (「都可以」)；
+        # 回答其他題時順帶輸出的 (例如照抄範例格式) 不算回答了設施，避免跳過設施題
+        if current_topic != "features_preference" and not extracted.get("required_features"):
+            extracted.pop("features_preference", None)
+        extracted = self._open_fields(extracted, collected_data, current_topic)
+        
+        # 如果 AI 沒提取到東西，改用簡單規則解析的結果
         if not extracted:
-            extracted = self._simple_parse(user_input, topic=current_topic)
+            extracted = rule_parsed
             print(f"📝 簡單解析結果: {extracted}")
             if extracted:
                 ai_raw_response = f"[規則解析] {extracted}"
-                is_success = True
         
         # 合併已收集的資料
         merged_data = {**collected_data, **extracted}
@@ -356,7 +663,10 @@ class OllamaService:
             # 提取失敗 (例外狀況)：請 AI 針對使用者的回答給予引導
             print(f"⚠️ 提取失敗，啟動 AI 引導模式 (Topic: {current_topic})")
             is_complete = False
-            response = self.generate_guidance(user_input, current_topic)
+            response, _, _, _ = yield from self._routed(
+                self._guidance_request(user_input, current_topic), str, self._valid_guidance
+            )
+            response = self._finish_guidance(response, current_topic)
             ai_raw_response = f"[引導] {response}"
         
         # 儲存 AI 紀錄
@@ -367,7 +677,10 @@ class OllamaService:
                 user_input=user_input,
                 ai_raw_response=ai_raw_response,
                 extracted_data=extracted,
-                is_success=is_success
+                is_success=is_success,
+                model=model,
+                latency_ms=int(seconds * 1000),
+                escalated=escalated
             )
         
         return {
@@ -376,28 +689,46 @@ class OllamaService:
             "response": response
         }
     
+    def _open_fields(self, extracted: dict, collected_data: dict, topic: str = None) -> dict:
+        """
+        一次提取模式：只保留尚未回答的欄位與當前主題
+        
+        提取不限當前主題時，回答其他題的用語可能被歸到已回答的欄位
+        (例如管理偏好回答「隨便」被解讀為 budget: 99999)，不應覆寫使用者先前的回答
+        """
+        if self.extraction_mode != "multi":
+            return extracted
+        answered = {
+            field for field in self.REQUIRED_FIELDS
+            if field != topic and collected_data.get(field) is not None
+        }
+        if "features_preference" in answered:
+            answered.add("required_features")
+        kept = {field: value for field, value in extracted.items() if field not in answered}
+        if kept != extracted:
+            print(f"🔒 略過已回答的欄位: {sorted(set(extracted) - set(kept))}")
+        return kept
+    
     def _save_ai_log(self, user_id: str, topic: str, user_input: str, 
-                     ai_raw_response: str, extracted_data: dict, is_success: bool) -> None:
+                     ai_raw_response: str, extracted_data: dict, is_success: bool,
+                     model: str = None, latency_ms: int = None, escalated: bool = False) -> None:
         """
-        儲存 AI 思考紀錄
+        儲存 AI 思考紀錄 (排入批次寫入佇列，不等待資料庫)
         """
-        try:
-            from app.models import db_session
-            from app.models.ai_log import AILog
-            
-            log = AILog(
-                user_id=user_id,
-                topic=topic,
-                user_input=user_input,
-                ai_raw_response=ai_raw_response,
-                extracted_data=extracted_data or {},
-                is_success=is_success
-            )
-            db_session.add(log)
-            db_session.commit()
-            print(f"📝 已儲存 AI 紀錄: user={user_id[:8]}... topic={topic}")
-        except Exception as e:
-            print(f"⚠️ 儲存 AI 紀錄失敗: {e}")
+        from app.services.ai_log_writer import ai_log_writer
+        
+        if not ai_log_writer.enqueue(
+            user_id=user_id,
+            topic=topic,
+            user_input=user_input,
+            ai_raw_response=ai_raw_response,
+            extracted_data=extracted_data or {},
+            is_success=is_success,
+            model=model,
+            latency_ms=latency_ms,
+            escalated=escalated
+        ):
+            print(f"⚠️ AI 紀錄佇列已滿，捨棄紀錄: user={user_id[:8]}... topic={topic}")
     
     def generate_guidance(self, user_input: str, topic: str) -> str:
         """
@@ -410,6 +741,23 @@ class OllamaService:
         Returns:
             str: 引導語句
         """
+        response, _, _, _ = self._run_flow(self._routed(
+            self._guidance_request(user_input, topic), str, self._valid_guidance
+        ))
+        return self._finish_guidance(response, topic)
+    
+    def _guidance_request(self, user_input: str, topic: str) -> dict:
+        """引導語句的模型呼叫參數"""
+        return {
+            "model": self.model_4b,
+            "prompt": f"使用者回答了：「{user_input}」",
+            "system": self.GUIDANCE_PROMPTS.get(topic) or self.GUIDANCE_PROMPTS[None],
+            "purpose": "guidance",
+            "topic": topic
+        }
+    
+    @classmethod
+    def _build_guidance_prompt(cls, topic: str = None) -> str:
         topic_name = {
             "budget": "預算範圍",
             "location_pref": "地點偏好",
@@ -419,39 +767,36 @@ class OllamaService:
         }.get(topic, "租屋需求")
         
         # 取得原題目內容供 AI 對照
-        original_question = self.QUESTIONS.get(topic, "")
+        original_question = cls.QUESTIONS.get(topic, "")
         
-        system_prompt = f"""你是 Chi Soo，一個親切的專門服務台灣南投縣埔里鎮暨南大學生的租屋顧問機器人 🦔
+        return f"""你是 Chi Soo，一個親切的專門服務台灣南投縣埔里鎮暨南大學生的租屋顧問機器人 🦔
 
 【背景】
 - 你正在幫助「大學生」尋找學校附近的「租屋」（不是買房！）
 - 使用者大多是年輕族群，語氣可以輕鬆活潑、像學長姐一樣親切
 - 目標是收集租屋需求資訊，幫他們找到適合的房源
 
-【當前情境】
-正在詢問使用者的「{topic_name}」。
-
-原本的題目是：
----
-{original_question}
----
-
-使用者回答了：「{user_input}」
-但這個回答無法被正確解析（可能答非所問、或格式不對）。
-
 【任務】
+使用者的回答無法被正確解析（可能答非所問、或格式不對）。
 生成一句話 (15 字以內) 引導使用者重新作答：
 - 告知回答偏題了，請用戶要根據題目再回答一次
 - 語氣輕鬆自然，像朋友聊天
 
-【重要】使用繁體中文，直接輸出那一句話，不要有多餘文字。"""
+【重要】使用繁體中文，直接輸出那一句話，不要有多餘文字。
 
-        response = self._call_ollama(
-            model=self.model_4b,
-            prompt=user_input,
-            system=system_prompt
-        )
-        
+【當前情境】
+正在詢問使用者的「{topic_name}」。
+
+原本的題目是：
+---
+{original_question}
+---"""
+    
+    @staticmethod
+    def _valid_guidance(response: str) -> bool:
+        return len(response.strip().replace('"', '')) >= 5
+    
+    def _finish_guidance(self, response: str, topic: str) -> str:
         # 清理回應
         response = response.strip().replace('"', '')
         
@@ -605,17 +950,17 @@ class OllamaService:
         if not persona_features:
             return {"matched": 0, "total": len(user_features), "match_rate": 0.0}
         
-        # 簡單字串包含匹配 (Fallback 邏輯，快速)
-        matched = 0
-        persona_str = " ".join(persona_features).lower()
-        for feature in user_features:
-            if feature.lower() in persona_str or any(f.lower() in feature.lower() for f in persona_features):
-                matched += 1
+        # 標準設施位元集比對 (Fallback 邏輯，快速)
+        from app.services.feature_vocabulary import encode_features, feature_bits_of, popcount
+        
+        user_bits, unknown = encode_features(user_features)
+        total = popcount(user_bits) + len(unknown)
+        matched = popcount(user_bits & feature_bits_of(persona_features))
         
         return {
             "matched": matched,
-            "total": len(user_features),
-            "match_rate": matched / len(user_features) if user_features else 0
+            "total": total,
+            "match_rate": matched / total if total else 0
         }
     
     def batch_match_features(self, user_features: list[str], all_personas_features: dict[str, list[str]]) -> dict[str, dict]:
@@ -658,22 +1003,20 @@ class OllamaService:
 
 【重要】只輸出 JSON，不要有其他文字。使用繁體中文思考但輸出英文 key。"""
 
-        response = self._call_ollama(
-            model=self.model_4b,
-            prompt="請進行批次設施匹配分析",
-            system=system_prompt
-        )
+        request = {
+            "model": self.model_4b,
+            "prompt": "請進行批次設施匹配分析",
+            "system": system_prompt,
+            "purpose": "feature_match"
+        }
+        result, _, _, _ = self._run_flow(self._routed(
+            request, self._parse_json_or_empty,
+            lambda parsed: self._valid_feature_match(parsed, all_personas_features)
+        ))
         
         try:
-            import re
-            response = response.strip()
-            response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
-            
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                response = json_match.group(0)
-            
-            result = json.loads(response)
+            if not result:
+                raise ValueError("無法解析模型回應")
             
             # 轉換成標準格式
             output = {}
@@ -697,3 +1040,23 @@ class OllamaService:
             # Fallback: 逐一使用簡單匹配
             return {pid: self.match_features_semantically(user_features, features) 
                     for pid, features in all_personas_features.items()}
+
+
+    def _parse_json_or_empty(self, response: str) -> dict:
+        try:
+            return self.parse_json_response(response)
+        except Exception:
+            return {}
+    
+    @staticmethod
+    def _valid_feature_match(result: dict, all_personas_features: dict) -> bool:
+        """每個人物誌都有整數 matched_count"""
+        return isinstance(result, dict) and all(
+            isinstance(result.get(pid), dict)
+            and isinstance(result[pid].get("matched_count"), int)
+            for pid in all_personas_features
+        )
+
+
+# 匯入時編譯各主題的系統提示詞
+OllamaService.compile_prompts()
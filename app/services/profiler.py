@@ -0,0 +1,238 @@
+# ============================================================
+# services/profiler.py - 線上效能剖析服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：對執行中的程序做限時的 CPU 取樣剖析 (collapsed / speedscope 格式)，
+#       以及 tracemalloc 記憶體快照比對；未啟用時完全不掛鉤、沒有額外成本
+# ============================================================
+
+import gc
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+
+# 單次剖析的上限，避免忘記停止或惡意長時間佔用
+MAX_PROFILE_SECONDS = 60
+MIN_INTERVAL_MS = 1
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有剖析正在進行"""
+
+
+class SamplingProfiler:
+    """
+    取樣式 CPU 剖析器
+
+    由呼叫端的執行緒以固定間隔讀取 sys._current_frames()，
+    不使用 sys.setprofile，因此被剖析的執行緒不受影響；
+    結束後即停止，閒置時沒有任何成本。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float = 10, interval_ms: float = 5) -> dict:
+        """
+        取樣指定秒數
+
+        Args:
+            seconds: 取樣時間 (上限 MAX_PROFILE_SECONDS)
+            interval_ms: 取樣間隔 (毫秒)
+
+        Returns:
+            dict: {"stacks": Counter[(執行緒名稱, 由外而內的 frame tuple)], "samples", "interval", "duration"}
+
+        Raises:
+            ProfilerBusyError: 已有剖析正在進行
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("已有剖析正在進行")
+        try:
+            seconds = min(max(float(seconds), 0.1), MAX_PROFILE_SECONDS)
+            interval = max(float(interval_ms), MIN_INTERVAL_MS) / 1000
+            own_thread = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+
+            start = time.perf_counter()
+            deadline = start + seconds
+            while time.perf_counter() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stacks[(names.get(thread_id, str(thread_id)), _walk(frame))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return {
+                "stacks": stacks,
+                "samples": samples,
+                "interval": interval,
+                "duration": time.perf_counter() - start,
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def to_collapsed(result: dict) -> str:
+        """輸出 Brendan Gregg collapsed stack 格式 (flamegraph.pl / speedscope 皆可讀)"""
+        lines = []
+        for (thread_name, frames), count in result["stacks"].most_common():
+            path = ";".join([thread_name] + [_frame_label(frame) for frame in frames])
+            lines.append(f"{path} {count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def to_speedscope(result: dict, name: str = "chisoo") -> dict:
+        """輸出 speedscope 檔案格式 (每個執行緒一個 sampled profile)"""
+        frame_index: dict[tuple, int] = {}
+        frames = []
+        per_thread: dict[str, tuple[list, list]] = {}
+
+        for (thread_name, stack), count in result["stacks"].items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            samples, weights = per_thread.setdefault(thread_name, ([], []))
+            samples.append(indexes)
+            weights.append(count * result["interval"])
+
+        profiles = [
+            {
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+            for thread_name, (samples, weights) in sorted(per_thread.items())
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": name,
+            "exporter": "chisoo-profiler",
+        }
+
+
+def _walk(frame) -> tuple:
+    """由最內層 frame 往外走，回傳由外而內的 (函式, 檔案, 行號) tuple"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _frame_label(frame: tuple) -> str:
+    name, filename, line = frame
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+
+class MemoryProfiler:
+    """
+    tracemalloc 快照比對
+
+    start() 之後才開始追蹤配置 (追蹤期間約有 5~30% 的配置成本)，
+    每次 snapshot() 會與上一次快照比較；stop() 後完全關閉。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_here = False
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> None:
+        """開始追蹤 (frames: 每筆配置保留的呼叫堆疊深度)"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, min(int(frames), 50)))
+                self._started_here = True
+            self._baseline = self._take()
+
+    def stop(self) -> None:
+        """停止追蹤並釋放快照"""
+        with self._lock:
+            self._baseline = None
+            if self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+
+    def snapshot(self, limit: int = 30, group_by: str = "lineno") -> dict:
+        """
+        拍攝快照並與上一次快照比較
+
+        Args:
+            limit: 回傳前幾名的差異
+            group_by: lineno / filename / traceback
+
+        Returns:
+            dict: 目前與峰值用量、差異最大的配置位置、存活的 Session / 執行緒數量
+        """
+        if group_by not in ("lineno", "filename", "traceback"):
+            group_by = "lineno"
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("尚未啟動 tracemalloc")
+            current = self._take()
+            previous, self._baseline = self._baseline, current
+
+        stats = current.compare_to(previous, group_by) if previous else current.statistics(group_by)
+        top = []
+        for stat in stats[:limit]:
+            top.append({
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(getattr(stat, "size_diff", 0) / 1024, 1),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", 0),
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            })
+
+        size, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_kb": round(size / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": top,
+            "live": self.live_objects(),
+        }
+
+    @staticmethod
+    def live_objects() -> dict:
+        """存活的 SQLAlchemy Session 與執行緒數 (檢查 scoped_session 未 remove、背景執行緒未結束)"""
+        from sqlalchemy.orm import Session
+
+        sessions = sum(1 for obj in gc.get_objects() if isinstance(obj, Session))
+        threads = Counter(re.sub(r"-\d+", "", thread.name) for thread in threading.enumerate())
+        return {"sessions": sessions, "threads": dict(threads)}
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        # 排除 tracemalloc 自身與匯入機制的配置
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+
+# 建立全域實例
+sampling_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
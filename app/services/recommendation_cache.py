@@ -0,0 +1,157 @@
+# ============================================================
+# services/recommendation_cache.py - 推薦頁面快取服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：以 (persona_id, offset) 快取已組好的推薦 Carousel，
+#       送出第 N 頁時在背景預先組好第 N+1 頁，「看更多」直接從記憶體回覆
+# ============================================================
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, select
+
+from app.models import db_session
+from app.models.affinity import HouseAffinity
+from app.models.house import House
+from app.models.persona import Persona
+from app.services.metrics import RECOMMENDATION_CACHE, registry
+
+
+# 頁面組裝函式：(persona_id, offset) -> Carousel (沒有房源時回傳 None)
+PageBuilder = Callable[[str, int], Optional[Any]]
+
+
+def recommendation_version() -> tuple:
+    """
+    取得推薦資料版本 (單一查詢)
+
+    房源、人物誌或匹配矩陣任一異動都會改變版本，
+    管理後台是獨立程序，因此以資料庫狀態判斷而非程序內事件。
+
+    Returns:
+        tuple: (房源數, 房源最後更新, 人物誌最後更新, 矩陣最後更新)
+    """
+    return tuple(db_session.query(
+        select(func.count(House.house_id)).scalar_subquery(),
+        select(func.max(House.updated_at)).scalar_subquery(),
+        select(func.max(Persona.updated_at)).scalar_subquery(),
+        select(func.max(HouseAffinity.updated_at)).scalar_subquery()
+    ).one())
+
+
+class RecommendationPageCache:
+    """
+    推薦頁面快取
+
+    Attributes:
+        max_entries: 最多快取的頁面數 (LRU)
+        wait_seconds: 頁面正在背景預取時，前景最多等待的秒數
+    """
+
+    def __init__(self, max_entries: int = 256, wait_seconds: float = 3.0):
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()  # key -> (version, payload)
+        self._inflight: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, persona_id: str, offset: int, build: PageBuilder) -> Optional[Any]:
+        """
+        取得某一頁的 Carousel (未命中時同步組裝並寫入快取)
+
+        Args:
+            persona_id: 人物誌 ID
+            offset: 偏移量
+            build: 頁面組裝函式
+
+        Returns:
+            Carousel 物件，沒有房源時回傳 None
+        """
+        key = (persona_id, offset)
+        version = recommendation_version()
+
+        hit, payload = self._lookup(key, version)
+        if hit:
+            RECOMMENDATION_CACHE.inc(result="hit")
+            return payload
+
+        # 背景正在預取同一頁：等它完成即可，不重複計算
+        with self._lock:
+            pending = self._inflight.get(key)
+        if pending is not None and pending.wait(self.wait_seconds):
+            hit, payload = self._lookup(key, version)
+            if hit:
+                RECOMMENDATION_CACHE.inc(result="prefetch_wait")
+                return payload
+
+        RECOMMENDATION_CACHE.inc(result="miss")
+        payload = build(persona_id, offset)
+        self._store(key, version, payload)
+        return payload
+
+    def prefetch(self, persona_id: str, offset: int, build: PageBuilder) -> None:
+        """
+        在背景預先組裝某一頁 (已快取或正在組裝時略過)
+
+        Args:
+            persona_id: 人物誌 ID
+            offset: 偏移量
+            build: 頁面組裝函式
+        """
+        key = (persona_id, offset)
+        with self._lock:
+            if key in self._entries or key in self._inflight:
+                return
+            done = threading.Event()
+            self._inflight[key] = done
+
+        def run_prefetch():
+            try:
+                version = recommendation_version()
+                self._store(key, version, build(persona_id, offset))
+            except Exception as e:
+                print(f"⚠️ 推薦頁面預取失敗 {key}: {e}")
+            finally:
+                # 背景執行緒有自己的 scoped session，用完需釋放連線
+                db_session.remove()
+                with self._lock:
+                    self._inflight.pop(key, None)
+                done.set()
+
+        thread = threading.Thread(target=run_prefetch)
+        thread.daemon = True
+        thread.start()
+
+    def invalidate(self) -> None:
+        """清空所有快取頁面"""
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: tuple, version: tuple) -> tuple[bool, Optional[Any]]:
+        """查詢快取，版本不符視為未命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] != version:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def _store(self, key: tuple, version: tuple, payload: Optional[Any]) -> None:
+        """寫入快取 (超過上限時淘汰最久未使用的頁面)"""
+        with self._lock:
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# 建立全域快取實例
+recommendation_cache = RecommendationPageCache()
+
+registry.gauge(
+    "chisoo_recommendation_prefetch_inflight", "背景預取中的推薦頁數"
+).set_function(lambda: len(recommendation_cache._inflight))
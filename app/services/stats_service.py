@@ -0,0 +1,140 @@
+# ============================================================
+# services/stats_service.py - 管理後台統計服務
+# 專案：Chi Soo 租屋小幫手
+# 說明：以 GROUP BY 彙總查詢產生儀表板統計快照 (短時間快取)，
+#       並維護待審核驗證 / 評價計數，頁面渲染不再逐筆 COUNT
+# ============================================================
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.models import db_session
+from app.models.house import House
+from app.models.persona import Persona
+from app.models.review import Review
+from app.models.session import UserSession
+from app.models.user import User
+from app.models.verification import Verification, VerificationStatus
+
+
+class StatsService:
+    """
+    儀表板統計服務
+
+    快照每 ttl_seconds 秒最多重算一次 (固定 5 次彙總查詢，與使用者數量無關)。
+    待審核計數在管理後台變更狀態時即時增減，重算快照時再以資料庫校正，
+    因此由 LINE Bot 端新送出的申請最晚在下一次重算時出現。
+
+    Attributes:
+        ttl_seconds: 快照有效秒數
+    """
+
+    # 待審核計數種類
+    VERIFICATIONS = "verifications"
+    REVIEWS = "reviews"
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._pending = {self.VERIFICATIONS: 0, self.REVIEWS: 0}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        """
+        取得儀表板統計快照 (過期時重算)
+
+        Returns:
+            dict: 使用者 / 房源 / 人物誌數量、人物誌分布、近 7 日註冊數等
+        """
+        with self._lock:
+            if self._snapshot is None or time.monotonic() >= self._expires_at:
+                self._snapshot, pending = self._compute()
+                self._pending.update(pending)
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            return {**self._snapshot, "pending": dict(self._pending)}
+
+    def pending_counts(self) -> dict:
+        """取得待審核計數 {"verifications": n, "reviews": n}"""
+        return self.snapshot()["pending"]
+
+    def record_status_change(self, kind: str, old_status, new_status) -> None:
+        """
+        狀態變更時更新待審核計數 (刪除時 new_status 傳 None)
+
+        Args:
+            kind: StatsService.VERIFICATIONS 或 StatsService.REVIEWS
+            old_status: 變更前狀態
+            new_status: 變更後狀態
+        """
+        pending = VerificationStatus.PENDING  # 驗證與評價的待審核狀態同為 "pending"
+        delta = (new_status == pending) - (old_status == pending)
+        if not delta:
+            return
+        with self._lock:
+            self._pending[kind] = max(0, self._pending[kind] + delta)
+
+    def invalidate(self) -> None:
+        """讓快照立即失效 (大量異動後使用)"""
+        with self._lock:
+            self._expires_at = 0.0
+
+    @staticmethod
+    def _compute() -> tuple[dict, dict]:
+        """以彙總查詢計算快照與待審核計數"""
+        # 1. 人物誌分布 (User.persona_type 存的是 persona_id)
+        persona_names = dict(db_session.query(Persona.persona_id, Persona.name).all())
+        persona_counts = {}
+        user_count = 0
+        for persona_type, count in db_session.query(
+            User.persona_type, func.count(User.user_id)
+        ).group_by(User.persona_type).all():
+            user_count += count
+            label = persona_names.get(persona_type, persona_type) if persona_type else "未分類"
+            persona_counts[label] = persona_counts.get(label, 0) + count
+
+        # 2. 測驗狀態
+        session_status = dict(db_session.query(
+            UserSession.status, func.count(UserSession.user_id)
+        ).group_by(UserSession.status).all())
+
+        # 3. 其餘計數合併為單一查詢
+        house_count, pending_verifications, pending_reviews = db_session.query(
+            select(func.count(House.house_id)).scalar_subquery(),
+            select(func.count(Verification.id)).where(
+                Verification.status == VerificationStatus.PENDING
+            ).scalar_subquery(),
+            select(func.count(Review.review_id)).where(Review.status == "pending").scalar_subquery()
+        ).one()
+
+        # 4. 近 7 日註冊數
+        today = datetime.utcnow().date()
+        growth = {(today - timedelta(days=i)).strftime('%Y-%m-%d'): 0 for i in range(6, -1, -1)}
+        date_func = func.date(User.created_at)
+        for date_obj, count in db_session.query(
+            date_func, func.count(User.user_id)
+        ).filter(User.created_at >= datetime.utcnow() - timedelta(days=7)).group_by(date_func).all():
+            if str(date_obj) in growth:
+                growth[str(date_obj)] = count
+
+        snapshot = {
+            "user_count": user_count,
+            "session_count": sum(session_status.values()),
+            "testing_count": session_status.get("TESTING", 0),
+            "house_count": house_count,
+            "persona_count": len(persona_names),
+            "persona_counts": persona_counts,
+            "growth": growth
+        }
+        pending = {
+            StatsService.VERIFICATIONS: pending_verifications,
+            StatsService.REVIEWS: pending_reviews
+        }
+        return snapshot, pending
+
+
+# 建立全域統計服務實例
+stats_service = StatsService()
@@ -1,10 +1,19 @@
 # ============================================================
 # services/weight_service.py - 權重強制選擇服務
 # 專案：Chi Soo 租屋小幫手
-# 說明：處理 6 組二選一情境，計算使用者權重並產生雷達圖
+# 說明：處理 6 組二選一情境，計算使用者權重並產生雷達圖；
+#       六題二選一只有 2^6 = 64 種結果，啟動時預先算好權重與文案，
+#       並以 Pillow 在本機繪製雷達圖快取於磁碟，由本服務提供圖片
 # ============================================================
 
+import itertools
+import math
+import os
+import re
 import urllib.parse
+from typing import Optional
+
+from app.config import config
 
 class WeightService:
     """
@@ -27,6 +36,27 @@ class WeightService:
         "keyword": 50
     }
     
+    # 雷達圖標籤 (順序同 DIMENSIONS)；找不到中文字型時改用英文
+    RADAR_LABELS = ["預算", "地段", "設施", "房東", "房型", "關鍵字"]
+    RADAR_LABELS_ASCII = ["Budget", "Location", "Features", "Landlord", "Type", "Keyword"]
+    
+    # 雷達圖版本 (調整繪圖樣式時遞增，讓快取檔與 URL 一併更新)
+    CHART_VERSION = 1
+    CHART_SIZE = 500
+    
+    # 常見的中文字型位置 (Linux / macOS / Windows)
+    FONT_CANDIDATES = [
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        "/System/Library/Fonts/PingFang.ttc",
+        "C:/Windows/Fonts/msjh.ttc",
+    ]
+    
+    # 預先計算的結果表：{"ABBABA": {"weights", "summary", "chart_url"}}
+    _outcomes: dict[str, dict] = {}
+    
     # 題目定義（價值觀權重測驗）
     # 設計原則：
     # 1. 只問「你更在乎什麼」，不涉及具體選項（如套房/雅房）
@@ -260,3 +290,155 @@ class WeightService:
             f"了解了！從你的選擇來看，「{t1_name}」與「{t2_name}」是你最看重的兩個面向 ✨\n\n"
             f"接下來進入 Step 2，我會問幾個具體的條件問題，完成後就能為你診斷專屬的租屋人格囉！"
         )
+
+    # ---------- 預先計算的 64 種結果 ----------
+
+    @staticmethod
+    def outcome_key(answers: dict) -> Optional[str]:
+        """將答案轉為結果表的 key (例如 "ABBABA")；答案不完整時回傳 None"""
+        key = "".join(str(answers.get(str(i), "")) for i in range(1, len(WeightService.SCENARIOS) + 1))
+        return key if re.fullmatch(r"[AB]{%d}" % len(WeightService.SCENARIOS), key) else None
+
+    @staticmethod
+    def precompute_outcomes(render_charts: bool = True) -> int:
+        """
+        預先計算所有答案組合的權重、總結文案與雷達圖 (啟動時呼叫一次)
+
+        Args:
+            render_charts: 是否繪製磁碟上尚不存在的雷達圖
+
+        Returns:
+            int: 結果數量
+        """
+        outcomes = {}
+        rendered = 0
+        for choices in itertools.product("AB", repeat=len(WeightService.SCENARIOS)):
+            key = "".join(choices)
+            weights = WeightService.calculate_weights({str(i + 1): c for i, c in enumerate(choices)})
+            outcomes[key] = {
+                "weights": weights,
+                "summary": WeightService.generate_summary_text(weights),
+                "chart_url": WeightService.chart_url(key),
+            }
+            if render_charts and not os.path.exists(WeightService.chart_file(key)):
+                WeightService.render_radar_png(weights, WeightService.chart_file(key))
+                rendered += 1
+
+        WeightService._outcomes = outcomes
+        print(f"📊 已預先計算 {len(outcomes)} 種價值觀結果 (新繪製雷達圖 {rendered} 張)")
+        return len(outcomes)
+
+    @staticmethod
+    def get_outcome(answers: dict) -> dict:
+        """
+        取得答案對應的權重、總結文案與雷達圖 URL
+
+        已預先計算時只需一次查表；答案不完整時即時計算並回退 QuickChart。
+        回傳的 dict 為共用物件，呼叫端不可修改。
+        """
+        key = WeightService.outcome_key(answers)
+        outcome = WeightService._outcomes.get(key) if key else None
+        if outcome:
+            return outcome
+
+        weights = WeightService.calculate_weights(answers)
+        return {
+            "weights": weights,
+            "summary": WeightService.generate_summary_text(weights),
+            "chart_url": WeightService.chart_url(key) if key else WeightService.generate_radar_chart_url(weights),
+        }
+
+    # ---------- 本機雷達圖 ----------
+
+    @staticmethod
+    def chart_url(key: str) -> str:
+        """雷達圖的公開 URL (由 /api/charts/weights 提供)"""
+        return f"{config.BASE_URL}/api/charts/weights/{key}.png?v={WeightService.CHART_VERSION}"
+
+    @staticmethod
+    def chart_file(key: str) -> str:
+        """雷達圖快取檔路徑"""
+        return os.path.join(config.CHART_CACHE_DIR, f"weights_{key}_v{WeightService.CHART_VERSION}.png")
+
+    @staticmethod
+    def ensure_chart(key: str) -> Optional[str]:
+        """
+        取得雷達圖檔案路徑，尚未繪製時立即繪製
+
+        Returns:
+            str: 檔案路徑；key 不合法時回傳 None
+        """
+        if not re.fullmatch(r"[AB]{%d}" % len(WeightService.SCENARIOS), key):
+            return None
+        path = WeightService.chart_file(key)
+        if not os.path.exists(path):
+            outcome = WeightService._outcomes.get(key)
+            weights = outcome["weights"] if outcome else WeightService.calculate_weights(
+                {str(i + 1): c for i, c in enumerate(key)}
+            )
+            WeightService.render_radar_png(weights, path)
+        return path
+
+    @staticmethod
+    def render_radar_png(weights: dict, path: str) -> None:
+        """以 Pillow 繪製雷達圖 (2 倍尺寸繪製後縮小以取得平滑邊緣)"""
+        from PIL import Image, ImageDraw
+
+        scale = 2
+        size = WeightService.CHART_SIZE * scale
+        center = size / 2
+        radius = size * 0.34
+        count = len(WeightService.DIMENSIONS)
+
+        def point(index: int, value: float) -> tuple[float, float]:
+            angle = -math.pi / 2 + 2 * math.pi * index / count
+            r = radius * value / 100
+            return (center + r * math.cos(angle), center + r * math.sin(angle))
+
+        image = Image.new("RGBA", (size, size), (255, 255, 255, 255))
+        draw = ImageDraw.Draw(image)
+
+        # 格線：20 ~ 100 共五層與六條軸線
+        grid_color = (209, 213, 219, 255)
+        for level in range(20, 101, 20):
+            draw.polygon([point(i, level) for i in range(count)], outline=grid_color, width=scale)
+        for i in range(count):
+            draw.line([point(i, 0), point(i, 100)], fill=grid_color, width=scale)
+
+        # 資料區塊 (Indigo-500，半透明填色)
+        values = [min(100, max(0, weights.get(dim, 50))) for dim in WeightService.DIMENSIONS]
+        shape = [point(i, value) for i, value in enumerate(values)]
+        overlay = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        ImageDraw.Draw(overlay).polygon(shape, fill=(99, 102, 241, 128))
+        image = Image.alpha_composite(image, overlay)
+        draw = ImageDraw.Draw(image)
+        draw.line(shape + [shape[0]], fill=(99, 102, 241, 255), width=2 * scale, joint="curve")
+        for x, y in shape:
+            dot = 4 * scale
+            draw.ellipse([x - dot, y - dot, x + dot, y + dot], fill=(99, 102, 241, 255))
+
+        font, labels = WeightService._chart_font(15 * scale)
+        for i, label in enumerate(labels):
+            draw.text(point(i, 118), label, font=font, fill=(51, 51, 51, 255), anchor="mm")
+
+        image = image.convert("RGB").resize((WeightService.CHART_SIZE, WeightService.CHART_SIZE), Image.LANCZOS)
+
+        # 先寫暫存檔再改名，多個程序同時繪製也不會讀到半張圖
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.part"
+        image.save(temp_path, "PNG")
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _chart_font(size: int):
+        """取得標籤字型：優先使用中文字型，找不到時改用內建字型與英文標籤"""
+        from PIL import ImageFont
+
+        candidates = [config.CHART_FONT_PATH] if config.CHART_FONT_PATH else WeightService.FONT_CANDIDATES
+        for path in candidates:
+            if os.path.exists(path):
+                try:
+                    return ImageFont.truetype(path, size), WeightService.RADAR_LABELS
+                except OSError:
+                    continue
+        return ImageFont.load_default(size), WeightService.RADAR_LABELS_ASCII
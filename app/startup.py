@@ -0,0 +1,72 @@
+# ============================================================
+# startup.py - 啟動耗時紀錄
+# 專案：Chi Soo 租屋小幫手
+# 說明：分段記錄啟動時各套件匯入與初始化步驟的耗時，
+#       啟動後印出明細，方便找出拖慢冷啟動的項目
+#       (更細的模組層級明細可用 python -X importtime run.py)；
+#       以及多 worker 部署時接流量前的預熱
+# ============================================================
+
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """啟動階段計時器"""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """記錄一個階段的耗時 (先匯入的階段會計入共用相依套件的時間)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    @property
+    def total(self) -> float:
+        """自計時器建立至今的秒數"""
+        return time.perf_counter() - self._origin
+
+    def report(self) -> list[str]:
+        """各階段耗時明細 (依耗時排序)"""
+        total = self.total
+        lines = []
+        for name, seconds in sorted(self.stages, key=lambda item: item[1], reverse=True):
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"   {name:<28} {seconds * 1000:8.1f} ms  {share:5.1f}%")
+        lines.append(f"   {'總計':<26} {total * 1000:8.1f} ms")
+        return lines
+
+    def print_report(self) -> None:
+        print("\n⏱️ 啟動耗時明細:")
+        for line in self.report():
+            print(line)
+
+
+def warm_up() -> None:
+    """
+    接流量前預熱：確認資料庫可連線並建立房源索引
+
+    於 gunicorn master (preload_app) 執行時，索引由 fork 出的 worker 共用；
+    結束時歸還並關閉連線，worker 不會繼承任何已開啟的連線
+    """
+    from sqlalchemy import text
+
+    from app.models import db_session, engine
+    from app.services.catalog_index import house_catalog_index
+
+    with startup_timer.stage("warm-up"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        house_catalog_index.get_snapshot()
+        db_session.remove()
+        engine.dispose()
+
+
+# 全域計時器 (於 run.py 最先匯入)
+startup_timer = StartupTimer()
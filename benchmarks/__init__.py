@@ -0,0 +1,5 @@
+# ============================================================
+# benchmarks/__init__.py - 效能基準測試套件
+# 專案：Chi Soo 租屋小幫手
+# 說明：執行方式見 benchmarks/run.py
+# ============================================================
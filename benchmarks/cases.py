@@ -0,0 +1,92 @@
+# ============================================================
+# benchmarks/cases.py - 基準測試項目
+# 專案：Chi Soo 租屋小幫手
+# 說明：定義每個量測項目 (名稱, 無參數函式)；
+#       Ollama 呼叫以錄製回應取代，不需網路與資料庫
+# ============================================================
+
+from unittest.mock import patch
+
+from app.services.matching_service import MatchingService
+from app.services.ollama_service import OllamaService
+from app.services.weight_service import WeightService
+from benchmarks import fixtures
+
+# 房源目錄規模
+CATALOG_SIZES = (1_000, 10_000)
+
+
+def build_cases() -> list[tuple[str, callable]]:
+    """建立所有量測項目 (資料只在這裡產生一次，不計入耗時)"""
+    import app.main as main
+
+    personas = fixtures.make_personas()
+    persona = personas[1]
+    catalogs = {size: fixtures.make_houses(size) for size in CATALOG_SIZES}
+    page = catalogs[CATALOG_SIZES[0]][:5]
+    raw_responses = fixtures.load_raw_responses()
+    weights = WeightService.calculate_weights(fixtures.WEIGHT_ANSWERS)
+    WeightService.precompute_outcomes(render_charts=False)
+
+    # MatchingService.match：人物誌改由記憶體提供，AI 設施匹配回傳錄製結果
+    matching = MatchingService()
+    matching.load_active_personas = lambda: personas
+    feature_response = fixtures.fake_feature_match_response(personas)
+
+    def match():
+        with patch.object(OllamaService, "_call_ollama", return_value=feature_response):
+            return matching.match(fixtures.USER_DATA, fixtures.RAW_TEXT, weights)
+
+    def persona_scores():
+        for item in personas:
+            matching.calculate_persona_score(fixtures.USER_DATA, item, fixtures.RAW_TEXT, weights)
+
+    def house_scores(houses):
+        def run():
+            for house in houses:
+                matching._calculate_house_match_score(house, persona)
+        return run
+
+    def parse_responses():
+        for raw in raw_responses:
+            try:
+                OllamaService.parse_json_response(raw)
+            except ValueError:
+                pass
+
+    houses_with_scores = [
+        {
+            "house": house,
+            "match_score": matching._calculate_house_match_score(house, persona),
+            "recommendation_reason": matching._generate_recommendation_reason(house, persona, 80),
+        }
+        for house in page
+    ]
+    house_map = {house.house_id: house for house in page}
+    favorites = fixtures.make_favorites(page)
+
+    cases = [
+        ("matching.match (stubbed ollama)", match),
+        ("matching.calculate_persona_score x5", persona_scores),
+    ]
+    cases += [
+        (f"matching.house_match_score x{size}", house_scores(houses))
+        for size, houses in catalogs.items()
+    ]
+    cases += [
+        (f"ollama.parse_json_response x{len(raw_responses)}", parse_responses),
+        ("weight.calculate_weights", lambda: WeightService.calculate_weights(fixtures.WEIGHT_ANSWERS)),
+        ("weight.get_outcome (precomputed)", lambda: WeightService.get_outcome(fixtures.WEIGHT_ANSWERS)),
+        ("flex.create_ranking_carousel",
+         lambda: main.create_ranking_carousel(page, "CP 值排行", "🏆", "#F59E0B", "#D97706")),
+        ("flex.create_tips_carousel", main.create_tips_carousel),
+        ("flex.create_favorites_carousel", lambda: main.create_favorites_carousel(favorites, house_map)),
+        ("flex.create_houses_carousel", lambda: main.create_houses_carousel(page, persona.persona_id, 0)),
+        ("flex.create_recommendation_carousel",
+         lambda: main.create_recommendation_carousel(houses_with_scores, persona, persona.persona_id, 0)),
+        ("flex.create_house_detail_card", lambda: main.create_house_detail_card(page[0])),
+        ("flex.create_diagnosis_flex", lambda: main.create_diagnosis_flex(persona, 87)),
+        ("flex.create_weight_question_flex",
+         lambda: main.create_weight_question_flex(WeightService.get_question(1), 1, 6)),
+    ]
+    return cases
@@ -0,0 +1,133 @@
+# ============================================================
+# benchmarks/fixtures.py - 效能基準測試資料
+# 專案：Chi Soo 租屋小幫手
+# 說明：以固定亂數種子產生人物誌、房源目錄與使用者資料 (不需資料庫)，
+#       確保每次執行的輸入完全相同、結果可互相比較
+# ============================================================
+
+import json
+import os
+import random
+
+from app.models.favorite import Favorite
+from app.models.house import House
+from app.models.persona import Persona
+from app.services.feature_vocabulary import FEATURES
+
+
+SEED = 20240601
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+ROOM_TYPES = ["套房", "雅房", "獨立套房", "整層", "家庭式"]
+FEATURE_KEYS = [key for key, _, _ in FEATURES]
+
+# 與 scripts/seed_data.py 相同的五種人物誌骨架
+PERSONA_TEMPLATES = [
+    ("type_A", "省錢戰士型", 2000, 3500, ["quiet", "school"], [], ["wifi"], ["便宜", "省錢", "雅房", "CP值"]),
+    ("type_B", "懶人貴族型", 5500, 8000, ["downtown"], ["garbage", "elevator"], ["parking", "laundry"],
+     ["子母車", "電梯", "近市區", "方便"]),
+    ("type_C", "安全堡壘型", 4000, 6500, ["downtown", "school"], ["security"], ["landlord_live_in", "cctv"],
+     ["門禁", "監視器", "安全", "管理員"]),
+    ("type_D", "社交群居型", 4000, 7000, ["downtown", "school"], ["living_room"], ["kitchen", "balcony"],
+     ["客廳", "室友", "開伙", "熱鬧"]),
+    ("type_E", "質感獨享型", 6000, 10000, ["downtown", "quiet"], ["balcony", "laundry"],
+     ["parking", "new_renovation"], ["獨洗獨曬", "陽台", "新裝潢", "質感"]),
+]
+
+
+def make_personas() -> list[Persona]:
+    """建立五種啟用中的人物誌 (未加入 Session)"""
+    personas = []
+    for persona_id, name, rent_min, rent_max, locations, required, bonus, keywords in PERSONA_TEMPLATES:
+        persona = Persona(
+            persona_id=persona_id,
+            name=name,
+            description=f"{name}的描述",
+            keywords=keywords,
+            algo_config={
+                "rent_min": rent_min,
+                "rent_max": rent_max,
+                "preferred_locations": locations,
+                "required": required,
+                "bonus": bonus,
+                "room_type": "studio",
+            },
+            active=True,
+        )
+        persona.refresh_feature_bits()
+        personas.append(persona)
+    return personas
+
+
+def make_houses(count: int, seed: int = SEED) -> list[House]:
+    """建立指定數量的房源 (未加入 Session)"""
+    rng = random.Random(seed)
+    houses = []
+    for index in range(count):
+        features = {key: True for key in rng.sample(FEATURE_KEYS, rng.randint(2, 10))}
+        house = House(
+            house_id=index + 1,
+            name=f"埔里測試房源 {index + 1}",
+            address=f"南投縣埔里鎮中山路{index + 1}號",
+            category_tag=rng.choice(PERSONA_TEMPLATES)[0],
+            rent=rng.randrange(2000, 12000, 100),
+            room_type=rng.choice(ROOM_TYPES),
+            features=features,
+            description="近暨大，生活機能佳。" * 3,
+            image_url=None,
+            latitude=23.96 + rng.random() / 100,
+            longitude=120.96 + rng.random() / 100,
+            avg_rating=round(rng.uniform(2.5, 5.0), 1),
+            review_count=rng.randint(0, 40),
+            is_active=True,
+        )
+        house.refresh_feature_bits()
+        houses.append(house)
+    return houses
+
+
+def make_favorites(houses: list[House]) -> list[Favorite]:
+    return [Favorite(id=i + 1, user_id="U_bench", house_id=house.house_id) for i, house in enumerate(houses)]
+
+
+# 完整填寫的使用者資料；required_features 含一個詞彙表外的設施，會走 AI 批次匹配路徑
+USER_DATA = {
+    "budget": 6000,
+    "location_pref": "downtown",
+    "type_pref": "套房",
+    "management_pref": "no_owner",
+    "features_preference": True,
+    "required_features": ["子母車", "電梯", "獨洗獨曬", "近超商"],
+}
+RAW_TEXT = "預算六千以內，想住市區方便一點，最好有子母車和電梯，不想跟房東住"
+
+# 權重測驗答案
+WEIGHT_ANSWERS = {"1": "B", "2": "A", "3": "A", "4": "B", "5": "B", "6": "B"}
+
+# Step 2 問卷：每位使用者的第一句話 (一次提到的欄位數不同)，之後依追問逐題回答
+QUESTIONNAIRE_OPENINGS = [
+    "預算5000，想住學校附近的套房，不要跟房東住，要有洗衣機跟冷氣",
+    "預算5000，想住學校附近的套房，不要跟房東住",
+    "想找市區的雅房，六千以內",
+    "整層公寓，跟朋友合租",
+    "五千",
+]
+QUESTIONNAIRE_ANSWERS = {
+    "budget": "大概五千",
+    "location_pref": "學校附近",
+    "type_pref": "套房",
+    "management_pref": "不想跟房東住",
+    "features_preference": "要有洗衣機跟電梯",
+}
+
+
+def fake_feature_match_response(personas: list[Persona]) -> str:
+    """模擬模型回傳的批次設施匹配結果 (含思考標籤)"""
+    body = {persona.persona_id: {"matched_count": index % 4} for index, persona in enumerate(personas)}
+    return "<think>逐一比對每種類型的設施</think>\n" + json.dumps(body)
+
+
+def load_raw_responses() -> list[str]:
+    """載入錄製的模型原始回應 (extract_params 的輸入)"""
+    with open(os.path.join(DATA_DIR, "raw_responses.json"), encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,108 @@
+# ============================================================
+# benchmarks/questionnaire.py - Step 2 問卷完成成本基準測試
+# 專案：Chi Soo 租屋小幫手
+# 說明：以 Ollama 替身 (依提示詞範例作答的 extract_fields) 模擬使用者完成 Step 2 問卷，
+#       比較各提取模式 (OLLAMA_EXTRACTION_MODE) 每位使用者需要的對話回合與 LLM 呼叫數
+#       替身以關鍵字完整提取、且一定照提示詞要求的欄位作答，結果是一次提取模式可省下回合的上限，
+#       不代表真實模型的表現 (真實模型可能漏提取或多輸出欄位)
+# 使用方式：
+#   python benchmarks/questionnaire.py
+#   python benchmarks/questionnaire.py -o questionnaire.json
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑；基準測試不會連線資料庫
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import contextlib
+import io
+import json
+from unittest.mock import patch
+
+from app.services import ollama_service
+from app.services.model_router import ModelRouter
+from app.services.ollama_service import OllamaService
+from benchmarks import fixtures
+from scripts.fake_ollama import FakeOllama
+
+MODES = ("topic", "multi")
+# 超過此回合數仍未完成視為失敗 (避免替身無法解析時無限追問)
+MAX_TURNS = 12
+
+SCRIPT = {"rules": [{"name": "extract", "match": {"system": "資料提取員"}, "responses": [{"handler": "extract_fields"}]},
+                    {"name": "guidance", "responses": ["再說一次看看 😊"]}]}
+
+
+def complete_questionnaire(service: OllamaService, opening: str) -> tuple[int, bool]:
+    """
+    從第一句話開始，依機器人追問的主題逐題回答直到問卷完成
+
+    Returns:
+        tuple[int, bool]: (對話回合數, 是否完成)
+    """
+    collected, text = {}, opening
+    for turn in range(1, MAX_TURNS + 1):
+        result = service.analyze_and_respond(text, collected)
+        collected = result["collected_data"]
+        if result["is_complete"]:
+            return turn, True
+        _, missing = service.check_completeness(collected)
+        text = fixtures.QUESTIONNAIRE_ANSWERS[missing[0]]
+    return MAX_TURNS, False
+
+
+def run(mode: str) -> dict:
+    """以指定提取模式讓每位使用者完成問卷"""
+    fake = FakeOllama(script=SCRIPT, seed=fixtures.SEED)
+    service = OllamaService()
+    service.base_url = fake.start()
+    service.extraction_mode = mode
+
+    users = []
+    try:
+        # 不使用小模型路由，兩種模式都只呼叫同一個模型
+        with patch.object(ollama_service, "model_router", ModelRouter("", service.model_4b)):
+            for opening in fixtures.QUESTIONNAIRE_OPENINGS:
+                before = fake.stats["requests"]
+                with contextlib.redirect_stdout(io.StringIO()):
+                    turns, completed = complete_questionnaire(service, opening)
+                users.append({"opening": opening, "turns": turns,
+                              "llm_calls": fake.stats["requests"] - before, "completed": completed})
+    finally:
+        fake.stop()
+
+    return {
+        "turns_per_user": sum(user["turns"] for user in users) / len(users),
+        "llm_calls_per_user": sum(user["llm_calls"] for user in users) / len(users),
+        "completed": sum(user["completed"] for user in users),
+        "users": users,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo Step 2 問卷完成成本")
+    parser.add_argument("-o", "--output", help="結果 JSON 路徑")
+    args = parser.parse_args()
+
+    print("📝 Step 2 問卷完成成本 (每位使用者平均；腳本替身完全照提示詞作答，為可省下回合的上限)")
+    results = {}
+    for mode in MODES:
+        results[mode] = run(mode)
+        print(f"  {mode:<6} 回合 {results[mode]['turns_per_user']:.1f}，"
+              f"LLM 呼叫 {results[mode]['llm_calls_per_user']:.1f}，"
+              f"完成 {results[mode]['completed']}/{len(fixtures.QUESTIONNAIRE_OPENINGS)}")
+        for user in results[mode]["users"]:
+            print(f"         {user['turns']:>2} 回合 / {user['llm_calls']:>2} 次呼叫  {user['opening']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 結果已寫入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
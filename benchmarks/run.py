@@ -0,0 +1,172 @@
+# ============================================================
+# benchmarks/run.py - 微基準測試執行器
+# 專案：Chi Soo 租屋小幫手
+# 說明：量測匹配、解析與 Flex 產生等熱點函式的耗時，
+#       結果輸出為 JSON，可與儲存的基準線比較
+# 使用方式：
+#   python benchmarks/run.py                                  # 執行全部並輸出 benchmarks/results.json
+#   python benchmarks/run.py -k carousel                      # 只執行名稱含 carousel 的項目
+#   python benchmarks/run.py --compare benchmarks/baseline.json
+#   python benchmarks/run.py --save-baseline                  # 更新 benchmarks/baseline.json
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑；基準測試不會連線資料庫
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# 每輪目標時間與重複輪數
+TARGET_ROUND_SECONDS = 0.2
+ROUNDS = 5
+# 比較時超過此倍數視為退步
+REGRESSION_RATIO = 1.25
+
+
+def measure(function: Callable[[], object], rounds: int = ROUNDS) -> dict:
+    """
+    量測函式單次呼叫耗時
+
+    先校準每輪的呼叫次數 (讓每輪約 TARGET_ROUND_SECONDS)，再重複 rounds 輪，
+    以每輪平均換算單次耗時；函式內的 print 輸出會被丟棄。
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= TARGET_ROUND_SECONDS / 10 or number >= 1_000_000:
+                break
+            number *= 10
+        number = max(1, int(number * TARGET_ROUND_SECONDS / max(elapsed, 1e-9)))
+
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "loops": number,
+        "rounds": rounds,
+        "min_us": round(min(timings) * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "mean_us": round(statistics.fmean(timings) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(timings) * 1e6, 3) if rounds > 1 else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(pattern: str = "", rounds: int = ROUNDS) -> dict:
+    """執行所有 (或名稱含 pattern 的) 基準測試"""
+    from benchmarks.cases import build_cases
+
+    results = {}
+    for name, function in build_cases():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(function, rounds)
+        print(f"  ⏱️  {name:<48} {results[name]['median_us']:>12.1f} µs  ({results[name]['loops']} loops)")
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_RATIO) -> list[str]:
+    """
+    與基準線比較中位數
+
+    Returns:
+        list[str]: 退步超過門檻的項目名稱
+    """
+    regressions = []
+    print(f"\n📊 與基準線比較 (revision {baseline['meta'].get('revision') or '?'}，"
+          f"門檻 x{threshold})")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"  🆕 {name:<48} (基準線沒有此項目)")
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        if ratio > threshold:
+            marker = "🔴"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            marker = "🟢"
+        else:
+            marker = "⚪"
+        print(f"  {marker} {name:<48} {base['median_us']:>12.1f} → {result['median_us']:>12.1f} µs  x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo 微基準測試")
+    parser.add_argument("-k", dest="pattern", default="", help="只執行名稱含此字串的項目")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="結果 JSON 路徑")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="重複輪數")
+    parser.add_argument("--compare", metavar="BASELINE", help="與指定的基準線 JSON 比較")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO, help="退步門檻倍數")
+    parser.add_argument("--save-baseline", action="store_true", help=f"同時寫入 {DEFAULT_BASELINE}")
+    args = parser.parse_args()
+
+    print("🏁 Chi Soo 微基準測試")
+    current = run(args.pattern, args.rounds)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 結果已寫入 {args.output}")
+
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"💾 基準線已更新 {DEFAULT_BASELINE}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 個項目退步: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ 沒有退步")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# ============================================================
+# gunicorn.conf.py - 多 worker 部署設定
+# 專案：Chi Soo 租屋小幫手
+# 說明：master 預先載入並預熱應用程式 (preload_app)，
+#       worker 直接 fork，重啟時不必重新匯入 LINE SDK 等套件；
+#       資料庫連線池於 fork 後由各 worker 重新建立 (見 app/models)
+# 使用方式：gunicorn -c gunicorn.conf.py wsgi:app
+# ============================================================
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# 先載入應用程式再 fork worker
+preload_app = True
+
+# Ollama 回覆較慢，逾時需大於 LLM 最長等待時間
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """每個 worker 各自啟動模型常駐排程 (背景執行緒不會跟著 fork 複製；重複的 ping 不影響 Ollama)"""
+    from app.config import config
+
+    if config.OLLAMA_WARMUP:
+        from app.services.model_warmer import model_warmer
+        model_warmer.start()
+
+
+def when_ready(server):
+    """列出連線數預算：每個 worker 的執行緒與背景執行緒共用一個連線池"""
+    from app.config import config
+
+    per_worker = config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW
+    server.log.info(
+        f"🗄️ 資料庫連線上限 {workers} workers x {per_worker} = {workers * per_worker} "
+        f"(pool_size={config.DB_POOL_SIZE}, max_overflow={config.DB_MAX_OVERFLOW}, threads={threads})"
+    )
+    if config.DB_POOL_SIZE < threads:
+        server.log.warning("⚠️ DB_POOL_SIZE 小於每個 worker 的執行緒數，尖峰時請求可能等待連線")
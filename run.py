@@ -9,30 +9,81 @@ import os
 # Add project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask_cors import CORS
-from app.main import app
-from app.config import config
-from app.handlers import register_handlers
-from app.models import init_db
-
-# 啟用 CORS (供 LIFF 前端呼叫)
-CORS(app, origins=[
-    "https://liff-app-beige.vercel.app",
-    "https://liff.chisoo.chiran.online",
-    "https://liff.line.me",
-    "http://localhost:3000",
-    "http://localhost:5173",  # Vite Dev
-    "http://localhost:5174",  # Vite Dev
-])
-
-# 註冊 API 和 LIFF Blueprint
-register_handlers(app)
-
-# 初始化資料庫
-init_db(app)
+from app.startup import startup_timer
+
+_app = None
+
+
+def create_app():
+    """
+    載入應用程式並完成啟動準備 (Blueprint 註冊、結構檢查、匹配矩陣補建、模型路由統計、權重結果預先計算)
+
+    只由 __main__、wsgi.py 與 app.async_app 呼叫，重複呼叫時沿用同一個 app。
+    模組層級不做任何初始化：圖片正規化的 spawn 工作程序會以 __mp_main__ 重新匯入本檔，
+    不應再連線資料庫、繪製雷達圖或匯入 LINE SDK
+    """
+    global _app
+    if _app is not None:
+        return _app
+
+    # 分段匯入以取得啟動耗時明細 (先匯入的階段會計入共用相依套件)
+    with startup_timer.stage("flask"):
+        from flask_cors import CORS
+
+    with startup_timer.stage("sqlalchemy + models"):
+        from app.models import init_db
+
+    with startup_timer.stage("line-bot-sdk"):
+        import linebot.v3.messaging
+        import linebot.v3.webhooks
+
+    with startup_timer.stage("app.main + services"):
+        from app.main import app
+        from app.handlers import register_handlers
+        from app.services.weight_service import WeightService
+
+    # 啟用 CORS (供 LIFF 前端呼叫)
+    CORS(app, origins=[
+        "https://liff-app-beige.vercel.app",
+        "https://liff.chisoo.chiran.online",
+        "https://liff.line.me",
+        "http://localhost:3000",
+        "http://localhost:5173",  # Vite Dev
+        "http://localhost:5174",  # Vite Dev
+    ])
+
+    # 註冊 API 和 LIFF Blueprint
+    with startup_timer.stage("register_handlers"):
+        register_handlers(app)
+
+    # 初始化資料庫 (結構指紋相符時略過 create_all)
+    with startup_timer.stage("schema check"):
+        init_db(app)
+
+    # 補建匹配矩陣中缺少的人物誌 (推薦分頁只讀矩陣，不在請求中寫入)
+    with startup_timer.stage("affinity backfill"):
+        from app.services.affinity_service import AffinityService
+        AffinityService.backfill_missing()
+
+    # 以近期 AI 紀錄初始化小 / 大模型路由統計 (未設定 OLLAMA_MODEL_SMALL 時略過)
+    with startup_timer.stage("model routing history"):
+        from app.services.model_router import model_router
+        model_router.load_history()
+
+    # 預先計算 Step 1 的 64 種結果並繪製雷達圖
+    with startup_timer.stage("weight outcomes"):
+        WeightService.precompute_outcomes()
+
+    _app = app
+    return app
+
 
 if __name__ == "__main__":
+    app = create_app()
+    from app.config import config
+
     config.print_status()
+    startup_timer.print_report()
     
     # 顯示已註冊的路由
     print("\n📋 已註冊的路由:")
@@ -40,4 +91,9 @@ if __name__ == "__main__":
         print(f"   {rule.methods} {rule.rule}")
     print()
     
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # 背景預載 Ollama 模型並依時段維持常駐
+    if config.OLLAMA_WARMUP:
+        from app.services.model_warmer import model_warmer
+        model_warmer.start()
+    
+    app.run(host="0.0.0.0", port=5000, debug=config.DEBUG)
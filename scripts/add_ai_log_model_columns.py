@@ -0,0 +1,44 @@
+# ============================================================
+# scripts/add_ai_log_model_columns.py - AI 紀錄模型欄位遷移腳本
+# 專案：Chi Soo 租屋小幫手
+# 說明：新增 ai_logs.model / latency_ms / escalated，供模型路由統計各模型的成功率與延遲
+#       (月分區表在主表新增欄位即會套用到所有分區)
+# 使用方式：python scripts/add_ai_log_model_columns.py
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, inspect
+
+from app.models import engine
+
+
+COLUMNS = [
+    ("model", "VARCHAR(100)"),
+    ("latency_ms", "INTEGER"),
+    ("escalated", "BOOLEAN DEFAULT FALSE"),
+]
+
+
+def add_columns():
+    """新增欄位 (已存在則跳過)"""
+    existing = {c["name"] for c in inspect(engine).get_columns("ai_logs")}
+
+    with engine.connect() as conn:
+        for column, column_type in COLUMNS:
+            if column in existing:
+                print(f"  ⏭️  ai_logs.{column} 已存在，跳過")
+                continue
+
+            print(f"  ➕ 新增欄位 ai_logs.{column}")
+            conn.execute(text(f"ALTER TABLE ai_logs ADD COLUMN {column} {column_type}"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    print("🔧 AI 紀錄模型欄位遷移")
+    add_columns()
@@ -0,0 +1,68 @@
+# ============================================================
+# scripts/add_feature_bits_columns.py - 設施位元集欄位遷移腳本
+# 專案：Chi Soo 租屋小幫手
+# 說明：新增 houses.feature_bits 與 personas.required_bits / bonus_bits，
+#       並以標準設施詞彙表回填既有資料
+# 使用方式：python scripts/add_feature_bits_columns.py
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, inspect
+
+from app.models import db_session, engine
+from app.models.house import House
+from app.models.persona import Persona
+
+
+COLUMNS = [
+    ("houses", "feature_bits"),
+    ("personas", "required_bits"),
+    ("personas", "bonus_bits"),
+]
+
+
+def add_columns():
+    """新增位元集欄位 (已存在則跳過)"""
+    inspector = inspect(engine)
+
+    with engine.connect() as conn:
+        for table, column in COLUMNS:
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column in existing:
+                print(f"  ⏭️  {table}.{column} 已存在，跳過")
+                continue
+
+            print(f"  ➕ 新增欄位 {table}.{column}")
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} BIGINT NOT NULL DEFAULT 0"))
+        conn.commit()
+
+
+def backfill():
+    """以標準設施詞彙表重新編碼所有房源與人物誌"""
+    unknown_names = set()
+
+    houses = db_session.query(House).all()
+    for house in houses:
+        unknown_names.update(house.refresh_feature_bits())
+
+    personas = db_session.query(Persona).all()
+    for persona in personas:
+        unknown_names.update(persona.refresh_feature_bits())
+
+    db_session.commit()
+    print(f"  ✅ 已回填 {len(houses)} 間房源、{len(personas)} 個人物誌")
+
+    if unknown_names:
+        print(f"  ⚠️ 無法辨識的設施名稱 (請補充至 feature_vocabulary.FEATURES)：{sorted(unknown_names)}")
+
+
+if __name__ == "__main__":
+    print("🔧 設施位元集遷移")
+    add_columns()
+    backfill()
+    db_session.remove()
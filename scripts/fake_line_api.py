@@ -0,0 +1,240 @@
+# ============================================================
+# scripts/fake_line_api.py - 本機 LINE Messaging API 替身
+# 專案：Chi Soo 租屋小幫手
+# 說明：實作機器人會呼叫的 reply / push / loading / profile 端點，
+#       記錄每次呼叫的內容與處理時間，可注入延遲與錯誤率；
+#       搭配 LINE_API_HOST 設定與 scripts/load_test.py 進行壓力測試
+# 使用方式：
+#   python scripts/fake_line_api.py --port 8089 --latency lognormal:-3.5,0.5
+#   LINE_API_HOST=http://localhost:8089 python run.py
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from scripts.fake_ollama import LatencyDistribution
+
+
+_PROFILE_PATH = re.compile(r"^/v2/bot/profile/([^/?]+)$")
+
+
+class FakeLineApi:
+    """
+    LINE Messaging API 替身伺服器
+
+    reply token 只能使用一次 (與正式環境相同，重複使用回傳 400)，
+    可藉此發現重複回覆的錯誤。
+
+    Args:
+        latency: 延遲分布字串 (見 LatencyDistribution)
+        error_rate: 回傳 HTTP 500 的機率
+        max_records: 保留的呼叫紀錄數上限
+        seed: 亂數種子
+    """
+
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0,
+                 max_records: int = 100_000, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._replies: dict[str, dict] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ---------- 生命週期 ----------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """於背景執行緒啟動，回傳 base URL (port=0 表示自動選擇)"""
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-line-api", daemon=True).start()
+        return self.base_url
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8089) -> None:
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ---------- 紀錄查詢 ----------
+
+    def records(self, since: float = 0.0) -> list[dict]:
+        """取得 since (time.time()) 之後的呼叫紀錄"""
+        with self._lock:
+            return [record for record in self._records if record["received_at"] >= since]
+
+    def reply_for(self, reply_token: str) -> Optional[dict]:
+        """取得某個 reply token 的回覆內容 (含 messages)"""
+        with self._lock:
+            return self._replies.get(reply_token)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._replies.clear()
+
+    def summary(self) -> dict:
+        """各端點的呼叫次數、錯誤數與平均處理時間"""
+        endpoints: dict[str, dict] = {}
+        for record in self.records():
+            item = endpoints.setdefault(record["endpoint"], {"calls": 0, "errors": 0, "total_ms": 0.0})
+            item["calls"] += 1
+            item["errors"] += record["status"] >= 400
+            item["total_ms"] += record["latency_ms"]
+        for item in endpoints.values():
+            item["avg_ms"] = round(item.pop("total_ms") / item["calls"], 2)
+        return endpoints
+
+    # ---------- HTTP ----------
+
+    def _record(self, endpoint: str, status: int, started: float, user_id: str = "",
+                reply_token: str = "", messages: int = 0) -> None:
+        with self._lock:
+            self._records.append({
+                "endpoint": endpoint,
+                "status": status,
+                "user_id": user_id,
+                "reply_token": reply_token,
+                "messages": messages,
+                "received_at": time.time(),
+                "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _json(self, status: int, body: dict) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("x-line-request-id", f"fake-{time.time_ns():x}")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _fail(self) -> bool:
+                time.sleep(fake.latency.sample())
+                if fake.rng.random() < fake.error_rate:
+                    self._json(500, {"message": "Internal server error (fake)"})
+                    return True
+                return False
+
+            def do_GET(self):
+                started = time.perf_counter()
+                if self.path == "/_fake/calls":
+                    self._json(200, {"summary": fake.summary(), "records": fake.records()[-200:]})
+                    return
+                match = _PROFILE_PATH.match(self.path)
+                if not match:
+                    self._json(404, {"message": "Not found"})
+                    return
+                if self._fail():
+                    fake._record("profile", 500, started, user_id=match.group(1))
+                    return
+                user_id = match.group(1)
+                self._json(200, {"userId": user_id, "displayName": f"壓測使用者 {user_id[-4:]}",
+                                 "pictureUrl": "https://example.com/avatar.png", "language": "zh-TW"})
+                fake._record("profile", 200, started, user_id=user_id)
+
+            def do_POST(self):
+                started = time.perf_counter()
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+                if self.path == "/_fake/reset":
+                    fake.reset()
+                    self._json(200, {})
+                    return
+
+                endpoint = {
+                    "/v2/bot/message/reply": "reply",
+                    "/v2/bot/message/push": "push",
+                    "/v2/bot/chat/loading/start": "loading",
+                }.get(self.path)
+                if endpoint is None:
+                    self._json(404, {"message": "Not found"})
+                    return
+
+                reply_token = body.get("replyToken", "")
+                user_id = body.get("to") or body.get("chatId", "")
+                messages = body.get("messages", [])
+
+                if self._fail():
+                    fake._record(endpoint, 500, started, user_id, reply_token, len(messages))
+                    return
+
+                if endpoint == "reply":
+                    with fake._lock:
+                        used = reply_token in fake._replies
+                        if not used:
+                            fake._replies[reply_token] = {"messages": messages, "received_at": time.time()}
+                    if used:
+                        self._json(400, {"message": "Invalid reply token"})
+                        fake._record(endpoint, 400, started, user_id, reply_token, len(messages))
+                        return
+                    self._json(200, {"sentMessages": [{"id": str(time.time_ns()), "quoteToken": "fake"}
+                                                      for _ in messages]})
+                elif endpoint == "push":
+                    self._json(200, {"sentMessages": [{"id": str(time.time_ns()), "quoteToken": "fake"}
+                                                      for _ in messages]})
+                else:
+                    self._json(202, {})
+                fake._record(endpoint, 200, started, user_id, reply_token, len(messages))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo 本機 LINE Messaging API 替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="lognormal:-3.5,0.5", help="延遲分布 (預設中位數約 30ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 機率 (0~1)")
+    parser.add_argument("--seed", type=int, help="亂數種子")
+    args = parser.parse_args()
+
+    fake = FakeLineApi(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    print("=" * 50)
+    print(" Chi Soo LINE Messaging API 替身")
+    print("=" * 50)
+    print(f" 🌐 http://{args.host}:{args.port}")
+    print(f" 📊 呼叫紀錄: GET /_fake/calls   重設: POST /_fake/reset")
+    print(f" 👉 LINE_API_HOST=http://{args.host}:{args.port}")
+    try:
+        fake.serve_forever(args.host, args.port)
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+
+
+if __name__ == "__main__":
+    main()
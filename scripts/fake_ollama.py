@@ -0,0 +1,577 @@
+# ============================================================
+# scripts/fake_ollama.py - 本機 Ollama 替身伺服器
+# 專案：Chi Soo 租屋小幫手
+# 說明：實作 OllamaService 使用的 /api/generate (串流與非串流) 與 /api/tags，
+#       依腳本回傳預錄回應 (含 <think> 區塊、格式錯誤的 JSON)，
+#       可設定延遲分布、錯誤率、同時處理上限與冷啟動，
+#       並模擬提示詞前綴快取 (prompt_eval_count 只計未命中的部分)，
+#       讓沒有 GPU 的機器也能量測對話流程的吞吐量與尾端延遲
+# 使用方式：
+#   python scripts/fake_ollama.py --port 11435 --latency lognormal:-0.5,0.6 --error-rate 0.02 --parallel 2
+#   OLLAMA_BASE_URL=http://localhost:11435 python run.py
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from app.config import config
+from app.services.ollama_service import OllamaService
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDED_RESPONSES = os.path.join(PROJECT_ROOT, "benchmarks", "data", "raw_responses.json")
+
+DEFAULT_MODELS = [config.OLLAMA_MODEL_4B]
+
+
+# ============================================================
+# 延遲分布
+# ============================================================
+
+class LatencyDistribution:
+    """
+    延遲分布 (秒)，格式為 "種類:參數"
+
+    - fixed:0.5              固定 0.5 秒
+    - uniform:0.2,1.5        均勻分布
+    - normal:0.8,0.2         常態分布 (平均, 標準差)，負值取 0
+    - lognormal:-0.5,0.6     對數常態 (mu, sigma)，長尾，最接近實際 LLM 延遲
+    - exponential:0.7        指數分布 (平均)
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, spec: str = "fixed:0", rng: Optional[random.Random] = None):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"不支援的延遲分布: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p] or [0.0]
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = self.rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = self.rng.lognormvariate(p[0], p[1])
+        else:
+            value = self.rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+# ============================================================
+# 回應腳本
+# ============================================================
+
+def _recorded_extractions() -> list[str]:
+    if os.path.exists(RECORDED_RESPONSES):
+        with open(RECORDED_RESPONSES, encoding="utf-8") as f:
+            return json.load(f)
+    return ['{"budget": 5000}']
+
+
+def default_script() -> dict:
+    """
+    內建腳本：依系統提示詞判斷用途
+
+    - 批次設施匹配 → 依提示詞中的人物誌代碼產生 matched_count
+    - 參數提取 → 依序回放錄製的原始回應 (含 <think>、markdown、壞掉的 JSON)
+    - 其他 (引導語) → 固定短句
+    """
+    return {
+        "rules": [
+            {"name": "feature_match", "match": {"system": "批次設施匹配|matched_count"},
+             "responses": [{"handler": "feature_match"}]},
+            {"name": "extract", "match": {"system": "資料提取員"},
+             "responses": _recorded_extractions()},
+            {"name": "guidance", "match": {},
+             "responses": ["<think>\n使用者答非所問\n</think>\n再看一次題目，告訴我你的想法吧！",
+                           "這題要回答喔，再說一次看看 😊"]},
+        ]
+    }
+
+
+def load_script(path: Optional[str]) -> dict:
+    """
+    載入腳本 JSON (未指定時使用內建腳本)
+
+    格式：
+    {"rules": [{"name": "...",
+                "match": {"system": "regex", "prompt": "regex", "model": "regex"},
+                "responses": ["字串" 或 {"handler": "feature_match" | "extract_fields"}],
+                "order": "cycle" | "random",
+                "latency": "uniform:0.2,1.0",   # 選填，覆寫全域延遲
+                "error_rate": 0.1}]}            # 選填，覆寫全域錯誤率
+    由上而下比對，第一個符合的規則生效
+    """
+    if not path:
+        return default_script()
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_PERSONA_LINE = re.compile(r"^- (\w+):", re.MULTILINE)
+
+
+def _feature_match_response(payload: dict, rng: random.Random) -> str:
+    persona_ids = _PERSONA_LINE.findall(payload.get("system", "")) or ["type_A"]
+    body = {pid: {"matched_count": rng.randint(0, 2)} for pid in persona_ids}
+    return f"<think>\n逐一比對 {len(persona_ids)} 種類型的設施\n</think>\n{json.dumps(body)}"
+
+
+# extract_fields 用的關鍵字 (欄位 -> [(regex, 值)]，先符合者優先)
+_FIELD_KEYWORDS = {
+    "location_pref": [(r"市區|夜市|機能|熱鬧", "downtown"), (r"學校|暨大|校門", "school"), (r"安靜|偏僻|清幽", "quiet")],
+    "type_pref": [(r"套房|獨立衛浴", "套房"), (r"雅房", "雅房"), (r"整層|合租|公寓", "整層")],
+    "management_pref": [(r"不.{0,3}房東|房東不", "no_owner"), (r"管理公司|專業管理", "pro"),
+                        (r"房東", "owner"), (r"都可以|沒差|無所謂", "none")],
+}
+_FEATURE_WORDS = ["洗衣機", "冷氣", "冰箱", "熱水器", "電梯", "子母車", "門禁", "監視器", "車位", "陽台", "網路"]
+_CHINESE_DIGITS = "一二三四五六七八九"
+_ALL_FIELDS = "請輸出訊息中提到的所有欄位"
+_EXAMPLE = re.compile(r"輸出範例[^\n]*\n(\{.*\})", re.DOTALL)
+
+
+def _extract_fields_response(payload: dict, rng: random.Random) -> str:
+    """
+    依使用者輸入的關鍵字產生參數提取結果
+
+    模擬照著提示詞作答的模型：提示詞要求輸出所有提到的欄位 (一次提取模式) 時輸出全部，
+    否則只輸出「輸出範例」中出現的欄位，使用者一次提到的其他主題不會被提取。
+    關鍵字比對不會漏提取，也不會多輸出未要求的欄位，表現優於真實模型
+    """
+    system = payload.get("system", "")
+    example = _EXAMPLE.search(system)
+    if _ALL_FIELDS in system:
+        fields = set(OllamaService.REQUIRED_FIELDS + OllamaService.OPTIONAL_FIELDS)
+    else:
+        fields = set(json.loads(example.group(1))) if example else set()
+    text = payload.get("prompt", "")
+
+    result = {}
+    budget = re.search(r"(\d{4,5})", text) or re.search(f"([{_CHINESE_DIGITS}])千", text)
+    if budget:
+        value = budget.group(1)
+        result["budget"] = int(value) if value.isdigit() else (_CHINESE_DIGITS.index(value) + 1) * 1000
+    for field, keywords in _FIELD_KEYWORDS.items():
+        for pattern, value in keywords:
+            if re.search(pattern, text):
+                result[field] = value
+                break
+    features = [word for word in _FEATURE_WORDS if word in text]
+    if features:
+        result["required_features"] = features
+        result["features_preference"] = "done"
+
+    body = {field: value for field, value in result.items() if field in fields}
+    return f"<think>\n逐欄比對使用者的回答\n</think>\n{json.dumps(body, ensure_ascii=False)}"
+
+
+HANDLERS = {"feature_match": _feature_match_response, "extract_fields": _extract_fields_response}
+
+
+# ============================================================
+# 伺服器
+# ============================================================
+
+class FakeOllama:
+    """
+    Ollama 替身伺服器
+
+    Args:
+        script: 回應腳本 (見 load_script)
+        latency: 全域延遲分布字串 (整段回應的總耗時)
+        error_rate: 回傳 HTTP 500 的機率
+        parallel: 同時處理的請求數 (對應 OLLAMA_NUM_PARALLEL)
+        max_queue: 等待中的請求上限，超過回傳 503 (對應 OLLAMA_MAX_QUEUE)
+        cold_start: 模型未載入時額外的載入秒數
+        keep_alive: 預設模型常駐秒數 (請求可用 keep_alive 覆寫)
+        ttft_ratio: 串流模式下首個 token 佔總延遲的比例
+        seed: 亂數種子 (固定後延遲與錯誤序列可重現)
+    """
+
+    def __init__(self, script: Optional[dict] = None, latency: str = "fixed:0", error_rate: float = 0.0,
+                 parallel: int = 4, max_queue: int = 512, cold_start: float = 0.0,
+                 keep_alive: float = 300.0, ttft_ratio: float = 0.3, models: Optional[list[str]] = None,
+                 seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.script = script or default_script()
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.error_rate = error_rate
+        self.max_queue = max_queue
+        self.cold_start = cold_start
+        self.keep_alive = keep_alive
+        self.ttft_ratio = ttft_ratio
+        self.models = models or DEFAULT_MODELS
+        self.parallel = max(1, parallel)
+
+        self._slots = threading.BoundedSemaphore(self.parallel)
+        self._lock = threading.Lock()
+        self._rule_latency = {}
+        self._cursors: dict[str, int] = {}
+        self._loaded_until: dict[str, float] = {}
+        self._prompt_cache: dict[str, list[str]] = {}  # 模型 -> 各平行槽上次的提示詞
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    # ---------- 生命週期 ----------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """於背景執行緒啟動，回傳 base URL (port=0 表示自動選擇)"""
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 11435) -> None:
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ---------- 統計 ----------
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {"requests": 0, "served": 0, "errors": 0, "rejected": 0,
+                          "aborted": 0, "inflight": 0, "queued": 0, "max_inflight": 0, "cold_loads": 0,
+                          "rules": {}}
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += delta
+            if key == "inflight":
+                self.stats["max_inflight"] = max(self.stats["max_inflight"], self.stats["inflight"])
+
+    # ---------- 回應 ----------
+
+    def choose(self, payload: dict) -> tuple[dict, str]:
+        """依腳本選出規則與回應內容"""
+        fields = {"system": payload.get("system", ""), "prompt": payload.get("prompt", ""),
+                  "model": payload.get("model", "")}
+        for index, rule in enumerate(self.script.get("rules", [])):
+            conditions = rule.get("match", {})
+            if all(re.search(pattern, fields.get(key, "")) for key, pattern in conditions.items()):
+                break
+        else:
+            return {"name": "empty"}, ""
+
+        name = rule.get("name", f"rule_{index}")
+        responses = rule.get("responses") or [""]
+        with self._lock:
+            if rule.get("order") == "random":
+                response = self.rng.choice(responses)
+            else:
+                cursor = self._cursors.get(name, 0)
+                self._cursors[name] = cursor + 1
+                response = responses[cursor % len(responses)]
+            self.stats["rules"][name] = self.stats["rules"].get(name, 0) + 1
+
+        if isinstance(response, dict):
+            response = HANDLERS[response["handler"]](payload, self.rng)
+        return rule, response
+
+    def rule_latency(self, rule: dict) -> LatencyDistribution:
+        spec = rule.get("latency")
+        if not spec:
+            return self.latency
+        if spec not in self._rule_latency:
+            self._rule_latency[spec] = LatencyDistribution(spec, self.rng)
+        return self._rule_latency[spec]
+
+    def load_model(self, model: str, keep_alive) -> float:
+        """模擬模型載入，回傳載入耗時 (秒)"""
+        now = time.monotonic()
+        keep = _parse_keep_alive(keep_alive, self.keep_alive)
+        with self._lock:
+            cold = self._loaded_until.get(model, 0) < now
+            self._loaded_until[model] = float("inf") if keep < 0 else now + keep
+            if cold:
+                self._prompt_cache.pop(model, None)
+            if cold and self.cold_start:
+                self.stats["cold_loads"] += 1
+        if cold and self.cold_start:
+            time.sleep(self.cold_start)
+            return self.cold_start
+        return 0.0
+
+    def preload(self, model: str, keep_alive) -> dict:
+        """空白請求：與 Ollama 相同只載入模型 (keep_alive=0 時卸載)，不產生回應"""
+        if _parse_keep_alive(keep_alive, self.keep_alive) == 0:
+            with self._lock:
+                self._loaded_until.pop(model, None)
+                self._prompt_cache.pop(model, None)
+            reason = "unload"
+        else:
+            self.load_model(model, keep_alive)
+            reason = "load"
+        return {"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": reason}
+
+    def is_loaded(self, model: str) -> bool:
+        with self._lock:
+            return self._loaded_until.get(model, 0) >= time.monotonic()
+
+    def evaluate_prompt(self, model: str, text: str) -> int:
+        """
+        模擬 Ollama 的前綴快取，回傳需重新評估的 token 數
+
+        每個平行槽保留上次的提示詞；選用共同前綴最長的槽，
+        都不相符時換掉最久未用的槽。模型卸載後快取清空
+        """
+        with self._lock:
+            slots = self._prompt_cache.setdefault(model, [])
+            best, shared = None, 0
+            for index, cached in enumerate(slots):
+                common = len(os.path.commonprefix([cached, text]))
+                if common > shared:
+                    best, shared = index, common
+            if best is not None:
+                slots.pop(best)
+            elif len(slots) >= self.parallel:
+                slots.pop(0)
+            slots.append(text)
+        return max(1, _token_count(text[shared:]))
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _json(self, status: int, body: dict) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._json(200, {"models": [
+                        {"name": name, "model": name, "modified_at": _now(), "size": 5_200_000_000,
+                         "digest": f"fake{abs(hash(name)):x}",
+                         "details": {"format": "gguf", "family": name.split(":")[0],
+                                     "parameter_size": name.split(":")[-1].upper(),
+                                     "quantization_level": "Q4_K_M"}}
+                        for name in fake.models
+                    ]})
+                elif self.path == "/_fake/stats":
+                    with fake._lock:
+                        self._json(200, json.loads(json.dumps(fake.stats)))
+                elif self.path in ("/", "/api/version"):
+                    self._json(200, {"version": "0.0.0-fake"})
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if self.path == "/_fake/reset":
+                    fake.reset_stats()
+                    self._json(200, {"ok": True})
+                    return
+                if self.path != "/api/generate":
+                    self._json(404, {"error": "not found"})
+                    return
+                try:
+                    payload = json.loads(raw or b"{}")
+                except json.JSONDecodeError:
+                    self._json(400, {"error": "invalid JSON"})
+                    return
+                if payload.get("model") not in fake.models:
+                    self._json(404, {"error": f"model '{payload.get('model')}' not found"})
+                    return
+                self.generate(payload)
+
+            def generate(self, payload: dict) -> None:
+                fake._count("requests")
+
+                # 佇列已滿：與 Ollama 相同回傳 503
+                with fake._lock:
+                    if fake.stats["queued"] >= fake.max_queue:
+                        fake.stats["rejected"] += 1
+                        rejected = True
+                    else:
+                        fake.stats["queued"] += 1
+                        rejected = False
+                if rejected:
+                    self._json(503, {"error": "server busy, please try again.  maximum pending requests exceeded"})
+                    return
+
+                fake._slots.acquire()
+                fake._count("queued", -1)
+                fake._count("inflight")
+                try:
+                    self._generate(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 用戶端逾時或中斷連線
+                    fake._count("aborted")
+                    self.close_connection = True
+                finally:
+                    fake._count("inflight", -1)
+                    fake._slots.release()
+
+            def _generate(self, payload: dict) -> None:
+                start = time.perf_counter()
+                model = payload["model"]
+                if not payload.get("prompt") and not payload.get("system"):
+                    body = fake.preload(model, payload.get("keep_alive"))
+                    fake._count("served")
+                    self._json(200, body)
+                    return
+                load_seconds = fake.load_model(model, payload.get("keep_alive"))
+                rule, text = fake.choose(payload)
+
+                error_rate = rule.get("error_rate", fake.error_rate)
+                if fake.rng.random() < error_rate:
+                    time.sleep(fake.rule_latency(rule).sample() * fake.ttft_ratio)
+                    fake._count("errors")
+                    self._json(500, {"error": "model runner has unexpectedly stopped (fake)"})
+                    return
+
+                latency = fake.rule_latency(rule).sample()
+                prompt_tokens = fake.evaluate_prompt(model, payload.get("system", "") + "\n" + payload.get("prompt", ""))
+                chunks = _chunks(text)
+
+                if payload.get("stream", True):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    time.sleep(latency * fake.ttft_ratio)
+                    per_chunk = latency * (1 - fake.ttft_ratio) / max(1, len(chunks))
+                    for chunk in chunks:
+                        self._write_chunk({"model": model, "created_at": _now(), "response": chunk, "done": False})
+                        time.sleep(per_chunk)
+                    # 先計數再送出最後一筆，用戶端收到完整回應時統計已更新
+                    fake._count("served")
+                    self._write_chunk(_final(model, "", start, load_seconds, prompt_tokens, len(chunks)))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    time.sleep(latency)
+                    fake._count("served")
+                    self._json(200, _final(model, text, start, load_seconds, prompt_tokens, len(chunks)))
+
+            def _write_chunk(self, body: dict) -> None:
+                data = (json.dumps(body, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _token_count(text: str) -> int:
+    """粗估 token 數 (中文約一字一 token，英數約四字元一 token)"""
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return (len(text) - ascii_chars) + ascii_chars // 4
+
+
+def _chunks(text: str, size: int = 4) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _parse_keep_alive(value, default: float) -> float:
+    """keep_alive 可為秒數或 "5m" / "1h" / "-1" 字串"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return default
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def _final(model: str, text: str, start: float, load_seconds: float, prompt_tokens: int, eval_tokens: int) -> dict:
+    """Ollama 最後一筆回應的統計欄位 (時間單位為奈秒)"""
+    total = time.perf_counter() - start
+    return {
+        "model": model,
+        "created_at": _now(),
+        "response": text,
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": int(total * 1e9),
+        "load_duration": int(load_seconds * 1e9),
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int(prompt_tokens * 2e5),
+        "eval_count": eval_tokens,
+        "eval_duration": int(max(0.0, total - load_seconds) * 1e9),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo 本機 Ollama 替身伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--script", help="回應腳本 JSON (預設使用內建腳本與錄製回應)")
+    parser.add_argument("--latency", default="lognormal:-0.5,0.6",
+                        help="延遲分布，如 fixed:0.5 / uniform:0.2,1.5 / normal:0.8,0.2 / lognormal:-0.5,0.6")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 機率 (0~1)")
+    parser.add_argument("--parallel", type=int, default=1, help="同時處理的請求數 (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-queue", type=int, default=512, help="等待上限，超過回傳 503")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="模型未載入時的載入秒數")
+    parser.add_argument("--keep-alive", type=float, default=300.0, help="模型常駐秒數")
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS), help="/api/tags 回報的模型 (逗號分隔)")
+    parser.add_argument("--seed", type=int, help="亂數種子")
+    args = parser.parse_args()
+
+    fake = FakeOllama(
+        script=load_script(args.script), latency=args.latency, error_rate=args.error_rate,
+        parallel=args.parallel, max_queue=args.max_queue, cold_start=args.cold_start,
+        keep_alive=args.keep_alive, models=[m for m in args.models.split(",") if m], seed=args.seed,
+    )
+    print("=" * 50)
+    print(" Chi Soo Ollama 替身伺服器")
+    print("=" * 50)
+    print(f" 🌐 http://{args.host}:{args.port}")
+    print(f" ⏱️  延遲 {args.latency}、錯誤率 {args.error_rate}、並行 {args.parallel}、佇列 {args.max_queue}")
+    print(f" 📊 統計: GET /_fake/stats   重設: POST /_fake/reset")
+    print(f" 👉 OLLAMA_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        fake.serve_forever(args.host, args.port)
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+
+
+if __name__ == "__main__":
+    main()
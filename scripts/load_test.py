@@ -0,0 +1,384 @@
+# ============================================================
+# scripts/load_test.py - Webhook 壓力 / 浸泡測試
+# 專案：Chi Soo 租屋小幫手
+# 說明：以帶有效 X-Line-Signature 的事件重播完整使用者旅程：
+#       加好友 → 6 題權重 → Step 2 問答 → 開始分析 → 取得結果
+#       → 推薦房源 → 下一頁 → 收藏 → 我的收藏
+#       內建 LINE Messaging API 替身接收 reply / push，
+#       報告 events/sec、各步驟 p50/p95/p99，以及每趟旅程的 DB / LLM 呼叫數
+# 使用方式：
+#   1. python scripts/fake_ollama.py --port 11435
+#   2. LINE_API_HOST=http://127.0.0.1:8089 OLLAMA_BASE_URL=http://127.0.0.1:11435 python run.py
+#   3. python scripts/load_test.py --target http://127.0.0.1:5000 --line-port 8089 --users 20 --journeys 200
+#      浸泡測試：python scripts/load_test.py --users 20 --duration 1800 --window 60
+#      單一程序：python scripts/load_test.py --in-process --journeys 5 (使用 DATABASE_URL 指定的資料庫)
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+
+from scripts.fake_line_api import FakeLineApi
+
+
+# Step 2 問答 (依序回答預算、地點、房型、管理、設施)
+STEP2_ANSWERS = ["預算大概五千", "想住學校附近", "套房", "不想跟房東住", "要有洗衣機跟電梯"]
+MAX_STEP2_TURNS = 12
+# 權重測驗的選擇 (第 i 題)
+WEIGHT_CHOICES = ["B", "A", "A", "B", "B", "B"]
+
+_PERSONA = re.compile(r"action=show_recommendations&persona=(\w+)")
+_HOUSE = re.compile(r"action=add_favorite&house_id=(\d+)")
+_METRIC_LINE = re.compile(r"^(\w+)(?:\{[^}]*\})? ([0-9.eE+-]+)$")
+
+# 從 /metrics 取得的每趟旅程計數 (計數指標名稱 -> 報告欄位)
+JOURNEY_COUNTERS = {
+    "chisoo_db_query_seconds_count": "db_queries",
+    "chisoo_ollama_request_seconds_count": "llm_calls",
+}
+
+
+# ============================================================
+# Webhook 事件
+# ============================================================
+
+def sign(body: bytes, channel_secret: str) -> str:
+    """計算 X-Line-Signature (HMAC-SHA256 + Base64)"""
+    digest = hmac.new(channel_secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def make_event(user_id: str, kind: str, text: str = "", data: str = "") -> dict:
+    """建立單一 webhook 事件 (格式同 LINE 平台送出的事件)"""
+    event = {
+        "type": kind,
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": {"type": "user", "userId": user_id},
+        "webhookEventId": uuid.uuid4().hex.upper()[:26],
+        "deliveryContext": {"isRedelivery": False},
+        "replyToken": uuid.uuid4().hex,
+    }
+    if kind == "message":
+        event["message"] = {"id": str(time.time_ns()), "type": "text", "quoteToken": uuid.uuid4().hex, "text": text}
+    elif kind == "postback":
+        event["postback"] = {"data": data}
+    elif kind == "follow":
+        event["follow"] = {"isUnblocked": False}
+    return event
+
+
+# ============================================================
+# 統計
+# ============================================================
+
+def percentile(values: list[float], q: float) -> float:
+    """最近秩百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """執行緒安全的步驟耗時紀錄"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.timeline: list[tuple[float, float]] = []  # (完成時間, 耗時)
+        self.journeys = 0
+        self.failed_journeys = 0
+
+    def add(self, step: str, seconds: float, ok: bool, event: bool = True) -> None:
+        with self._lock:
+            self.samples[step].append(seconds)
+            if event:
+                self.timeline.append((time.time(), seconds))
+            if not ok:
+                self.errors[step] += 1
+
+    def finish(self, ok: bool) -> None:
+        with self._lock:
+            self.journeys += 1
+            self.failed_journeys += not ok
+
+
+def scrape_counters(target: str) -> dict[str, float]:
+    """讀取 /metrics 中各計數的總和"""
+    totals = {name: 0.0 for name in JOURNEY_COUNTERS}
+    try:
+        text = requests.get(f"{target}/metrics", timeout=10).text
+    except requests.RequestException:
+        return totals
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match and match.group(1) in totals:
+            totals[match.group(1)] += float(match.group(2))
+    return totals
+
+
+# ============================================================
+# 旅程
+# ============================================================
+
+class Journey:
+    """一位虛擬使用者的完整旅程"""
+
+    def __init__(self, target: str, secret: str, line_api: FakeLineApi, recorder: Recorder,
+                 think_time: float = 0.0, result_timeout: float = 30.0):
+        self.target = target
+        self.secret = secret
+        self.line_api = line_api
+        self.recorder = recorder
+        self.think_time = think_time
+        self.result_timeout = result_timeout
+        self.http = requests.Session()
+        self.user_id = "U" + uuid.uuid4().hex
+        self.ok = True
+
+    def send(self, step: str, kind: str, text: str = "", data: str = "") -> Optional[dict]:
+        """送出一個事件並記錄耗時，回傳機器人的回覆內容"""
+        event = make_event(self.user_id, kind, text, data)
+        body = json.dumps({"destination": "Uloadtest", "events": [event]}, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json", "X-Line-Signature": sign(body, self.secret)}
+
+        start = time.perf_counter()
+        try:
+            response = self.http.post(f"{self.target}/callback", data=body, headers=headers, timeout=60)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        self.recorder.add(step, time.perf_counter() - start, ok)
+        self.ok = self.ok and ok
+
+        if self.think_time:
+            time.sleep(self.think_time)
+        return self.line_api.reply_for(event["replyToken"])
+
+    def run(self) -> None:
+        self.send("follow", "follow")
+        self.send("start_test", "postback", data="action=start_test")
+        for index, choice in enumerate(WEIGHT_CHOICES, start=1):
+            self.send("weight_answer", "postback", data=f"action=answer_weight&q={index}&choice={choice}")
+        # AI 追問次數不固定：持續回答直到機器人提示輸入「開始分析」
+        for attempt in range(MAX_STEP2_TURNS):
+            reply = self.send("step2_answer", "message", text=STEP2_ANSWERS[attempt % len(STEP2_ANSWERS)])
+            if "開始分析" in json.dumps(reply or {}, ensure_ascii=False):
+                break
+        self.send("start_analysis", "message", text="開始分析")
+
+        # 分析在背景執行，輪詢結果直到出現診斷書
+        persona_id = None
+        start = time.perf_counter()
+        while time.perf_counter() - start < self.result_timeout:
+            reply = self.send("get_result", "postback", data="action=get_result")
+            match = _PERSONA.search(json.dumps(reply or {}))
+            if match:
+                persona_id = match.group(1)
+                break
+            time.sleep(0.5)
+        self.recorder.add("analysis_ready", time.perf_counter() - start, persona_id is not None, event=False)
+        if not persona_id:
+            self.recorder.finish(False)
+            return
+
+        reply = self.send("recommendations", "postback", data=f"action=show_recommendations&persona={persona_id}")
+        house_ids = _HOUSE.findall(json.dumps(reply or {}))
+        self.send("more_houses", "postback", data=f"action=show_more_houses&persona={persona_id}&offset=5")
+        if house_ids:
+            self.send("add_favorite", "postback", data=f"action=add_favorite&house_id={house_ids[0]}")
+        self.send("show_favorites", "postback", data="action=show_fav")
+        self.recorder.finish(self.ok)
+
+
+# ============================================================
+# 執行與報告
+# ============================================================
+
+def run_load(target: str, secret: str, line_api: FakeLineApi, users: int = 10, journeys: int = 50,
+             duration: float = 0.0, think_time: float = 0.0, result_timeout: float = 30.0) -> tuple[Recorder, float]:
+    """
+    以 users 個並行使用者執行旅程
+
+    duration > 0 時為浸泡測試：持續執行到時間結束；否則執行 journeys 趟
+    """
+    recorder = Recorder()
+    lock = threading.Lock()
+    remaining = [journeys]
+    deadline = time.time() + duration if duration else None
+
+    def worker():
+        while True:
+            if deadline:
+                if time.time() >= deadline:
+                    return
+            else:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            try:
+                Journey(target, secret, line_api, recorder, think_time, result_timeout).run()
+            except Exception as e:
+                print(f"⚠️ 旅程失敗: {e}")
+                recorder.finish(False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for _ in range(users):
+            pool.submit(worker)
+    return recorder, time.perf_counter() - start
+
+
+def build_report(recorder: Recorder, elapsed: float, before: dict, after: dict,
+                 line_api: FakeLineApi, window: float = 0.0) -> dict:
+    events = sum(len(samples) for step, samples in recorder.samples.items() if step != "analysis_ready")
+    completed = max(1, recorder.journeys)
+
+    steps = {}
+    for step, samples in recorder.samples.items():
+        steps[step] = {
+            "count": len(samples),
+            "errors": recorder.errors.get(step, 0),
+            "p50_ms": round(percentile(samples, 50) * 1000, 1),
+            "p95_ms": round(percentile(samples, 95) * 1000, 1),
+            "p99_ms": round(percentile(samples, 99) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+
+    per_journey = {
+        field: round((after.get(name, 0) - before.get(name, 0)) / completed, 1)
+        for name, field in JOURNEY_COUNTERS.items()
+    }
+    line_summary = line_api.summary()
+    per_journey["line_api_calls"] = round(sum(item["calls"] for item in line_summary.values()) / completed, 1)
+
+    report = {
+        "journeys": recorder.journeys,
+        "failed_journeys": recorder.failed_journeys,
+        "events": events,
+        "elapsed_s": round(elapsed, 2),
+        "events_per_sec": round(events / elapsed, 2) if elapsed else 0.0,
+        "steps": steps,
+        "per_journey": per_journey,
+        "line_api": line_summary,
+    }
+
+    # 浸泡測試：依時間窗觀察吞吐量與 p95 是否隨時間劣化
+    if window and recorder.timeline:
+        first = min(done for done, _ in recorder.timeline)
+        buckets: dict[int, list[float]] = defaultdict(list)
+        for done, seconds in recorder.timeline:
+            buckets[int((done - first) // window)].append(seconds)
+        report["windows"] = [
+            {"start_s": int(index * window), "events_per_sec": round(len(samples) / window, 2),
+             "p95_ms": round(percentile(samples, 95) * 1000, 1)}
+            for index, samples in sorted(buckets.items())
+        ]
+    return report
+
+
+def print_report(report: dict) -> None:
+    print("\n" + "=" * 72)
+    print(f" 🧾 旅程 {report['journeys']} 趟 (失敗 {report['failed_journeys']})，"
+          f"事件 {report['events']} 筆，{report['elapsed_s']} 秒")
+    print(f" 🚀 {report['events_per_sec']} events/sec")
+    print("=" * 72)
+    print(f" {'步驟':<18}{'次數':>8}{'錯誤':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, item in report["steps"].items():
+        print(f" {step:<20}{item['count']:>8}{item['errors']:>6}{item['p50_ms']:>10}"
+              f"{item['p95_ms']:>10}{item['p99_ms']:>10}{item['max_ms']:>10}")
+    per_journey = report["per_journey"]
+    print(f"\n 📊 每趟旅程：DB 查詢 {per_journey['db_queries']}、LLM 呼叫 {per_journey['llm_calls']}、"
+          f"LINE API {per_journey['line_api_calls']}")
+    for endpoint, item in report["line_api"].items():
+        print(f"    📨 {endpoint:<10} {item['calls']:>6} 次  錯誤 {item['errors']}  平均 {item['avg_ms']} ms")
+    for item in report.get("windows", []):
+        print(f"    ⏱️  +{item['start_s']:>5}s  {item['events_per_sec']:>8} ev/s  p95 {item['p95_ms']} ms")
+
+
+def start_in_process_bot(line_api_url: str) -> tuple[str, object]:
+    """在同一程序內以多執行緒 WSGI 伺服器啟動機器人 (使用 DATABASE_URL 的資料庫)"""
+    from werkzeug.serving import make_server
+    from linebot.v3.messaging import Configuration
+
+    import app.main as main
+    from app.handlers import register_handlers
+    from app.models import init_db
+
+    main.configuration = Configuration(access_token=main.config.LINE_CHANNEL_ACCESS_TOKEN, host=line_api_url)
+    if "api.health_check" not in main.app.view_functions:
+        register_handlers(main.app)
+        init_db(main.app)
+    server = make_server("127.0.0.1", 0, main.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-test-bot", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chi Soo Webhook 壓力 / 浸泡測試")
+    parser.add_argument("--target", default="http://127.0.0.1:5000", help="機器人網址")
+    parser.add_argument("--secret", help="Channel Secret (預設讀取 LINE_CHANNEL_SECRET)")
+    parser.add_argument("--line-port", type=int, default=8089, help="LINE API 替身埠號 (機器人的 LINE_API_HOST)")
+    parser.add_argument("--line-latency", default="lognormal:-3.5,0.5", help="LINE API 替身延遲分布")
+    parser.add_argument("--users", type=int, default=10, help="並行使用者數")
+    parser.add_argument("--journeys", type=int, default=50, help="旅程總數 (未指定 --duration 時)")
+    parser.add_argument("--duration", type=float, default=0.0, help="浸泡測試秒數")
+    parser.add_argument("--window", type=float, default=60.0, help="浸泡測試的統計時間窗 (秒)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="每個事件之間的停頓秒數")
+    parser.add_argument("--result-timeout", type=float, default=30.0, help="等待分析結果的上限秒數")
+    parser.add_argument("--in-process", action="store_true", help="在本程序內啟動機器人")
+    parser.add_argument("--output", help="報告 JSON 輸出路徑")
+    args = parser.parse_args()
+
+    from app.config import config
+
+    line_api = FakeLineApi(latency=args.line_latency)
+    line_url = line_api.start(port=0 if args.in_process else args.line_port)
+    target = args.target
+    if args.in_process:
+        target, _ = start_in_process_bot(line_url)
+
+    print("🏋️ Chi Soo Webhook 壓力測試")
+    print(f"   目標 {target}，LINE API 替身 {line_url}，並行 {args.users}，"
+          + (f"持續 {args.duration} 秒" if args.duration else f"{args.journeys} 趟"))
+
+    before = scrape_counters(target)
+    recorder, elapsed = run_load(
+        target, args.secret if args.secret is not None else config.LINE_CHANNEL_SECRET, line_api,
+        users=args.users, journeys=args.journeys, duration=args.duration,
+        think_time=args.think_time, result_timeout=args.result_timeout,
+    )
+    after = scrape_counters(target)
+
+    report = build_report(recorder, elapsed, before, after, line_api, args.window if args.duration else 0.0)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 報告已寫入 {args.output}")
+    line_api.stop()
+
+
+if __name__ == "__main__":
+    main()
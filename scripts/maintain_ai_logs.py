@@ -0,0 +1,104 @@
+# ============================================================
+# scripts/maintain_ai_logs.py - AI 紀錄分區維護腳本
+# 專案：Chi Soo 租屋小幫手
+# 說明：1. (僅 PostgreSQL，首次執行) 將 ai_logs 轉為依 created_at 的月分區表
+#       2. 預先建立未來月份的分區
+#       3. 彙總尚未彙總的完整日到 ai_log_daily_summaries
+#       4. 依 AI_LOG_RETENTION_MONTHS 刪除過期分區 / 紀錄
+#       可重複執行，建議每日排程 (cron) 一次
+# 使用方式：python scripts/maintain_ai_logs.py
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from sqlalchemy import text
+
+from app.config import config
+from app.models import Base, db_session, engine
+from app.models.ai_log_summary import AILogDailySummary
+from app.services.ai_log_retention import (
+    AILogRetentionService, DEFAULT_PARTITION, add_months, month_start
+)
+
+
+def convert_to_partitioned():
+    """
+    將一般的 ai_logs 資料表轉為月分區表 (單一交易，失敗會整個回滾)
+
+    分區表的主鍵必須包含分區欄位，因此主鍵改為 (id, created_at)；
+    id 沿用原本的序列，ORM 端不需修改。
+    """
+    print("  🔄 轉換 ai_logs 為月分區表")
+
+    # 舊表的索引改名，避免與新表的索引名稱衝突
+    index_names = db_session.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'ai_logs'"
+    )).scalars().all()
+    db_session.execute(text("ALTER TABLE ai_logs RENAME TO ai_logs_legacy"))
+    for name in index_names:
+        db_session.execute(text(f"ALTER INDEX {name} RENAME TO {name}_legacy"))
+
+    # 序列與舊表解除綁定，刪除舊表時才不會一起被刪
+    db_session.execute(text("ALTER SEQUENCE ai_logs_id_seq OWNED BY NONE"))
+    db_session.execute(text("UPDATE ai_logs_legacy SET created_at = NOW() WHERE created_at IS NULL"))
+
+    db_session.execute(text(
+        "CREATE TABLE ai_logs (LIKE ai_logs_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    db_session.execute(text("ALTER TABLE ai_logs ALTER COLUMN created_at SET NOT NULL"))
+    db_session.execute(text("ALTER TABLE ai_logs ADD PRIMARY KEY (id, created_at)"))
+    db_session.execute(text(
+        "ALTER TABLE ai_logs ADD FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE"
+    ))
+    db_session.execute(text("CREATE INDEX ix_ai_logs_user_id ON ai_logs (user_id)"))
+    db_session.execute(text("CREATE INDEX ix_ai_logs_created_at ON ai_logs (created_at)"))
+
+    # 建立涵蓋既有資料的月分區，以及接住範圍外資料的預設分區
+    first_log = db_session.execute(text("SELECT MIN(created_at) FROM ai_logs_legacy")).scalar()
+    month = month_start((first_log or datetime.utcnow()).date())
+    current = month_start(datetime.utcnow().date())
+    while month <= current:
+        AILogRetentionService.create_partition(month)
+        month = add_months(month, 1)
+    db_session.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF ai_logs DEFAULT"))
+
+    copied = db_session.execute(text("INSERT INTO ai_logs SELECT * FROM ai_logs_legacy")).rowcount
+    db_session.execute(text("ALTER SEQUENCE ai_logs_id_seq OWNED BY ai_logs.id"))
+    db_session.execute(text("DROP TABLE ai_logs_legacy"))
+    db_session.commit()
+    print(f"  ✅ 已搬移 {copied} 筆紀錄")
+
+
+def main():
+    print("🗂️ AI 紀錄分區維護")
+    Base.metadata.create_all(bind=engine, tables=[AILogDailySummary.__table__])
+
+    if engine.dialect.name == "postgresql":
+        if not AILogRetentionService.is_partitioned():
+            convert_to_partitioned()
+        AILogRetentionService.ensure_partitions()
+    else:
+        print(f"  ⏭️  {engine.dialect.name} 不支援宣告式分區，改以 DELETE 執行保留期限")
+
+    summarized = AILogRetentionService.rollup_pending()
+    print(f"  📊 已彙總 {summarized} 筆每日統計")
+
+    removed = AILogRetentionService.apply_retention()
+    print(f"  🧹 保留 {config.AI_LOG_RETENTION_MONTHS} 個月，已清除 {removed} "
+          f"{'個分區' if AILogRetentionService.is_partitioned() else '筆紀錄'}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        db_session.rollback()
+        print(f"❌ 維護失敗: {e}")
+        raise
+    finally:
+        db_session.remove()
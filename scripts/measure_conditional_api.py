@@ -0,0 +1,84 @@
+# ============================================================
+# scripts/measure_conditional_api.py - 條件式請求效益量測
+# 專案：Chi Soo 租屋小幫手
+# 說明：比較 LIFF 讀取 API 在「首次載入」與「重複造訪 (If-None-Match)」
+#       時的回應大小、延遲與 CPU 時間
+# 使用方式：python scripts/measure_conditional_api.py [次數] [使用者ID]
+# ============================================================
+
+import sys
+import os
+import time
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from app.models import db_session
+from app.models.favorite import Favorite
+from app.models.house import House
+from app.handlers.api import api_bp
+
+
+def measure(client, url: str, headers: dict, rounds: int) -> dict:
+    """重複請求並統計平均大小、延遲與 CPU 時間"""
+    total_bytes = 0
+    status = None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    for _ in range(rounds):
+        response = client.get(url, headers=headers)
+        total_bytes += len(response.data)
+        status = response.status_code
+
+    return {
+        "status": status,
+        "bytes": total_bytes / rounds,
+        "ms": (time.perf_counter() - wall_start) * 1000 / rounds,
+        "cpu_ms": (time.process_time() - cpu_start) * 1000 / rounds
+    }
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    user_id = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if not user_id:
+        favorite = db_session.query(Favorite).first()
+        user_id = favorite.user_id if favorite else None
+
+    house = db_session.query(House).filter(House.is_active == True).first()
+
+    app = Flask(__name__)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    client = app.test_client()
+
+    targets = [("/api/houses?limit=20", {})]
+    if house:
+        targets.append((f"/api/houses/{house.house_id}", {}))
+    if user_id:
+        targets.append(("/api/favorites", {"X-User-Id": user_id}))
+
+    print(f"📏 條件式請求量測 (每項 {rounds} 次)\n")
+    print(f"{'端點':<28}{'模式':<8}{'狀態':>6}{'大小(B)':>10}{'延遲(ms)':>11}{'CPU(ms)':>10}")
+
+    for url, headers in targets:
+        etag = client.get(url, headers=headers).headers.get("ETag")
+        full = measure(client, url, headers, rounds)
+        cached = measure(client, url, {**headers, "If-None-Match": etag}, rounds)
+
+        for mode, result in (("首次", full), ("重複", cached)):
+            print(f"{url:<28}{mode:<8}{result['status']:>6}{result['bytes']:>10.0f}"
+                  f"{result['ms']:>11.2f}{result['cpu_ms']:>10.2f}")
+
+        saved_bytes = 1 - cached["bytes"] / full["bytes"] if full["bytes"] else 0
+        saved_cpu = 1 - cached["cpu_ms"] / full["cpu_ms"] if full["cpu_ms"] else 0
+        print(f"{'':<28}✅ 節省頻寬 {saved_bytes:.0%}，CPU {saved_cpu:.0%}\n")
+
+    db_session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -138,6 +138,7 @@ def seed_personas():
             continue
         
         persona = Persona(**data)
+        persona.refresh_feature_bits()
         db_session.add(persona)
         print(f"  ✅ 新增 {data['name']}")
     
@@ -330,6 +331,7 @@ def seed_sample_houses():
             continue
         
         house = House(**data)
+        house.refresh_feature_bits()
         db_session.add(house)
         print(f"  ✅ 新增 {data['name']}")
     
@@ -353,6 +355,10 @@ def main():
     seed_personas()
     seed_sample_houses()
     
+    # 建立人物誌 × 房源匹配矩陣
+    from app.services.affinity_service import AffinityService
+    AffinityService.rebuild_all()
+    
     print("=" * 50)
     print("🎉 所有種子資料初始化完成！")
     print("=" * 50)
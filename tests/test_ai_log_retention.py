@@ -0,0 +1,82 @@
+import sys
+import os
+import unittest
+from datetime import date, datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session
+from app.models.ai_log import AILog
+from app.models.ai_log_summary import AILogDailySummary
+from app.models.user import User
+from app.services.ai_log_retention import AILogRetentionService, add_months
+import admin_panel
+
+
+class TestAILogRetention(unittest.TestCase):
+
+    def setUp(self):
+        # 使用獨立的 SQLite 記憶體資料庫
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        db_session.remove()
+        db_session.configure(bind=self.engine)
+
+        db_session.add(User(user_id="U_log"))
+        logs = [
+            # (時間, 主題, 原始回應, 是否成功)
+            (datetime(2025, 1, 10, 9), "budget", "{'budget_max': 6000}", True),
+            (datetime(2025, 1, 10, 10), "budget", "[規則解析] {'budget_max': 5000}", True),
+            (datetime(2025, 1, 10, 11), "budget", "[引導] 請告訴我預算", False),
+            (datetime(2025, 1, 11, 9), None, "{'room_type': '套房'}", True),
+            (datetime(2025, 6, 1, 9), "budget", "{'budget_max': 7000}", True),
+        ]
+        for created_at, topic, raw, ok in logs:
+            db_session.add(AILog(user_id="U_log", topic=topic, ai_raw_response=raw,
+                                 is_success=ok, created_at=created_at))
+        db_session.commit()
+
+    def tearDown(self):
+        db_session.remove()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_rollup_counts_sources_per_topic(self):
+        """每日彙總依主題區分 LLM / 規則 / 引導"""
+        AILogRetentionService.rollup_pending(today=date(2025, 6, 2))
+
+        summary = db_session.query(AILogDailySummary).filter_by(day=date(2025, 1, 10), topic="budget").one()
+        self.assertEqual((summary.attempts, summary.successes), (3, 2))
+        self.assertEqual((summary.llm_count, summary.rule_count, summary.guidance_count), (1, 1, 1))
+        self.assertIsNotNone(db_session.query(AILogDailySummary).filter_by(topic="unknown").first())
+
+        # 重複執行不應重複彙總
+        self.assertEqual(AILogRetentionService.rollup_pending(today=date(2025, 6, 2)), 0)
+        self.assertEqual(db_session.query(AILogDailySummary).count(), 3)
+
+    def test_retention_rolls_up_before_deleting(self):
+        """過期紀錄先彙總再刪除，未過期紀錄保留"""
+        deleted = AILogRetentionService.apply_retention(months=3, today=date(2025, 6, 15))
+
+        self.assertEqual(deleted, 4)
+        self.assertEqual(db_session.query(AILog).count(), 1)
+        self.assertEqual(db_session.query(AILogDailySummary).filter(
+            AILogDailySummary.day < date(2025, 2, 1)
+        ).count(), 2)
+
+    def test_admin_chart_page(self):
+        """後台圖表頁只讀彙總表：瀏覽頁面不會觸發彙總寫入"""
+        response = admin_panel.app.test_client().get("/ai-stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(db_session.query(AILogDailySummary).count(), 0)
+
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2025, 1, 1), -3), date(2024, 10, 1))
+        self.assertEqual(add_months(date(2025, 11, 1), 2), date(2026, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.ai_log import AILog
+from app.models.user import User
+from app.services.ai_log_writer import AILogWriter
+
+
+class TestAILogWriter(unittest.TestCase):
+
+    def setUp(self):
+        # 使用獨立的 SQLite 記憶體資料庫 (寫入器在背景執行緒使用)
+        self.engine = create_engine(
+            "sqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        session = self.Session()
+        session.add(User(user_id="U_log"))
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _log_count(self) -> int:
+        session = self.Session()
+        try:
+            return session.query(AILog).count()
+        finally:
+            session.close()
+
+    def _wait_for(self, writer, written, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while writer.stats["written"] < written and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _enqueue(self, writer, count):
+        for i in range(count):
+            self.assertTrue(writer.enqueue(user_id="U_log", topic="budget", user_input=f"#{i}", is_success=True))
+
+    def test_flushes_every_n_rows(self):
+        """累積到 batch_size 筆時立即寫入"""
+        writer = AILogWriter(batch_size=3, flush_interval_ms=60000, session_factory=self.Session)
+        self._enqueue(writer, 7)
+
+        self._wait_for(writer, 6)
+        self.assertEqual(self._log_count(), 6)
+
+        # 剩下 1 筆在關閉時寫入
+        writer.close()
+        self.assertEqual(self._log_count(), 7)
+        self.assertEqual(writer.stats, {"written": 7, "dropped": 0, "failed": 0})
+
+    def test_flushes_after_interval(self):
+        """未滿 batch_size 時，超過 flush_interval 也會寫入"""
+        writer = AILogWriter(batch_size=100, flush_interval_ms=50, session_factory=self.Session)
+        self._enqueue(writer, 2)
+
+        self._wait_for(writer, 2)
+        self.assertEqual(self._log_count(), 2)
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
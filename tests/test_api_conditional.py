@@ -0,0 +1,78 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session
+from app.models.house import House
+from app.models.user import User
+from app.models.favorite import Favorite
+from app.handlers.api import api_bp
+
+
+class TestApiConditional(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 使用獨立的 SQLite 記憶體資料庫
+        cls.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=cls.engine)
+        db_session.remove()
+        db_session.configure(bind=cls.engine)
+
+        for i in range(5):
+            db_session.add(House(name=f"House {i}", rent=5000 + i * 100, avg_rating=4.0))
+        db_session.add(User(user_id="U_test"))
+        db_session.commit()
+        db_session.add(Favorite(user_id="U_test", house_id=1))
+        db_session.commit()
+
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        db_session.remove()
+        Base.metadata.drop_all(bind=cls.engine)
+
+    def _assert_revalidates(self, url, headers=None):
+        """第一次回傳完整內容與 ETag，帶 If-None-Match 時回傳空的 304"""
+        first = self.client.get(url, headers=headers)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        second = self.client.get(url, headers={**(headers or {}), "If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b"")
+        return etag
+
+    def test_endpoints_return_304_when_unchanged(self):
+        """房源列表、詳情與收藏在資料未變更時回傳 304"""
+        self._assert_revalidates("/api/houses")
+        self._assert_revalidates("/api/houses/1")
+        self._assert_revalidates("/api/favorites", headers={"X-User-Id": "U_test"})
+
+    def test_etag_changes_after_update(self):
+        """房源異動後舊 ETag 失效"""
+        etag = self._assert_revalidates("/api/houses/2")
+
+        house = db_session.query(House).filter_by(house_id=2).first()
+        house.update_rating(4.5, 3)
+        db_session.commit()
+
+        response = self.client.get("/api/houses/2", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_json()["avg_rating"], 4.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import sys
+import os
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiohttp import FormData
+from aiohttp.test_utils import TestClient, TestServer
+from linebot.v3.messaging import Configuration
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.async_app import create_app
+from app.handlers import register_handlers, verification
+from app.models import Base, db_session
+from app.models import routing
+from app.services.ai_log_writer import ai_log_writer
+from app.services.image_service import ImageService
+from app.services.session_service import SessionService
+from scripts.fake_line_api import FakeLineApi
+from scripts.fake_ollama import FakeOllama
+from scripts.load_test import make_event, sign
+import app.main as main
+
+
+class TestAsyncApp(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=self.engine)
+        db_session.remove()
+        db_session.configure(bind=self.engine)
+
+        self.ollama = FakeOllama(seed=1)
+        self.line_api = FakeLineApi()
+        line_url = self.line_api.start()
+        for patcher in (
+            patch.object(main.ollama_service, "base_url", self.ollama.start()),
+            patch.object(main, "configuration", Configuration(access_token="test", host=line_url)),
+            patch.object(ai_log_writer, "enqueue", return_value=True),
+            patch.object(routing, "read_your_writes", routing.ReadYourWrites(15)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        if "api.health_check" not in main.app.view_functions:
+            register_handlers(main.app)
+
+    def tearDown(self):
+        self.line_api.stop()
+        self.ollama.stop()
+        db_session.remove()
+        Base.metadata.drop_all(bind=self.engine)
+
+    async def test_testing_message_and_api_bridge(self):
+        """Step 2 對話經非同步流程回覆；/api 路徑轉交 Flask"""
+        user_id = "U" + "a" * 32
+        SessionService.start_test(user_id)
+        db_session.remove()
+        self.assertFalse(routing.read_your_writes.is_pinned(user_id))
+
+        client = TestClient(TestServer(create_app(main.app)))
+        await client.start_server()
+        try:
+            event = make_event(user_id, "message", text="六千")
+            body = json.dumps({"destination": "Ubot", "events": [event]}).encode()
+            response = await client.post("/callback", data=body, headers={
+                "Content-Type": "application/json",
+                "X-Line-Signature": sign(body, main.config.LINE_CHANNEL_SECRET),
+            })
+            self.assertEqual(response.status, 200)
+
+            bad = await client.post("/callback", data=body, headers={"X-Line-Signature": "bad"})
+            self.assertEqual(bad.status, 400)
+
+            health = await client.get("/api/health")
+            self.assertEqual(health.status, 200)
+            self.assertEqual((await health.json())["status"], "ok")
+
+            for _ in range(100):
+                if self.line_api.reply_for(event["replyToken"]):
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await client.close()
+
+        self.assertIsNotNone(self.line_api.reply_for(event["replyToken"]))
+        self.assertEqual(SessionService.get_collected_data(user_id).get("budget"), 6000)
+        # 儲存結果時已綁定使用者：之後的 LIFF 查詢固定讀主庫
+        self.assertTrue(routing.read_your_writes.is_pinned(user_id))
+
+    async def test_same_user_events_processed_in_order(self):
+        """同一次推送中同一使用者的兩則 Step 2 訊息依序處理：後一則看得到前一則的結果，回覆順序不變"""
+        user_id = "U" + "b" * 32
+        SessionService.start_test(user_id)
+        db_session.remove()
+
+        ollama = FakeOllama(seed=1, latency="fixed:0.2", script={"rules": [
+            {"name": "extract", "match": {"system": "資料提取員"}, "responses": [{"handler": "extract_fields"}]},
+        ]})
+        self.addCleanup(ollama.stop)
+        patcher = patch.object(main.ollama_service, "base_url", ollama.start())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        client = TestClient(TestServer(create_app(main.app)))
+        await client.start_server()
+        try:
+            events = [make_event(user_id, "message", text="五千"), make_event(user_id, "message", text="想住學校附近")]
+            body = json.dumps({"destination": "Ubot", "events": events}).encode()
+            response = await client.post("/callback", data=body, headers={
+                "Content-Type": "application/json",
+                "X-Line-Signature": sign(body, main.config.LINE_CHANNEL_SECRET),
+            })
+            self.assertEqual(response.status, 200)
+
+            for _ in range(100):
+                if all(self.line_api.reply_for(event["replyToken"]) for event in events):
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await client.close()
+
+        collected = SessionService.get_collected_data(user_id)
+        self.assertEqual((collected.get("budget"), collected.get("location_pref")), (5000, "school"))
+        # 第二則訊息看得到第一則的預算，接著追問房型 (並行處理時會再問一次預算)
+        second = self.line_api.reply_for(events[1]["replyToken"])
+        self.assertEqual(second["messages"][0]["text"], main.ollama_service.QUESTIONS["type_pref"])
+        tokens = [event["replyToken"] for event in events]
+        replied = [record["reply_token"] for record in self.line_api.records() if record["reply_token"] in tokens]
+        self.assertEqual(replied, tokens)
+
+    async def test_bridge_accepts_uploads_over_aiohttp_default(self):
+        """轉交 Flask 的請求本體上限涵蓋驗證照片大小 (aiohttp 預設只有 1MB)"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, True)
+        for patcher in (
+            patch.object(verification, "UPLOAD_FOLDER", folder),
+            patch.object(ImageService, "schedule_normalize"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        client = TestClient(TestServer(create_app(main.app)))
+        await client.start_server()
+        try:
+            form = FormData()
+            form.add_field("file", b"\x89PNG\r\n\x1a\n" + b"\x00" * (2 * 1024 * 1024),
+                           filename="card.png", content_type="image/png")
+            response = await client.post("/api/verification/upload", data=form)
+            self.assertEqual(response.status, 200)
+            self.assertTrue((await response.json())["success"])
+
+            form = FormData()
+            form.add_field("file", b"\x89PNG\r\n\x1a\n" + b"\x00" * (6 * 1024 * 1024),
+                           filename="card.png", content_type="image/png")
+            response = await client.post("/api/verification/upload", data=form)
+            self.assertEqual(response.status, 413)
+        finally:
+            await client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
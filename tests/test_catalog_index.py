@@ -0,0 +1,192 @@
+import sys
+import os
+import random
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session
+from app.models.house import House
+from app.models.persona import Persona
+from app.services.catalog_index import HouseCatalogIndex
+from app.services.matching_service import MatchingService
+from app.services.affinity_service import AffinityService
+from app.models.affinity import HouseAffinity
+from app.services.recommendation_cache import RecommendationPageCache
+
+
+class TestCatalogIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 使用獨立的 SQLite 記憶體資料庫
+        # (允許跨執行緒，背景預取會在其他執行緒查詢)
+        cls.engine = create_engine(
+            "sqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=cls.engine)
+        db_session.remove()
+        db_session.configure(bind=cls.engine)
+
+        rng = random.Random(42)
+        feature_keys = ["garbage_service", "elevator", "security", "balcony", "laundry", "wifi", "parking"]
+        for i in range(300):
+            features = {k: True for k in feature_keys if rng.random() < 0.3}
+            house = House(
+                name=f"House {i}",
+                rent=rng.randrange(2000, 11000, 100),
+                category_tag=rng.choice(["type_A", "type_B", "type_C", None]),
+                features=features,
+                avg_rating=rng.choice([0.0, 3.6, 4.0, 4.2, 4.5, 4.9]),
+                is_active=rng.random() < 0.9
+            )
+            house.refresh_feature_bits()
+            db_session.add(house)
+        persona = Persona(
+            persona_id="type_B",
+            name="懶人貴族型",
+            algo_config={
+                "rent_min": 5500,
+                "rent_max": 8000,
+                "required": ["garbage", "elevator"],
+                "bonus": ["parking"]
+            }
+        )
+        persona.refresh_feature_bits()
+        db_session.add(persona)
+        db_session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        db_session.remove()
+        Base.metadata.drop_all(bind=cls.engine)
+
+    def _brute_force_ranking(self, persona):
+        """以原本的逐筆評分方式計算完整排名"""
+        service = MatchingService()
+        houses = db_session.query(House).filter(House.is_active == True).all()
+        scored = [(service._calculate_house_match_score(h, persona), h.avg_rating, -h.house_id, h.house_id) for h in houses]
+        scored.sort(reverse=True)
+        return [(house_id, score) for score, _, _, house_id in scored]
+
+    def test_full_catalog_matches_reference(self):
+        """全目錄評分結果應與逐筆計算一致"""
+        persona = db_session.query(Persona).filter_by(persona_id="type_B").first()
+        expected = self._brute_force_ranking(persona)
+
+        snapshot = HouseCatalogIndex().get_snapshot()
+        self.assertEqual(snapshot.top_k(persona, len(expected)), expected)
+        self.assertEqual(snapshot.top_k(None, 20), self._brute_force_ranking(None)[:20])
+
+    def test_pagination_is_stable(self):
+        """逐頁取出的結果應無重複且與完整排名一致"""
+        persona = db_session.query(Persona).filter_by(persona_id="type_B").first()
+        snapshot = HouseCatalogIndex().get_snapshot()
+        full = snapshot.top_k(persona, len(snapshot.house_ids))
+
+        pages = []
+        offset = 0
+        while True:
+            page = snapshot.top_k(persona, 5, offset)
+            if not page:
+                break
+            pages.extend(page)
+            offset += 5
+
+        self.assertEqual(pages, full)
+        self.assertEqual(len({house_id for house_id, _ in pages}), len(pages))
+
+    def test_snapshot_rebuilds_on_catalog_change(self):
+        """房源異動後索引應自動重建"""
+        index = HouseCatalogIndex()
+        before = index.get_snapshot()
+        self.assertIs(index.get_snapshot(), before)
+
+        house = db_session.query(House).filter(House.is_active == True).first()
+        house.rent = house.rent + 1
+        db_session.commit()
+
+        self.assertIsNot(index.get_snapshot(), before)
+
+    def test_affinity_matrix_matches_index(self):
+        """匹配矩陣讀取的分頁結果應與全目錄評分一致"""
+        persona = db_session.query(Persona).filter_by(persona_id="type_B").first()
+        expected = HouseCatalogIndex().get_snapshot().top_k(persona, 10)
+
+        AffinityService.refresh_persona("type_B")
+        service = MatchingService()
+        page1 = service.get_recommended_houses_with_scores("type_B", limit=5)
+        page2 = service.get_recommended_houses_with_scores("type_B", limit=5, offset=5)
+
+        got = [(r["house"].house_id, r["match_score"]) for r in page1 + page2]
+        self.assertEqual(got, expected)
+        self.assertTrue(all(r["recommendation_reason"] for r in page1))
+
+    def test_missing_matrix_row_read_only_until_backfill(self):
+        """矩陣尚未補建時分頁改用全目錄評分且不寫入，啟動補建後改讀矩陣"""
+        AffinityService.remove_persona("type_B")
+        db_session.commit()
+        persona = db_session.query(Persona).filter_by(persona_id="type_B").first()
+        expected = HouseCatalogIndex().get_snapshot().top_k(persona, 5, 5)
+
+        page = MatchingService().get_recommended_houses_with_scores("type_B", limit=5, offset=5)
+        self.assertEqual([(r["house"].house_id, r["match_score"]) for r in page], expected)
+        self.assertEqual(db_session.query(HouseAffinity).count(), 0)
+
+        total = AffinityService.backfill_missing()
+        self.assertEqual(total, db_session.query(House).filter(House.is_active == True).count())
+        self.assertEqual(AffinityService.backfill_missing(), 0)
+        page = MatchingService().get_recommended_houses_with_scores("type_B", limit=5, offset=5)
+        self.assertEqual([(r["house"].house_id, r["match_score"]) for r in page], expected)
+
+    def test_refresh_house_only_touches_its_column(self):
+        """房源下架後只移除該房源的矩陣資料"""
+        AffinityService.refresh_persona("type_B")
+        total = db_session.query(HouseAffinity).count()
+
+        house = db_session.query(House).filter(House.is_active == True).first()
+        house.is_active = False
+        db_session.commit()
+        AffinityService.refresh_house(house.house_id)
+
+        self.assertEqual(db_session.query(HouseAffinity).count(), total - 1)
+        self.assertIsNone(db_session.query(HouseAffinity).filter_by(house_id=house.house_id).first())
+
+        house.is_active = True
+        db_session.commit()
+        AffinityService.refresh_house(house.house_id)
+        self.assertEqual(db_session.query(HouseAffinity).count(), total)
+
+    def test_recommendation_cache_prefetch_and_invalidate(self):
+        """預取的頁面應直接命中快取，房源異動後重新組裝"""
+        calls = []
+
+        def build(persona_id, offset):
+            calls.append(offset)
+            return [r["house"].house_id for r in MatchingService().get_recommended_houses_with_scores(
+                persona_id, limit=5, offset=offset)]
+
+        cache = RecommendationPageCache()
+        page1 = cache.get("type_B", 0, build)
+        self.assertIs(cache.get("type_B", 0, build), page1)
+
+        cache.prefetch("type_B", 5, build)
+        page2 = cache.get("type_B", 5, build)
+        self.assertEqual(calls, [0, 5])
+        self.assertEqual(len(set(page1 + page2)), 10)
+
+        house = db_session.query(House).filter_by(house_id=page1[0]).first()
+        house.rent = house.rent + 1
+        db_session.commit()
+        cache.get("type_B", 0, build)
+        self.assertEqual(calls, [0, 5, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from app.config import config
+from app.models import engine_options, make_fork_safe
+
+
+class TestEngineConfig(unittest.TestCase):
+
+    def test_pool_options(self):
+        """PostgreSQL 套用連線池設定；SQLite 只套用編譯快取"""
+        with patch.object(config, "DB_POOL_SIZE", 8), patch.object(config, "DB_POOL_PRE_PING", True):
+            options = engine_options("postgresql+psycopg2://u:p@db/chisoo")
+        self.assertEqual(options["pool_size"], 8)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertNotIn("connect_args", options)
+
+        options = engine_options("postgresql+psycopg://u:p@db/chisoo")
+        self.assertEqual(options["connect_args"], {"prepare_threshold": config.DB_PREPARE_THRESHOLD})
+
+        self.assertNotIn("pool_size", engine_options("sqlite://"))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "需要 os.fork")
+    def test_child_does_not_reuse_parent_connections(self):
+        """fork 後子程序丟棄繼承的連線池，父程序的連線不受影響"""
+        path = os.path.join(os.path.dirname(__file__), "_fork_test.db")
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        engine = create_engine(f"sqlite:///{path}")
+        make_fork_safe(engine)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        self.assertEqual(engine.pool.checkedin(), 1)
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_fd, str(engine.pool.checkedin()).encode())
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(os.read(read_fd, 16), b"0")
+        self.assertEqual(engine.pool.checkedin(), 1)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
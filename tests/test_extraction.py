@@ -0,0 +1,80 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import ollama_service
+from app.services.model_router import ModelRouter
+from app.services.ollama_service import OllamaService
+from scripts.fake_ollama import FakeOllama
+
+ONE_SHOT = "預算5000，想住學校附近的套房，不要跟房東住"
+
+
+class TestMultiFieldExtraction(unittest.TestCase):
+
+    def start(self, responses):
+        fake = FakeOllama(seed=1, script={"rules": [{"name": "extract", "responses": responses}]})
+        service = OllamaService()
+        service.base_url = fake.start()
+        self.addCleanup(fake.stop)
+        patcher = patch.object(ollama_service, "model_router", ModelRouter("", service.model_4b))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return fake, service
+
+    def test_one_message_fills_every_mentioned_field(self):
+        """一次提取模式：一句話提到的欄位一次收下，只花一次模型呼叫；主題模式只收當前主題"""
+        fake, service = self.start([{"handler": "extract_fields"}])
+
+        result = service.analyze_and_respond(ONE_SHOT, {})
+        self.assertEqual(result["collected_data"], {
+            "budget": 5000, "location_pref": "school", "type_pref": "套房", "management_pref": "no_owner",
+        })
+        self.assertEqual(result["response"], OllamaService.QUESTIONS["features_preference"])
+        self.assertEqual(fake.stats["requests"], 1)
+
+        service.extraction_mode = "topic"
+        self.assertEqual(service.analyze_and_respond(ONE_SHOT, {})["collected_data"], {"budget": 5000})
+
+    def test_features_still_asked_when_opening_has_none(self):
+        """開場沒提到設施：範例不含設施欄位，模型照格式多輸出 features_preference 也不會跳過設施題"""
+        self.assertNotIn("features_preference", OllamaService.MULTI_EXTRACTION_PROMPTS["budget"].split("輸出範例")[-1])
+
+        _, service = self.start(['{"budget": 5000, "location_pref": "school", "type_pref": "套房", '
+                                 '"management_pref": "no_owner", "features_preference": "done"}'])
+        result = service.analyze_and_respond(ONE_SHOT, {})
+        self.assertNotIn("features_preference", result["collected_data"])
+        self.assertFalse(result["is_complete"])
+        self.assertEqual(result["response"], OllamaService.QUESTIONS["features_preference"])
+
+    def test_answered_fields_not_overwritten(self):
+        """一次提取模式：回答管理偏好時的「隨便」被歸到預算，不覆寫先前回答的預算"""
+        _, service = self.start(['{"budget": 99999, "management_pref": "none"}', '{"budget": 99999}'])
+        collected = {"budget": 5000, "location_pref": "school", "type_pref": "套房"}
+
+        result = service.analyze_and_respond("隨便", collected)
+        self.assertEqual(result["collected_data"]["budget"], 5000)
+        self.assertEqual(result["collected_data"]["management_pref"], "none")
+
+        # 模型只給了已回答的欄位：改由規則解析當前主題
+        result = service.analyze_and_respond("隨便", collected)
+        self.assertEqual(result["collected_data"]["budget"], 5000)
+        self.assertEqual(result["collected_data"]["management_pref"], "none")
+
+    def test_invalid_field_dropped_without_losing_others(self):
+        """逐欄檢查：不合法的欄位不合併，同一句話的其他欄位照常收下"""
+        _, service = self.start(['{"budget": 5000, "location_pref": "學校附近", "type_pref": "套房"}'])
+
+        result = service.analyze_and_respond(ONE_SHOT, {})
+        self.assertEqual(result["collected_data"], {"budget": 5000, "type_pref": "套房"})
+        self.assertEqual(result["response"], OllamaService.QUESTIONS["location_pref"])
+        self.assertEqual(OllamaService.valid_fields({"budget": True, "reason": "x", "required_features": ["冷氣"]}),
+                         {"required_features": ["冷氣"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
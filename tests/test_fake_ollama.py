@@ -0,0 +1,90 @@
+import sys
+import os
+import json
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from app.services.metrics import OLLAMA_PROMPT_EVAL_TOKENS
+from app.services.ollama_service import OllamaService
+from scripts.fake_ollama import FakeOllama
+
+
+class TestFakeOllama(unittest.TestCase):
+
+    def start(self, **kwargs):
+        fake = FakeOllama(seed=1, **kwargs)
+        base_url = fake.start()
+        self.addCleanup(fake.stop)
+        service = OllamaService()
+        service.base_url = base_url
+        return fake, service
+
+    def test_recorded_extraction_flow(self):
+        """OllamaService 可透過替身完成連線檢查、參數提取與批次設施匹配"""
+        fake, service = self.start()
+        self.assertTrue(service.test_connection())
+        self.assertIn(service.model_4b, service.list_models())
+
+        # 錄製回應依序回放：純 JSON、含 <think>、markdown 區塊
+        self.assertEqual(service.extract_params("六千", topic="budget"), {"budget": 6000})
+        service.extract_params("五千 市區", topic="budget")
+        self.assertEqual(service.extract_params("大概五六千", topic="budget"), {"budget": 6000})
+
+        matches = service.batch_match_features(["近超商"], {"type_A": ["wifi"], "type_B": ["elevator"]})
+        self.assertEqual(set(matches), {"type_A", "type_B"})
+        self.assertEqual(fake.stats["rules"], {"extract": 3, "feature_match": 1})
+
+    def test_streaming_matches_non_streaming(self):
+        """串流模式逐段回傳，最後一筆帶統計欄位"""
+        fake, service = self.start(script={"rules": [{"name": "fixed", "responses": ["<think>x</think>{\"a\": 1}"]}]})
+        url = f"{fake.base_url}/api/generate"
+        payload = {"model": service.model_4b, "prompt": "hi"}
+
+        with requests.post(url, json=payload, stream=True, timeout=5) as response:
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertGreater(len(lines), 2)
+        self.assertEqual("".join(line["response"] for line in lines), "<think>x</think>{\"a\": 1}")
+        self.assertTrue(lines[-1]["done"])
+        self.assertIn("prompt_eval_count", lines[-1])
+
+        body = requests.post(url, json={**payload, "stream": False}, timeout=5).json()
+        self.assertEqual(body["response"], "<think>x</think>{\"a\": 1}")
+
+    def test_prompt_prefix_reuse(self):
+        """同主題的系統提示詞只在第一次完整評估，之後只評估使用者輸入"""
+        fake, service = self.start(parallel=1)
+        self.assertIs(service._get_extraction_prompt("budget"), service._get_extraction_prompt("budget"))
+
+        labels = {"model": service.model_4b, "purpose": "extract", "topic": "budget"}
+        sizes = []
+        for text in ("六千", "五千 市區", "大概五六千"):
+            before = OLLAMA_PROMPT_EVAL_TOKENS.sum(**labels)
+            service.extract_params(text, topic="budget")
+            sizes.append(OLLAMA_PROMPT_EVAL_TOKENS.sum(**labels) - before)
+
+        self.assertGreater(sizes[0], 500)
+        self.assertLess(max(sizes[1:]), 10)
+
+    def test_errors_and_concurrency_cap(self):
+        """錯誤率與同時處理上限"""
+        fake, service = self.start(error_rate=1.0)
+        self.assertEqual(service.extract_params("六千", topic="budget"), {})
+        self.assertEqual(fake.stats["errors"], 1)
+
+        fake, service = self.start(latency="fixed:0.05", parallel=2, max_queue=100)
+        threads = [threading.Thread(target=service.extract_params, args=("六千",)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fake.stats["served"], 6)
+        self.assertEqual(fake.stats["max_inflight"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
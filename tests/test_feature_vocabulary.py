@@ -0,0 +1,60 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.feature_vocabulary import (
+    FEATURE_BITS,
+    canonical_feature,
+    decode_features,
+    encode_features,
+    popcount,
+)
+from app.services.matching_service import MatchingService
+
+
+class TestFeatureVocabulary(unittest.TestCase):
+
+    def test_aliases_resolve_to_same_key(self):
+        """中英文別名應對應到同一個標準設施"""
+        for name in ["washer", "laundry", "洗衣機", "要有洗衣機", "Washing Machine"]:
+            self.assertEqual(canonical_feature(name), "laundry", name)
+        for name in ["garbage", "garbage_service", "子母車", "垃圾子母車"]:
+            self.assertEqual(canonical_feature(name), "garbage_service", name)
+
+    def test_no_accidental_substring_match(self):
+        """英文不做子字串比對 (ac 不應命中 balcony)"""
+        self.assertEqual(canonical_feature("balcony"), "balcony")
+        bits, _ = encode_features(["ac"])
+        self.assertFalse(bits & encode_features({"balcony": True})[0])
+        self.assertIsNone(canonical_feature("spaceship"))
+
+    def test_negated_alias_ignored(self):
+        """緊接在否定詞後的中文別名不算提到該設施"""
+        for name in ["不要電梯", "沒有冷氣", "無陽台", "不用洗衣機"]:
+            self.assertIsNone(canonical_feature(name), name)
+        self.assertEqual(canonical_feature("不要電梯，要冷氣"), "ac")
+        self.assertEqual(canonical_feature("沒有冷氣也沒關係但要有冷氣"), "ac")
+        self.assertEqual(canonical_feature("要有電梯"), "elevator")
+
+    def test_encode_house_features(self):
+        """房源 features dict 只編碼值為真的項目，並回報無法辨識的名稱"""
+        bits, unknown = encode_features({"電梯": True, "冷氣": False, "garbage_service": True, "火箭": True})
+        self.assertEqual(sorted(decode_features(bits)), ["elevator", "garbage_service"])
+        self.assertEqual(unknown, ["火箭"])
+        self.assertEqual(popcount(bits), 2)
+        self.assertEqual(len(set(FEATURE_BITS.values())), len(FEATURE_BITS))
+
+    def test_match_feature_bits(self):
+        """使用者自由文字設施以 popcount 計算匹配率"""
+        offered, _ = encode_features(["washer", "elevator"])
+        result = MatchingService.match_feature_bits(["洗衣機", "電梯", "游泳池"], offered)
+        self.assertEqual(result["matched"], 2)
+        self.assertEqual(result["total"], 3)
+        self.assertEqual(result["unknown"], ["游泳池"])
+
+
+if __name__ == '__main__':
+    unittest.main()
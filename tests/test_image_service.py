@@ -0,0 +1,129 @@
+import sys
+import os
+import io
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from PIL import Image
+
+from app.handlers import verification
+from app.handlers.verification import verification_bp
+from app.services.image_service import ImageService, SIZES, derivative_name, storage_path
+
+
+def make_png(width=2400, height=1200, orientation=6):
+    """產生帶 EXIF Orientation 與 GPS 標籤的 PNG"""
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x8825] = {1: "N"}
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", exif=exif)
+    return buffer.getvalue()
+
+
+class TestImageService(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        patcher = patch.object(verification, "UPLOAD_FOLDER", self.folder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.folder, True)
+
+        app = Flask(__name__)
+        app.register_blueprint(verification_bp)
+        self.client = app.test_client()
+
+    def _upload(self, data, name="card.png"):
+        return self.client.post(
+            "/api/verification/upload",
+            data={"file": (io.BytesIO(data), name)},
+            content_type="multipart/form-data",
+        )
+
+    def test_upload_normalizes_in_background(self):
+        """上傳後立即回傳，背景產生去除 EXIF、轉正且縮小的 JPEG"""
+        response = self._upload(make_png())
+        self.assertEqual(response.status_code, 200)
+        filename = response.get_json()["filename"]
+        self.assertRegex(filename, r"^[0-9a-f]{64}\.png$")
+
+        ImageService.wait(timeout=60)
+
+        for size, (max_edge, _) in SIZES.items():
+            path = storage_path(self.folder, derivative_name(filename, size))
+            with Image.open(path) as image:
+                self.assertEqual(image.format, "JPEG")
+                self.assertEqual(len(image.getexif()), 0)
+                # Orientation=6 需旋轉 90 度：橫圖轉為直圖
+                self.assertGreater(image.height, image.width)
+                self.assertEqual(max(image.size), min(max_edge, 2400))
+
+        review = self.client.get(f"/api/verification/image/{filename}?size=review")
+        self.assertEqual(review.mimetype, "image/jpeg")
+        review.close()
+
+    def test_dedupe_and_immutable_caching(self):
+        """相同內容只存一份；回應帶 private immutable 快取、ETag 並支援 Range"""
+        data = make_png(64, 48)
+        first = self._upload(data).get_json()["filename"]
+        second = self._upload(data).get_json()["filename"]
+        self.assertEqual(first, second)
+        ImageService.wait(timeout=60)
+
+        originals = [name for _, _, files in os.walk(self.folder) for name in files if name.endswith(".png")]
+        self.assertEqual(originals, [first])
+
+        url = f"/api/verification/image/{first}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertTrue(response.cache_control.private)
+        self.assertFalse(response.cache_control.public)
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+        etag = response.headers["ETag"]
+        response.close()
+
+        cached = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        partial = self.client.get(url, headers={"Range": "bytes=0-7"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.data, data[:8])
+        partial.close()
+
+        self.assertEqual(self.client.get("/api/verification/image/..%2Fsecret.png").status_code, 404)
+
+    def test_rejects_oversized_and_spoofed(self):
+        """超過上限或檔頭不符時拒絕，且不留下任何檔案"""
+        with patch.object(verification, "MAX_FILE_SIZE", 1024):
+            response = self._upload(make_png(400, 400))
+        self.assertEqual(response.status_code, 413)
+
+        response = self._upload(b"GIF89a" + b"\x00" * 100, "card.jpg")
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual([name for _, _, files in os.walk(self.folder) for name in files], [])
+
+    def test_spawned_worker_skips_app_setup(self):
+        """spawn 工作程序以 __mp_main__ 重新匯入 run.py 時不做任何初始化 (不連線資料庫、不匯入 LINE SDK)"""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = (
+            "import runpy, sys; runpy.run_path('run.py', run_name='__mp_main__'); "
+            "print(sorted(m for m in ('linebot', 'app.main', 'app.models') if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                                env={**os.environ, "DATABASE_URL": "sqlite://"}, check=True).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session
+from app.services.ai_log_writer import ai_log_writer
+from scripts.fake_line_api import FakeLineApi
+from scripts.fake_ollama import FakeOllama
+from scripts.load_test import build_report, run_load, start_in_process_bot
+from scripts.seed_data import seed_personas, seed_sample_houses
+import app.main as main
+
+
+class TestLoadHarness(unittest.TestCase):
+
+    def setUp(self):
+        # 使用獨立的 SQLite 記憶體資料庫 (背景分析執行緒也會使用)
+        self.engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=self.engine)
+        db_session.remove()
+        db_session.configure(bind=self.engine)
+        seed_personas()
+        seed_sample_houses()
+
+        self.ollama = FakeOllama(seed=1)
+        self.line_api = FakeLineApi()
+        line_url = self.line_api.start()
+        patcher = patch.object(main.ollama_service, "base_url", self.ollama.start())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(ai_log_writer, "enqueue", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        configuration = main.configuration
+        self.target, self.server = start_in_process_bot(line_url)
+        self.addCleanup(setattr, main, "configuration", configuration)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.line_api.stop()
+        self.ollama.stop()
+        db_session.remove()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_signed_journey_reaches_favorites(self):
+        """簽章事件走完整趟旅程，回覆送到 LINE API 替身"""
+        recorder, elapsed = run_load(self.target, main.config.LINE_CHANNEL_SECRET, self.line_api,
+                                     users=1, journeys=1, result_timeout=10)
+        report = build_report(recorder, elapsed, {}, {}, self.line_api)
+
+        self.assertEqual((report["journeys"], report["failed_journeys"]), (1, 0))
+        self.assertEqual(report["steps"]["weight_answer"]["count"], 6)
+        self.assertEqual(report["steps"]["show_favorites"]["errors"], 0)
+        self.assertGreater(report["line_api"]["reply"]["calls"], 15)
+        self.assertEqual(report["line_api"]["reply"]["errors"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from app.services.metrics import MetricsRegistry, instrument_engine, registry
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_exposition(self):
+        """直方圖輸出累積區間、總和與次數"""
+        local = MetricsRegistry()
+        histogram = local.histogram("demo_seconds", "demo", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, stage="reply")
+        local.counter("demo_events", "demo").inc(2)
+
+        output = local.render()
+        self.assertIn('demo_seconds_bucket{stage="reply",le="0.1"} 1', output)
+        self.assertIn('demo_seconds_bucket{stage="reply",le="1.0"} 3', output)
+        self.assertIn('demo_seconds_bucket{stage="reply",le="+Inf"} 4', output)
+        self.assertIn('demo_seconds_count{stage="reply"} 4', output)
+        self.assertIn("demo_events_total 2", output)
+
+    def test_engine_queries_are_timed(self):
+        """資料庫查詢依操作與資料表記錄耗時"""
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, "test")
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE houses (id INTEGER)"))
+            conn.execute(text("SELECT id FROM houses"))
+
+        output = registry.render()
+        self.assertIn('chisoo_db_query_seconds_count{operation="SELECT",table="houses"}', output)
+        self.assertIn("chisoo_db_pool_connections", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.config import config
+from app.models import Base
+from app.models.ai_log import AILog
+from app.services import ollama_service
+from app.services.model_router import ModelRouter
+from app.services.ollama_service import OllamaService
+from scripts.fake_ollama import FakeOllama
+
+SMALL = "tiny:1b"
+LARGE = config.OLLAMA_MODEL_4B
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = ModelRouter(SMALL, LARGE)
+        patcher = patch.object(ollama_service, "model_router", self.router)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_escalates_only_when_small_output_invalid(self):
+        """小模型結果合法時直接採用，不合法時改用大模型；回報各模型提供結果的比例"""
+        fake = FakeOllama(seed=1, models=[LARGE, SMALL], script={"rules": [
+            {"name": "small_ok", "match": {"model": SMALL, "prompt": "五千"}, "responses": ['{"budget": 5000}']},
+            {"name": "small_bad", "match": {"model": SMALL}, "responses": ['{"budget": "很多"}']},
+            {"name": "large", "responses": ['{"budget": 6000}']},
+        ]})
+        service = OllamaService()
+        service.base_url = fake.start()
+        self.addCleanup(fake.stop)
+
+        self.assertEqual(service.extract_params("五千", topic="budget"), {"budget": 5000})
+        self.assertEqual(service.extract_params("六千", topic="budget"), {"budget": 6000})
+
+        self.assertEqual(fake.stats["rules"], {"small_ok": 1, "small_bad": 1, "large": 1})
+        self.assertEqual(self.router.shares(), {"extract": {LARGE: 0.5, SMALL: 0.5}})
+
+    def test_empty_result_served_without_escalation(self):
+        """閒聊時小模型回傳 {} 是正確答案，不升級；只有 JSON 格式錯誤才升級"""
+        fake = FakeOllama(seed=1, models=[LARGE, SMALL], script={"rules": [
+            {"name": "small_broken", "match": {"model": SMALL, "prompt": "壞掉"}, "responses": ['{"budget": 5']},
+            {"name": "small_empty", "match": {"model": SMALL}, "responses": ['{}']},
+            {"name": "large", "responses": ['{"budget": 6000}']},
+        ]})
+        service = OllamaService()
+        service.base_url = fake.start()
+        self.addCleanup(fake.stop)
+
+        self.assertEqual(service.extract_params("你好呀", topic="budget"), {})
+        self.assertEqual(fake.stats["rules"], {"small_empty": 1})
+        self.assertEqual(self.router.shares(), {"extract": {SMALL: 1.0}})
+
+        self.assertEqual(service.extract_params("壞掉", topic="budget"), {"budget": 6000})
+        self.assertEqual(fake.stats["rules"], {"small_empty": 1, "small_broken": 1, "large": 1})
+
+    def test_under_extraction_escalates(self):
+        """小模型回傳 {} 但規則解析找得到欄位時視為漏提取：升級並記為小模型失敗；閒聊的 {} 仍為成功"""
+        fake = FakeOllama(seed=1, models=[LARGE, SMALL], script={"rules": [
+            {"name": "small_empty", "match": {"model": SMALL, "system": "資料提取員"}, "responses": ['{}']},
+            {"name": "large", "match": {"system": "資料提取員"}, "responses": ['{"budget": 6000}']},
+            {"name": "guidance", "responses": ["可以再說說您的預算嗎？"]},
+        ]})
+        service = OllamaService()
+        service.base_url = fake.start()
+        self.addCleanup(fake.stop)
+
+        with patch.object(service, "_save_ai_log") as save:
+            result = service.analyze_and_respond("6000", {}, user_id="U1")
+            self.assertEqual(result["collected_data"]["budget"], 6000)
+            self.assertEqual(fake.stats["rules"], {"small_empty": 1, "large": 1})
+            self.assertTrue(save.call_args.kwargs["escalated"])
+            self.assertTrue(save.call_args.kwargs["is_success"])
+
+            service.analyze_and_respond("你好呀", {}, user_id="U1")
+            self.assertFalse(save.call_args.kwargs["escalated"])
+            self.assertTrue(save.call_args.kwargs["is_success"])
+
+        self.assertEqual(self.router._stats[("extract", "budget", SMALL)][:2], [2, 1])
+
+    def test_routes_to_large_when_small_rarely_succeeds(self):
+        """小模型成功率低到先試反而更慢時直接用大模型，但仍定期試小模型"""
+        for _ in range(ModelRouter.MIN_SAMPLES):
+            self.router.record("extract", "budget", SMALL, False, 1.0, served=False)
+            self.router.record("extract", "budget", LARGE, True, 2.0)
+
+        choices = [self.router.choose("extract", "budget") for _ in range(ModelRouter.EXPLORE_EVERY)]
+        self.assertEqual(choices.count(SMALL), 1)
+        self.assertEqual(self.router.choose("extract", "location_pref"), SMALL)
+
+    def test_load_history_from_ai_logs(self):
+        """以 AILog 紀錄初始化：升級的回合與小模型漏提取 (is_success=False) 的回合計為小模型失敗"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.addCleanup(engine.dispose)
+
+        with Session(engine) as session:
+            session.add_all([
+                AILog(user_id="U1", topic="budget", ai_raw_response="{}", is_success=True,
+                      model=LARGE, latency_ms=2000, escalated=True)
+                for _ in range(ModelRouter.MIN_SAMPLES)
+            ] + [
+                AILog(user_id="U1", topic="location_pref", ai_raw_response="[規則解析] {}", is_success=False,
+                      model=SMALL, latency_ms=1000, escalated=False)
+                for _ in range(ModelRouter.MIN_SAMPLES)
+            ])
+            session.commit()
+            self.assertEqual(self.router.load_history(session), 2 * ModelRouter.MIN_SAMPLES)
+
+        self.assertEqual(self.router.choose("extract", "budget"), LARGE)
+        self.assertEqual(self.router.choose("extract", "location_pref"), LARGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
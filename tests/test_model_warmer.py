@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import model_warmer
+from app.services.metrics import OLLAMA_COLD_LOADS
+from app.services.model_router import ModelRouter
+from app.services.model_warmer import ModelWarmer, in_busy_hours, parse_busy_hours
+from app.services.ollama_service import OllamaService
+from scripts.fake_ollama import FakeOllama
+
+
+class TestModelWarmer(unittest.TestCase):
+
+    def test_busy_hours_wrap_midnight(self):
+        """時段可跨午夜；未設定時段代表全天"""
+        ranges = parse_busy_hours("07-02")
+        self.assertTrue(in_busy_hours(datetime(2026, 1, 1, 23), ranges))
+        self.assertTrue(in_busy_hours(datetime(2026, 1, 1, 1), ranges))
+        self.assertFalse(in_busy_hours(datetime(2026, 1, 1, 4), ranges))
+        self.assertTrue(in_busy_hours(datetime(2026, 1, 1, 4), parse_busy_hours("")))
+        with self.assertRaises(ValueError):
+            parse_busy_hours("25-03")
+
+    def test_default_models_follow_routing(self):
+        """未指定模型時預熱大模型；啟用小 / 大模型路由時兩個都預熱"""
+        service = OllamaService()
+        large = service.model_4b
+        with patch.object(model_warmer, "model_router", ModelRouter("", large)):
+            self.assertEqual(ModelWarmer(service=service).models, [large])
+        with patch.object(model_warmer, "model_router", ModelRouter("tiny:1b", large)):
+            self.assertEqual(ModelWarmer(service=service).models, ["tiny:1b", large])
+
+    def test_resident_in_busy_hours_then_released(self):
+        """尖峰時段預載並常駐，離峰時釋放；之後的使用者請求記錄為冷載入"""
+        fake = FakeOllama(seed=1, cold_start=0.2)
+        service = OllamaService()
+        service.base_url = fake.start()
+        self.addCleanup(fake.stop)
+        patcher = patch.object(OllamaService, "COLD_LOAD_SECONDS", 0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        now = [datetime(2026, 1, 1, 9)]
+        warmer = ModelWarmer(service=service, busy_hours="07-02", clock=lambda: now[0])
+        model = service.model_4b
+        before = OLLAMA_COLD_LOADS.value(model=model, purpose="warmup")
+
+        warmer.tick()
+        warmer.tick()
+        self.assertTrue(warmer.resident and fake.is_loaded(model))
+        self.assertEqual(fake.stats["cold_loads"], 1)
+        self.assertEqual(OLLAMA_COLD_LOADS.value(model=model, purpose="warmup"), before + 1)
+
+        # 常駐期間的使用者請求不需載入
+        service.extract_params("六千", topic="budget")
+        self.assertEqual(fake.stats["cold_loads"], 1)
+
+        now[0] = datetime(2026, 1, 1, 3)
+        warmer.tick()
+        self.assertFalse(warmer.resident or fake.is_loaded(model))
+
+        before = OLLAMA_COLD_LOADS.value(model=model, purpose="extract")
+        service.extract_params("六千", topic="budget")
+        self.assertEqual(OLLAMA_COLD_LOADS.value(model=model, purpose="extract"), before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
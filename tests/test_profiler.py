@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import config
+from app.services.profiler import memory_profiler
+import admin_panel
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.client = admin_panel.app.test_client()
+        self.headers = {"X-Debug-Token": "secret"}
+
+    def test_disabled_without_token(self):
+        """未設定權杖時端點不存在；權杖錯誤回傳 403"""
+        with patch.object(config, "ADMIN_DEBUG_TOKEN", ""):
+            self.assertEqual(self.client.get("/debug/profile").status_code, 404)
+        with patch.object(config, "ADMIN_DEBUG_TOKEN", "secret"):
+            response = self.client.get("/debug/profile", headers={"X-Debug-Token": "wrong"})
+            self.assertEqual(response.status_code, 403)
+
+    def test_profile_formats(self):
+        """取樣結果包含其他執行緒的堆疊，可輸出 collapsed 與 speedscope"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="matching")
+        worker.start()
+        try:
+            with patch.object(config, "ADMIN_DEBUG_TOKEN", "secret"):
+                collapsed = self.client.get("/debug/profile?seconds=0.3&interval=2", headers=self.headers)
+                speedscope = self.client.get(
+                    "/debug/profile?seconds=0.3&format=speedscope", headers=self.headers
+                )
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertEqual(collapsed.status_code, 200)
+        self.assertIn("matching;", collapsed.get_data(as_text=True))
+        self.assertIn("busy_loop", collapsed.get_data(as_text=True))
+
+        data = json.loads(speedscope.get_data(as_text=True))
+        self.assertIn("matching", [profile["name"] for profile in data["profiles"]])
+        self.assertTrue(data["shared"]["frames"])
+
+    def test_memory_snapshot_diff(self):
+        """tracemalloc 快照與上一次比較，停止後關閉追蹤"""
+        with patch.object(config, "ADMIN_DEBUG_TOKEN", "secret"):
+            self.assertEqual(self.client.post("/debug/memory/start", headers=self.headers).status_code, 200)
+            leak = [bytearray(1024) for _ in range(200)]
+            response = self.client.get("/debug/memory/snapshot?limit=5", headers=self.headers)
+            self.client.post("/debug/memory/stop", headers=self.headers)
+
+        data = response.get_json()["data"]
+        self.assertEqual(len(data["top"]), 5)
+        self.assertGreater(data["top"][0]["size_diff_kb"], 100)
+        self.assertIn("sessions", data["live"])
+        self.assertFalse(memory_profiler.tracing)
+        del leak
+
+
+if __name__ == '__main__':
+    unittest.main()
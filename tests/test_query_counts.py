@@ -0,0 +1,125 @@
+import sys
+import os
+import unittest
+from contextlib import contextmanager
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session
+from app.models.house import House
+from app.models.user import User
+from app.models.review import Review
+from app.models.favorite import Favorite
+from app.handlers.api import api_bp
+from app.services.stats_service import stats_service
+import admin_panel
+
+
+@contextmanager
+def count_queries(engine):
+    """統計區塊內送出的 SQL 數量"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+class TestQueryCounts(unittest.TestCase):
+    """列表端點的查詢數不應隨資料筆數增加 (N+1 檢查)"""
+
+    @classmethod
+    def setUpClass(cls):
+        # 使用獨立的 SQLite 記憶體資料庫
+        cls.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=cls.engine)
+        db_session.remove()
+        db_session.configure(bind=cls.engine)
+
+        for i in range(10):
+            db_session.add(House(name=f"House {i}", rent=5000 + i * 100))
+        db_session.add(User(user_id="U_small"))
+        db_session.add(User(user_id="U_large"))
+        db_session.commit()
+
+        # U_small 有 2 筆資料 (待審核)，U_large 有 10 筆 (已通過)
+        for user_id, count, status in (("U_small", 2, "pending"), ("U_large", 10, "approved")):
+            for house_id in range(1, count + 1):
+                db_session.add(Review(house_id=house_id, user_id=user_id, rating=4, status=status))
+                db_session.add(Favorite(user_id=user_id, house_id=house_id))
+        db_session.commit()
+
+        api_app = Flask(__name__)
+        api_app.register_blueprint(api_bp, url_prefix="/api")
+        cls.api_client = api_app.test_client()
+        cls.admin_client = admin_panel.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        db_session.remove()
+        Base.metadata.drop_all(bind=cls.engine)
+
+    def _query_count(self, client, url, headers=None):
+        # 每次請求使用全新的 Session，避免 identity map 掩蓋延遲載入
+        db_session.remove()
+        with count_queries(self.engine) as statements:
+            response = client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def _assert_constant(self, client, small, large):
+        """2 筆與 10 筆資料的查詢數必須相同"""
+        small_count = self._query_count(client, *small)
+        large_count = self._query_count(client, *large)
+        self.assertEqual(small_count, large_count, f"{large[0]} 查詢數隨筆數增加")
+
+    def test_user_reviews(self):
+        self._assert_constant(
+            self.api_client,
+            ("/api/reviews", {"X-User-Id": "U_small"}),
+            ("/api/reviews", {"X-User-Id": "U_large"})
+        )
+
+    def test_favorites(self):
+        self._assert_constant(
+            self.api_client,
+            ("/api/favorites", {"X-User-Id": "U_small"}),
+            ("/api/favorites", {"X-User-Id": "U_large"})
+        )
+
+    def test_admin_reviews_list(self):
+        self._assert_constant(
+            self.admin_client,
+            ("/reviews?status=pending",),
+            ("/reviews?status=approved",)
+        )
+
+    def test_admin_dashboard(self):
+        """儀表板查詢數與使用者總數無關"""
+        stats_service.invalidate()
+        before = self._query_count(self.admin_client, "/")
+
+        for i in range(20):
+            db_session.add(User(user_id=f"U_extra_{i}", persona_type="type_B"))
+        db_session.commit()
+        stats_service.invalidate()
+
+        self.assertEqual(self._query_count(self.admin_client, "/"), before)
+        self.assertEqual(stats_service.snapshot()["user_count"], 22)
+
+        # 未過期時只剩最近使用者、待審核驗證與人物誌列表三個查詢
+        self.assertEqual(self._query_count(self.admin_client, "/"), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, db_session, init_db
+from app.models.house import House
+from app.models.user import User
+from app.models import routing
+from app.handlers.api import api_bp
+
+
+def make_database(label):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([House(name=f"{label} {i}", rent=5000, avg_rating=4.0) for i in range(3)])
+        session.add_all([User(user_id="U_writer"), User(user_id="U_reader")])
+        session.commit()
+    return engine
+
+
+class TestReadReplica(unittest.TestCase):
+
+    def setUp(self):
+        self.primary = make_database("Primary")
+        self.replica = make_database("Replica")
+        db_session.remove()
+        db_session.configure(bind=self.primary)
+        self.monitor = routing.configure_replica(self.replica)
+        self.addCleanup(routing.configure_replica, None)
+        pins = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pins, True)
+        patcher = patch.object(routing, "read_your_writes", routing.ReadYourWrites(15, pins))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        init_db(app)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db_session.remove()
+
+    def _house_names(self):
+        return {house["name"].split()[0] for house in self.client.get("/api/houses").get_json()["houses"]}
+
+    def test_reads_go_to_replica_and_writes_pin_primary(self):
+        """唯讀路由讀副本；寫入的使用者之後讀主庫，其他使用者仍讀副本"""
+        self.assertEqual(self._house_names(), {"Replica"})
+
+        response = self.client.post("/api/favorites", json={"house_id": 1}, headers={"X-User-Id": "U_writer"})
+        self.assertEqual(response.status_code, 201)
+        with self.primary.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM favorites")).scalar(), 1)
+
+        mine = self.client.get("/api/favorites", headers={"X-User-Id": "U_writer"}).get_json()
+        self.assertEqual(mine["total"], 1)
+        # 副本尚未同步：其他使用者的請求仍讀副本
+        self.assertEqual(self._house_names(), {"Replica"})
+
+    def test_pins_shared_between_workers(self):
+        """寫入記錄在共用目錄：其他 worker (另一個 ReadYourWrites) 也會讀主庫，逾期後恢復讀副本"""
+        directory = routing.read_your_writes.directory
+        worker_a = routing.ReadYourWrites(15, directory)
+        worker_b = routing.ReadYourWrites(15, directory)
+
+        worker_a.pin("U_writer")
+        self.assertTrue(worker_b.is_pinned("U_writer"))
+        self.assertFalse(worker_b.is_pinned("U_reader"))
+        self.assertFalse(routing.ReadYourWrites(15).is_pinned("U_writer"))
+
+        path = worker_a._path("U_writer")
+        os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime - 60))
+        self.assertFalse(worker_b.is_pinned("U_writer"))
+
+    def test_non_object_json_body(self):
+        """JSON 內容不是物件時照常處理 (不因取 user_id 而 500)"""
+        for body in ("abc", [1, 2], 3):
+            response = self.client.post("/api/favorites", json=body)
+            self.assertNotEqual(response.status_code, 500)
+
+    def test_falls_back_to_primary(self):
+        """副本查詢失敗或延遲過大時改讀主庫"""
+        with self.replica.begin() as conn:
+            conn.execute(text("DROP TABLE houses"))
+        self.assertEqual(self._house_names(), {"Primary"})
+        self.assertFalse(self.monitor.available())
+
+        monitor = routing.configure_replica(make_database("Replica"))
+        monitor.max_lag = -1  # 任何延遲都視為過大
+        self.assertEqual(self._house_names(), {"Primary"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import os
+import contextlib
+import io
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, inspect, text, update
+from sqlalchemy.pool import StaticPool
+
+from app.models.schema import ensure_schema, schema_meta, schema_version, stored_version
+
+
+class TestSchemaVersion(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_create_once_then_skip(self):
+        """首次建立資料表並記錄指紋；指紋相符時略過 create_all"""
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertIn("houses", inspect(self.engine).get_table_names())
+        self.assertEqual(stored_version(self.engine), schema_version())
+
+        self.assertFalse(ensure_schema(self.engine))
+
+    def test_version_mismatch_reruns(self):
+        """Model 變更 (指紋不同) 時重新執行 create_all 並更新紀錄"""
+        ensure_schema(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(update(schema_meta).values(version="outdated"))
+
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertEqual(stored_version(self.engine), schema_version())
+
+    def test_missing_columns_keep_version_unrecorded(self):
+        """既有資料表缺欄位時不記錄指紋並提示遷移腳本，補上欄位後才記錄"""
+        ensure_schema(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(update(schema_meta).values(version="outdated"))
+            conn.execute(text("ALTER TABLE ai_logs DROP COLUMN escalated"))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(ensure_schema(self.engine))
+        self.assertEqual(stored_version(self.engine), "outdated")
+        self.assertIn("python scripts/add_ai_log_model_columns.py  # ai_logs.escalated", output.getvalue())
+
+        with self.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE ai_logs ADD COLUMN escalated BOOLEAN"))
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertEqual(stored_version(self.engine), schema_version())
+
+
+if __name__ == '__main__':
+    unittest.main()
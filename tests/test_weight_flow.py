@@ -1,12 +1,15 @@
 
 import sys
 import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.config import config
 from app.services.weight_service import WeightService
 from app.services.matching_service import MatchingService
 from app.models.persona import Persona
@@ -43,6 +46,24 @@ class TestWeightFlow(unittest.TestCase):
         print(f"Summary: {summary}")
         self.assertIn("預算", summary)
 
+    def test_precomputed_outcomes(self):
+        """64 種結果與即時計算一致，雷達圖於本機繪製"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, True)
+        with patch.object(config, "CHART_CACHE_DIR", folder):
+            self.assertEqual(WeightService.precompute_outcomes(render_charts=False), 64)
+
+            answers = {"1": "B", "2": "A", "3": "A", "4": "B", "5": "B", "6": "B"}
+            outcome = WeightService.get_outcome(answers)
+            self.assertEqual(outcome["weights"], WeightService.calculate_weights(answers))
+            self.assertEqual(outcome["summary"], WeightService.generate_summary_text(outcome["weights"]))
+            self.assertIn("/api/charts/weights/BAABBB.png", outcome["chart_url"])
+
+            path = WeightService.ensure_chart("BAABBB")
+            with open(path, "rb") as f:
+                self.assertTrue(f.read(8).startswith(b"\x89PNG"))
+            self.assertIsNone(WeightService.ensure_chart("../etc"))
+
     def test_matching_with_weights(self):
         """測試帶入權重的匹配結果"""
         print("\n=== Testing Matching with Weights ===")
@@ -0,0 +1,24 @@
+# ============================================================
+# wsgi.py - 正式環境 WSGI 入口
+# 專案：Chi Soo 租屋小幫手
+# 說明：以 run.create_app 載入與 run.py 相同的應用程式並預熱，供 gunicorn 使用
+# 使用方式：gunicorn -c gunicorn.conf.py wsgi:app
+# ============================================================
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import create_app
+from app.startup import startup_timer, warm_up
+
+# Blueprint 註冊、結構檢查與權重結果預先計算
+app = create_app()
+
+# 預熱後才開始接流量 (preload_app 時於 master 執行一次)
+warm_up()
+startup_timer.print_report()
+
+__all__ = ["app"]